@@ -1,11 +1,73 @@
-QUERY_SUM_STATISTICS = """
-WITH hours AS (
+from constants.universal_constants import LOCAL_TIME_IN_DB, LOCAL_TZ_NAME
+
+# Route filter shared by the hourly, totals and alerts route queries.
+# The route WKT is parsed and buffered once per query (geography buffer = metres, PostGIS picks
+# a best-fit UTM projection); rows match by a bbox (&&) prefilter + ST_Intersects against the
+# corridor, served by the GiST expression indexes on jam_line::geometry / location::geometry.
+ROUTE_BUFFER_METERS = 20
+
+ROUTE_CORRIDOR_CTE = """route AS MATERIALIZED (
+    SELECT ST_Buffer(ST_GeomFromText(%s, 4326)::geography, %s)::geometry AS corridor
+)"""
+
+JAMS_ON_ROUTE = "j.jam_line::geometry && r.corridor AND ST_Intersects(j.jam_line::geometry, r.corridor)"
+ALERTS_ON_ROUTE = "a.location::geometry && r.corridor AND ST_Intersects(a.location::geometry, r.corridor)"
+
+# Hourly series share one structure: generated hour axis, jams and alerts aggregated per hour
+# in separate CTEs and joined to the axis once -> exactly one row per hour of [from, to)
+HOURS_CTE = """hours AS (
     SELECT generate_series(
         date_trunc('hour', %s::timestamptz),
         date_trunc('hour', %s::timestamptz) - interval '1 hour',
         interval '1 hour'
     ) AS utc_time
+)"""
+
+# LOCAL_TIME_IN_DB: each hour is also formatted in LOCAL_TZ_NAME by the database (DST aware,
+# h.utc_time is timestamptz so the session time zone does not matter)
+LOCAL_TIME_COLUMN = (f"\n    to_char(h.utc_time AT TIME ZONE '{LOCAL_TZ_NAME}', 'YYYY-MM-DD HH24:MI:SS') AS local_time,"
+                     if LOCAL_TIME_IN_DB else "")
+
+HOURLY_STATISTICS_SELECT = f"""SELECT
+    j.data_jams,
+    j.speedKMH,
+    j.delay,
+    j.level,
+    j.length,
+    h.utc_time,{LOCAL_TIME_COLUMN}
+    COALESCE(a.data_alerts, 0)            AS data_alerts
+FROM hours h
+LEFT JOIN jams_agg   j USING (utc_time)
+LEFT JOIN alerts_agg a USING (utc_time)
+ORDER BY h.utc_time;"""
+
+QUERY_SUM_STATISTICS = f"""
+WITH {HOURS_CTE},
+jams_agg AS (
+    SELECT
+        date_trunc('hour', published_at AT TIME ZONE 'UTC') AS utc_time,
+        COUNT(*)                          AS data_jams,
+        AVG(speed_kmh_avg)::FLOAT         AS speedKMH,
+        AVG(delay_avg)::FLOAT             AS delay,
+        AVG(jam_level_avg)::FLOAT         AS level,
+        AVG(jam_length_avg)::FLOAT        AS length
+    FROM jams
+    WHERE published_at >= %s AND published_at < %s
+    GROUP BY utc_time
 ),
+alerts_agg AS (
+    SELECT
+        date_trunc('hour', published_at AT TIME ZONE 'UTC') AS utc_time,
+        COUNT(*)                          AS data_alerts
+    FROM alerts
+    WHERE published_at >= %s AND published_at < %s
+    GROUP BY utc_time
+)
+{HOURLY_STATISTICS_SELECT}
+"""
+
+QUERY_SUM_STATISTICS_WITH_STREETS = f"""
+WITH {HOURS_CTE},
 jams_agg AS (
     SELECT
         date_trunc('hour', published_at AT TIME ZONE 'UTC') AS utc_time,
@@ -16,6 +78,7 @@ jams_agg AS (
         AVG(jam_length_avg)::FLOAT        AS length
     FROM jams
     WHERE published_at >= %s AND published_at < %s
+      AND street_id = ANY(%s)
     GROUP BY utc_time
 ),
 alerts_agg AS (
@@ -24,70 +87,39 @@ alerts_agg AS (
         COUNT(*)                          AS data_alerts
     FROM alerts
     WHERE published_at >= %s AND published_at < %s
+      AND street_id = ANY(%s)
     GROUP BY utc_time
 )
-SELECT
-    j.data_jams,
-    j.speedKMH,
-    j.delay,
-    j.level,
-    j.length,
-    h.utc_time,
-    COALESCE(a.data_alerts, 0)            AS data_alerts
-FROM hours h
-LEFT JOIN jams_agg   j USING (utc_time)
-LEFT JOIN alerts_agg a USING (utc_time)
-ORDER BY h.utc_time;
+{HOURLY_STATISTICS_SELECT}
 """
 
-QUERY_SUM_STATISTICS_WITH_STREETS = """
-       SELECT 
-            COUNT(*) AS data_jams,
-            AVG(speed_kmh_avg)::FLOAT AS speedKMH,
-            AVG(delay_avg)::FLOAT AS delay,
-            AVG(jam_level_avg)::FLOAT AS level,
-            AVG(jam_length_avg)::FLOAT AS length,
-            published_at AT TIME ZONE 'UTC' AS utc_time,
-            (
-                SELECT COUNT(*) 
-                FROM alerts 
-                WHERE published_at >= %s AND published_at < %s
-            ) AS data_alerts
-        FROM jams
-        WHERE published_at >= %s AND published_at < %s
-          AND street = ANY(%s)
-        GROUP BY utc_time
-        ORDER BY utc_time
-    """
-
-QUERY_SUM_STATISTICS_WITH_ROUTE = """
-        SELECT 
-            COUNT(*) AS data_jams,
-            AVG(speed_kmh_avg)::FLOAT AS speedKMH,
-            AVG(delay_avg)::FLOAT AS delay,
-            AVG(jam_level_avg)::FLOAT AS level,
-            AVG(jam_length_avg)::FLOAT AS length,
-            published_at AT TIME ZONE 'UTC' AS utc_time,
-            (
-                SELECT COUNT(*) 
-                FROM alerts 
-                WHERE ST_DWithin(
-                          location::geography,
-                          ST_GeomFromText(%s, 4326)::geography,
-                          20
-                      )
-                  AND published_at >= %s AND published_at < %s
-            ) AS data_alerts
-        FROM jams
-        WHERE ST_DWithin(
-                  jam_line::geography,
-                  ST_GeomFromText(%s, 4326)::geography,
-                  20
-              )
-          AND published_at >= %s AND published_at < %s
-        GROUP BY utc_time
-        ORDER BY utc_time
-    """
+QUERY_SUM_STATISTICS_WITH_ROUTE = f"""
+WITH {HOURS_CTE},
+{ROUTE_CORRIDOR_CTE},
+jams_agg AS (
+    SELECT
+        date_trunc('hour', j.published_at AT TIME ZONE 'UTC') AS utc_time,
+        COUNT(*)                          AS data_jams,
+        AVG(j.speed_kmh_avg)::FLOAT       AS speedKMH,
+        AVG(j.delay_avg)::FLOAT           AS delay,
+        AVG(j.jam_level_avg)::FLOAT       AS level,
+        AVG(j.jam_length_avg)::FLOAT      AS length
+    FROM jams j, route r
+    WHERE j.published_at >= %s AND j.published_at < %s
+      AND {JAMS_ON_ROUTE}
+    GROUP BY 1
+),
+alerts_agg AS (
+    SELECT
+        date_trunc('hour', a.published_at AT TIME ZONE 'UTC') AS utc_time,
+        COUNT(*)                          AS data_alerts
+    FROM alerts a, route r
+    WHERE a.published_at >= %s AND a.published_at < %s
+      AND {ALERTS_ON_ROUTE}
+    GROUP BY 1
+)
+{HOURLY_STATISTICS_SELECT}
+"""
 
 QUERY_ALERTS = """
     SELECT
@@ -113,25 +145,22 @@ QUERY_ALERTS_WITH_STREETS = """
         ST_Y(location::geometry) AS latitude
         FROM alerts
         WHERE published_at BETWEEN %s AND %s 
-            AND street = ANY(%s);
+            AND street_id = ANY(%s);
 """
 
-QUERY_ALERTS_WITH_ROUTE = """
+QUERY_ALERTS_WITH_ROUTE = f"""
+    WITH {ROUTE_CORRIDOR_CTE}
     SELECT
-        uuid,
-        street,
-        type,
-        subtype,
-        EXTRACT(EPOCH FROM published_at) * 1000 AS pubMillis,
-        ST_X(location::geometry) AS longitude,
-        ST_Y(location::geometry) AS latitude
-    FROM alerts
-    WHERE published_at BETWEEN %s AND %s 
-        AND ST_DWithin(
-                location::geography,
-                ST_GeomFromText(%s, 4326)::geography,
-                20
-            );
+        a.uuid,
+        a.street,
+        a.type,
+        a.subtype,
+        EXTRACT(EPOCH FROM a.published_at) * 1000 AS pubMillis,
+        ST_X(a.location::geometry) AS longitude,
+        ST_Y(a.location::geometry) AS latitude
+    FROM alerts a, route r
+    WHERE a.published_at BETWEEN %s AND %s
+        AND {ALERTS_ON_ROUTE};
 """
 
 QUERY_JAMS = """
@@ -187,7 +216,7 @@ FROM jams
 WHERE published_at >= %s AND published_at < %s;
 """
 
-# (B) Filtrovanie podľa ulíc (uprav, ak máš iný názov stĺpca ako "street")
+# (B) Filtrovanie podľa ulíc (street_id zo streets_dict, pozri QUERY_STREET_IDS)
 QUERY_TOTAL_STATISTICS_WITH_STREETS = """
 SELECT
     COUNT(*) AS data_jams,
@@ -199,18 +228,16 @@ SELECT
         SELECT COUNT(*)
         FROM alerts
         WHERE published_at >= %s AND published_at < %s
-          AND street = ANY(%s)
+          AND street_id = ANY(%s)
     ) AS data_alerts
 FROM jams
 WHERE published_at >= %s AND published_at < %s
-  AND street = ANY(%s);
+  AND street_id = ANY(%s);
 """
 
-# (C) Filtrovanie podľa trasy (predpoklad: geom v SRID 4326). Zmeň názvy stĺpcov/SRID ak treba.
-QUERY_TOTAL_STATISTICS_WITH_ROUTE = """
-WITH route AS (
-    SELECT ST_GeomFromText(%s, 4326) AS geom
-)
+# (C) Filtrovanie podľa trasy (koridor okolo trasy, pozri ROUTE_CORRIDOR_CTE)
+QUERY_TOTAL_STATISTICS_WITH_ROUTE = f"""
+WITH {ROUTE_CORRIDOR_CTE}
 SELECT
     COUNT(*) AS data_jams,
     COALESCE(AVG(j.speed_kmh_avg)::FLOAT, 35.0)              AS speedKMH,
@@ -221,11 +248,139 @@ SELECT
         SELECT COUNT(*)
         FROM alerts a, route r
         WHERE a.published_at >= %s AND a.published_at < %s
-          AND ST_Intersects(a.geom, r.geom)
+          AND {ALERTS_ON_ROUTE}
     ) AS data_alerts
 FROM jams j, route r
 WHERE j.published_at >= %s AND j.published_at < %s
-  AND ST_Intersects(j.geom, r.geom);
+  AND {JAMS_ON_ROUTE};
+"""
+
+# Route corridor cache (helpers/route_cache.py, tables route_corridors / route_corridor_*).
+# The corridor is buffered once when the route is first queried; ids of jams/alerts in it are stored
+# for the window [covered_from, covered_to) and joined back to the hypertables. The rest of the
+# interval (not covered yet, still receiving data) is matched live against the stored corridor.
+QUERY_ROUTE_CORRIDOR_UPSERT = """
+INSERT INTO route_corridors (route_hash, route, buffer_m, corridor)
+VALUES (%s, ST_GeomFromText(%s, 4326), %s, ST_Buffer(ST_GeomFromText(%s, 4326)::geography, %s)::geometry)
+ON CONFLICT (route_hash) DO UPDATE SET last_used = now()
+RETURNING covered_from, covered_to, (xmax = 0) AS inserted;
+"""
+
+QUERY_ROUTE_CORRIDOR_EXTEND_JAMS = f"""
+INSERT INTO route_corridor_jams (route_hash, published_at, uuid)
+SELECT r.route_hash, j.published_at, j.uuid
+FROM jams j, route_corridors r
+WHERE r.route_hash = %s
+  AND j.published_at >= %s AND j.published_at < %s
+  AND {JAMS_ON_ROUTE}
+ON CONFLICT DO NOTHING;
+"""
+
+QUERY_ROUTE_CORRIDOR_EXTEND_ALERTS = f"""
+INSERT INTO route_corridor_alerts (route_hash, published_at, uuid)
+SELECT r.route_hash, a.published_at, a.uuid
+FROM alerts a, route_corridors r
+WHERE r.route_hash = %s
+  AND a.published_at >= %s AND a.published_at < %s
+  AND {ALERTS_ON_ROUTE}
+ON CONFLICT DO NOTHING;
+"""
+
+QUERY_ROUTE_CORRIDOR_SET_COVERAGE = """
+UPDATE route_corridors SET covered_from = %s, covered_to = %s WHERE route_hash = %s;
+"""
+
+QUERY_ROUTE_CORRIDOR_EVICT = """
+DELETE FROM route_corridors WHERE last_used < now() - %s::interval;
+"""
+
+ROUTE_CACHED_CTE = """route AS MATERIALIZED (
+    SELECT corridor FROM route_corridors WHERE route_hash = %s
+)"""
+
+# params: route_hash, from, to (cached ids), live_from, to (live part)
+ROUTE_CACHED_JAMS_CTE = f"""route_jams AS (
+    SELECT c.uuid, c.published_at FROM route_corridor_jams c
+    WHERE c.route_hash = %s AND c.published_at >= %s AND c.published_at < %s
+    UNION ALL
+    SELECT j.uuid, j.published_at FROM jams j, route r
+    WHERE j.published_at >= %s AND j.published_at < %s
+      AND {JAMS_ON_ROUTE}
+)"""
+
+_ROUTE_CACHED_ALERTS_CTE = """route_alerts AS (
+    SELECT c.uuid, c.published_at FROM route_corridor_alerts c
+    WHERE c.route_hash = %s AND c.published_at >= %s AND c.published_at {upper} %s
+    UNION ALL
+    SELECT a.uuid, a.published_at FROM alerts a, route r
+    WHERE a.published_at >= %s AND a.published_at {upper} %s
+      AND {alerts_on_route}
+)"""
+
+# same params as ROUTE_CACHED_JAMS_CTE; statistics count [from, to)
+ROUTE_CACHED_ALERTS_CTE = _ROUTE_CACHED_ALERTS_CTE.format(upper="<", alerts_on_route=ALERTS_ON_ROUTE)
+# draw_alerts keeps to_date like the BETWEEN of QUERY_ALERTS(_WITH_ROUTE); the cache holds ids before
+# covered_to and the live part starts there, so an alert at to_date comes from the live part
+ROUTE_CACHED_ALERTS_CTE_TO_INCLUSIVE = _ROUTE_CACHED_ALERTS_CTE.format(upper="<=", alerts_on_route=ALERTS_ON_ROUTE)
+
+QUERY_SUM_STATISTICS_WITH_CACHED_ROUTE = f"""
+WITH {HOURS_CTE},
+{ROUTE_CACHED_CTE},
+{ROUTE_CACHED_JAMS_CTE},
+{ROUTE_CACHED_ALERTS_CTE},
+jams_agg AS (
+    SELECT
+        date_trunc('hour', j.published_at AT TIME ZONE 'UTC') AS utc_time,
+        COUNT(*)                          AS data_jams,
+        AVG(j.speed_kmh_avg)::FLOAT       AS speedKMH,
+        AVG(j.delay_avg)::FLOAT           AS delay,
+        AVG(j.jam_level_avg)::FLOAT       AS level,
+        AVG(j.jam_length_avg)::FLOAT      AS length
+    FROM route_jams m
+    JOIN jams j ON j.uuid = m.uuid AND j.published_at = m.published_at
+    WHERE j.published_at >= %s AND j.published_at < %s
+    GROUP BY 1
+),
+alerts_agg AS (
+    SELECT
+        date_trunc('hour', m.published_at AT TIME ZONE 'UTC') AS utc_time,
+        COUNT(*)                          AS data_alerts
+    FROM route_alerts m
+    GROUP BY 1
+)
+{HOURLY_STATISTICS_SELECT}
+"""
+
+QUERY_TOTAL_STATISTICS_WITH_CACHED_ROUTE = f"""
+WITH {ROUTE_CACHED_CTE},
+{ROUTE_CACHED_JAMS_CTE},
+{ROUTE_CACHED_ALERTS_CTE}
+SELECT
+    COUNT(*) AS data_jams,
+    COALESCE(AVG(j.speed_kmh_avg)::FLOAT, 35.0)              AS speedKMH,
+    COALESCE(AVG(j.delay_avg)::FLOAT / 60.0, 0.0)            AS delay,
+    COALESCE(AVG(j.jam_level_avg)::FLOAT, 0.0)               AS level,
+    COALESCE(AVG(j.jam_length_avg)::FLOAT / 1000.0, 0.0)     AS length,
+    (SELECT COUNT(*) FROM route_alerts) AS data_alerts
+FROM route_jams m
+JOIN jams j ON j.uuid = m.uuid AND j.published_at = m.published_at
+WHERE j.published_at >= %s AND j.published_at < %s;
+"""
+
+QUERY_ALERTS_WITH_CACHED_ROUTE = f"""
+    WITH {ROUTE_CACHED_CTE},
+    {ROUTE_CACHED_ALERTS_CTE_TO_INCLUSIVE}
+    SELECT
+        a.uuid,
+        a.street,
+        a.type,
+        a.subtype,
+        EXTRACT(EPOCH FROM a.published_at) * 1000 AS pubMillis,
+        ST_X(a.location::geometry) AS longitude,
+        ST_Y(a.location::geometry) AS latitude
+    FROM route_alerts m
+    JOIN alerts a ON a.uuid = m.uuid AND a.published_at = m.published_at
+    WHERE a.published_at BETWEEN %s AND %s;
 """
 
 QUERY_ALERTS_TYPES_BASE = """
@@ -238,7 +393,7 @@ WHERE a.published_at >= %s AND a.published_at < %s
 GROUP BY a.type, COALESCE(NULLIF(a.subtype, ''), 'NOT_DEFINED');
 """
 
-# Optional filter by streets (alerts.street = ANY($3))
+# Optional filter by streets (alerts.street_id = ANY($3))
 QUERY_ALERTS_TYPES_WITH_STREETS = """
 SELECT
   a.type,
@@ -246,52 +401,162 @@ SELECT
   COUNT(*)::BIGINT AS count
 FROM alerts a
 WHERE a.published_at >= %s AND a.published_at < %s
-  AND a.street = ANY(%s)
+  AND a.street_id = ANY(%s)
 GROUP BY a.type, COALESCE(NULLIF(a.subtype, ''), 'NOT_DEFINED');
 """
 
-# JAMS: top-N streets in interval (drop NULL/empty streets)
-QUERY_TOP_STREETS_JAMS_BASE = """
-SELECT j.street, COUNT(*)::BIGINT AS cnt
-FROM jams j
-WHERE j.published_at >= %s AND j.published_at < %s
-  AND NULLIF(TRIM(j.street), '') IS NOT NULL
-GROUP BY j.street
-ORDER BY cnt DESC, j.street ASC
-LIMIT %s;
+# The same from the hourly alerts rollup (continuous aggregate alerts_hourly: hour, street_id, type,
+# subtype -> cnt, database_creation/timescale_policies.py); exact for whole-hour intervals
+_ALERTS_TYPES_ROLLUP = """
+SELECT
+  t.type,
+  COALESCE(NULLIF(t.subtype, ''), 'NOT_DEFINED') AS subtype,
+  SUM(t.cnt)::BIGINT AS count
+FROM alerts_hourly t
+WHERE t.hour >= %s AND t.hour < %s{streets_filter}
+GROUP BY t.type, COALESCE(NULLIF(t.subtype, ''), 'NOT_DEFINED');
 """
 
-# JAMS with explicit streets allowlist
-QUERY_TOP_STREETS_JAMS_WITH_STREETS = """
-SELECT j.street, COUNT(*)::BIGINT AS cnt
-FROM jams j
-WHERE j.published_at >= %s AND j.published_at < %s
-  AND j.street = ANY(%s)
-  AND NULLIF(TRIM(j.street), '') IS NOT NULL
-GROUP BY j.street
-ORDER BY cnt DESC, j.street ASC
+QUERY_ALERTS_TYPES_ROLLUP_BASE = _ALERTS_TYPES_ROLLUP.format(streets_filter="")
+QUERY_ALERTS_TYPES_ROLLUP_WITH_STREETS = _ALERTS_TYPES_ROLLUP.format(streets_filter="\n  AND t.street_id = ANY(%s)")
+
+# JAMS: top-N streets in interval (drop NULL/empty streets)
+QUERY_TOP_STREETS_JAMS_BASE = """
+SELECT d.name AS street, c.cnt
+FROM (
+    SELECT j.street_id, COUNT(*)::BIGINT AS cnt
+    FROM jams j
+    WHERE j.published_at >= %s AND j.published_at < %s
+      AND j.street_id IS NOT NULL
+    GROUP BY j.street_id
+) c
+JOIN streets_dict d ON d.street_id = c.street_id
+ORDER BY c.cnt DESC, d.name ASC
 LIMIT %s;
 """
 
 # ALERTS: top-N streets in interval (drop NULL/empty streets)
 QUERY_TOP_STREETS_ALERTS_BASE = """
-SELECT a.street, COUNT(*)::BIGINT AS cnt
-FROM alerts a
-WHERE a.published_at >= %s AND a.published_at < %s
-  AND NULLIF(TRIM(a.street), '') IS NOT NULL
-GROUP BY a.street
-ORDER BY cnt DESC, a.street ASC
+SELECT d.name AS street, c.cnt
+FROM (
+    SELECT a.street_id, COUNT(*)::BIGINT AS cnt
+    FROM alerts a
+    WHERE a.published_at >= %s AND a.published_at < %s
+      AND a.street_id IS NOT NULL
+    GROUP BY a.street_id
+) c
+JOIN streets_dict d ON d.street_id = c.street_id
+ORDER BY c.cnt DESC, d.name ASC
 LIMIT %s;
 """
 
-# ALERTS with explicit streets allowlist
-QUERY_TOP_STREETS_ALERTS_WITH_STREETS = """
-SELECT a.street, COUNT(*)::BIGINT AS cnt
-FROM alerts a
-WHERE a.published_at >= %s AND a.published_at < %s
-  AND a.street = ANY(%s)
-  AND NULLIF(TRIM(a.street), '') IS NOT NULL
-GROUP BY a.street
-ORDER BY cnt DESC, a.street ASC
-LIMIT %s;
-"""
\ No newline at end of file
+# Top-N streets of jams and alerts in one round trip: both rankings as UNION ALL branches,
+# each grouped by street_id, named from streets_dict, ranked by ROW_NUMBER (count desc, name asc)
+# and limited on its own (LIMIT NULL = all).
+# params per branch: from, to[, street ids], limit
+_TOP_STREETS_BRANCH = """(
+    SELECT '{source}' AS source, d.name AS street, c.cnt,
+           ROW_NUMBER() OVER (ORDER BY c.cnt DESC, d.name ASC) AS rank
+    FROM (
+        SELECT t.street_id, {count}::BIGINT AS cnt
+        FROM {table} t
+        WHERE t.{time_column} >= %s AND t.{time_column} < %s{streets_filter}
+          AND t.street_id IS NOT NULL
+        GROUP BY t.street_id
+    ) c
+    JOIN streets_dict d ON d.street_id = c.street_id
+    ORDER BY rank
+    LIMIT %s
+)"""
+
+
+def _top_streets_query(jams_table, alerts_table, time_column, count, streets_filter=""):
+    branches = [
+        _TOP_STREETS_BRANCH.format(source=source, table=table, time_column=time_column,
+                                   count=count, streets_filter=streets_filter)
+        for source, table in (("jams", jams_table), ("alerts", alerts_table))
+    ]
+    return "\n" + "\nUNION ALL\n".join(branches) + "\nORDER BY source, rank;\n"
+
+
+_STREETS_ALLOWLIST = "\n          AND t.street_id = ANY(%s)"
+
+QUERY_TOP_STREETS_BOTH_BASE = _top_streets_query("jams", "alerts", "published_at", "COUNT(*)")
+QUERY_TOP_STREETS_BOTH_WITH_STREETS = _top_streets_query("jams", "alerts", "published_at", "COUNT(*)",
+                                                         _STREETS_ALLOWLIST)
+
+# The same from the hourly street rollups (continuous aggregates, database_creation/timescale_policies.py);
+# exact for whole-hour intervals, the not yet materialized tail is aggregated in real time
+QUERY_TOP_STREETS_BOTH_ROLLUP_BASE = _top_streets_query("jams_street_hourly", "alerts_hourly", "hour",
+                                                        "SUM(t.cnt)")
+QUERY_TOP_STREETS_BOTH_ROLLUP_WITH_STREETS = _top_streets_query("jams_street_hourly", "alerts_hourly", "hour",
+                                                                "SUM(t.cnt)", _STREETS_ALLOWLIST)
+
+# Dashboard bundle: one pass per hypertable, GROUPING SETS return every widget's grouping at once.
+# Sums and non-NULL counts (instead of averages) let hours, totals and sources be added up exactly.
+# Streets are grouped by street_id and named from streets_dict afterwards (one lookup per street).
+_BUNDLE_STREET_NAMES = """
+SELECT p.*, d.name AS street
+FROM ({pass_query}
+) p
+LEFT JOIN streets_dict d ON d.street_id = p.street_id;
+"""
+
+_BUNDLE_JAMS_PASS = """
+SELECT
+    CASE WHEN GROUPING(street_id) = 0 THEN 'street' ELSE 'hour' END AS part,
+    date_trunc('hour', published_at AT TIME ZONE 'UTC')         AS utc_time,
+    street_id,
+    COUNT(*)                                                     AS data_jams,
+    SUM(speed_kmh_avg)::FLOAT AS speed_sum,  COUNT(speed_kmh_avg)  AS speed_n,
+    SUM(delay_avg)::FLOAT     AS delay_sum,  COUNT(delay_avg)      AS delay_n,
+    SUM(jam_level_avg)::FLOAT AS level_sum,  COUNT(jam_level_avg)  AS level_n,
+    SUM(jam_length_avg)::FLOAT AS length_sum, COUNT(jam_length_avg) AS length_n
+FROM jams
+WHERE published_at >= %s AND published_at < %s{streets_filter}
+GROUP BY GROUPING SETS ((date_trunc('hour', published_at AT TIME ZONE 'UTC')), (street_id))"""
+
+_BUNDLE_ALERTS_PASS = """
+SELECT
+    CASE WHEN GROUPING(street_id) = 0 THEN 'street'
+         WHEN GROUPING(type) = 0 THEN 'type'
+         ELSE 'hour' END                                         AS part,
+    date_trunc('hour', published_at AT TIME ZONE 'UTC')         AS utc_time,
+    street_id,
+    type,
+    COALESCE(NULLIF(subtype, ''), 'NOT_DEFINED')                 AS subtype,
+    COUNT(*)                                                     AS data_alerts
+FROM alerts
+WHERE published_at >= %s AND published_at < %s{streets_filter}
+GROUP BY GROUPING SETS (
+    (date_trunc('hour', published_at AT TIME ZONE 'UTC')),
+    (street_id),
+    (type, COALESCE(NULLIF(subtype, ''), 'NOT_DEFINED'))
+)"""
+
+
+
+def _bundle_query(pass_query, streets_filter=""):
+    return _BUNDLE_STREET_NAMES.format(pass_query=pass_query.format(streets_filter=streets_filter))
+
+
+QUERY_BUNDLE_JAMS_BASE = _bundle_query(_BUNDLE_JAMS_PASS)
+QUERY_BUNDLE_JAMS_WITH_STREETS = _bundle_query(_BUNDLE_JAMS_PASS, "\n  AND street_id = ANY(%s)")
+QUERY_BUNDLE_ALERTS_BASE = _bundle_query(_BUNDLE_ALERTS_PASS)
+QUERY_BUNDLE_ALERTS_WITH_STREETS = _bundle_query(_BUNDLE_ALERTS_PASS, "\n  AND street_id = ANY(%s)")
+
+# Street names -> street_id (streets_dict, normalized by street_key()); unknown names return no row
+QUERY_STREET_IDS = """
+SELECT n.name, d.street_id
+FROM unnest(%s::text[]) AS n(name)
+JOIN streets_dict d ON d.name_key = street_key(n.name);
+"""
+
+# Central registry: active data sources (db_config.DataSourceRegistry)
+QUERY_DATA_SOURCES = """
+SELECT name, db_host, db_port_internal, db_port_external, db_name, db_user, db_password,
+       ST_AsBinary(coverage_area) AS coverage_area
+FROM data_sources
+WHERE active
+ORDER BY name;
+"""
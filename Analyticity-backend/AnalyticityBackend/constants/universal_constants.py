@@ -1,3 +1,12 @@
+import os
+
 import pytz
 
-LOCAL_TZ = pytz.timezone("Europe/Warsaw")  # Change as needed
+# Zone of the local times in responses (xaxis / timestamp strings), looked up once at import
+LOCAL_TZ_NAME = os.getenv("LOCAL_TZ", "Europe/Prague")
+LOCAL_TZ = pytz.timezone(LOCAL_TZ_NAME)
+LOCAL_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"  # convert_utc_to_local_bulk formats this shape directly
+
+# LOCAL_TIME_IN_DB=on: hourly queries also return the hour formatted in LOCAL_TZ by the database
+# (local_time column), response transformers use it instead of converting utc_time
+LOCAL_TIME_IN_DB = os.getenv("LOCAL_TIME_IN_DB", "off") == "on"
@@ -1,9 +1,20 @@
 import os
+import asyncio
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
 import psycopg2
+import psycopg2.extensions
 from psycopg2 import OperationalError
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 from fastapi import HTTPException
 
+from constants.queries import QUERY_DATA_SOURCES
+from helpers.coverage_index import CoverageIndex
+
 # Load .env if present (works locally and in Docker)
 try:
     from dotenv import load_dotenv
@@ -13,8 +24,8 @@ except Exception:
 
 logger = logging.getLogger("app.db")
 
-# Single DB config: BRNO only
-DATABASES = {
+# Sources configured through env; they always exist and take precedence over registry rows of the same name
+STATIC_DATABASES = {
     "brno": {
         # Prefer DB_BRNO_* if provided; fall back to your root .env names
         "host": os.getenv("DB_BRNO_HOST", os.getenv("DB_HOST", "brno-db")),
@@ -25,26 +36,298 @@ DATABASES = {
     }
 }
 
+# Central registry (data_sources table); without DB_CENTRAL_HOST only STATIC_DATABASES are served
+CENTRAL_DB = {
+    "host": os.getenv("DB_CENTRAL_HOST"),
+    "port": os.getenv("DB_CENTRAL_PORT", "5432"),
+    "user": os.getenv("DB_CENTRAL_USER", os.getenv("POSTGRES_USER_CENTRAL", "central_user")),
+    "password": os.getenv("DB_CENTRAL_PASSWORD", os.getenv("POSTGRES_PASSWORD_CENTRAL", "central_password")),
+    "dbname": os.getenv("DB_CENTRAL_NAME", os.getenv("POSTGRES_DB_CENTRAL", "central_db")),
+}
+
+# Registry rows point to docker hosts (db_host:db_port_internal); for local runs set the host
+# through which the external ports are reachable (e.g. localhost)
+DATA_SOURCES_EXTERNAL_HOST = os.getenv("DATA_SOURCES_EXTERNAL_HOST")
+
+REGISTRY_REFRESH_SECONDS = int(os.getenv("DATA_SOURCES_REFRESH_SECONDS", "300"))
+# An unknown {name} triggers a registry reload at most this often
+REGISTRY_MISS_REFRESH_SECONDS = int(os.getenv("DATA_SOURCES_MISS_REFRESH_SECONDS", "10"))
+
+# {name} alias for all active sources; several sources can also be listed as "brno,jmk"
+ALL_SOURCES_ALIAS = "all"
+
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+# A request waits this long for a free pooled connection before it is answered with 503
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+
+# name -> connection params of every active source (static + registry), updated in place on refresh
+DATABASES: Dict[str, dict] = {name: dict(db) for name, db in STATIC_DATABASES.items()}
+
+
+def _safe_dsn(db: dict) -> str:
+    return f"postgresql://{db['user']}@{db['host']}:{db['port']}/{db['dbname']}"
+
+
+class WaitingConnectionPool(ThreadedConnectionPool):
+    """
+    ThreadedConnectionPool whose getconn waits (up to `timeout` seconds) for a connection to be
+    returned when all `maxconn` are in use, instead of raising PoolError right away.
+
+    Connections it hands out are PooledConnections bound to it, so their close() returns them here.
+    """
+
+    def __init__(self, minconn, maxconn, *args, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        # minconn only sizes the connections opened up front: psycopg2 closes a returned
+        # connection once minconn are idle, keep up to maxconn of them instead
+        self.minconn = self.maxconn
+
+    def getconn(self, key=None, timeout: float = DB_POOL_TIMEOUT_SECONDS):
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolError(f"no connection returned to the pool within {timeout:g} s")
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+    # _getconn/_putconn/_closeall run under the pool lock, which is not reentrant: a connection
+    # is bound to the pool only while checked out, so closing it in there never calls putconn
+
+    def _getconn(self, key=None):
+        conn = super()._getconn(key)
+        conn._pool = self
+        return conn
+
+    def _putconn(self, conn, key=None, close=False):
+        conn._pool = None
+        super()._putconn(conn, key, close)
+
+    def _closeall(self):
+        # connections still used by requests are closed right away, their close() is then a no-op
+        for conn in self._used.values():
+            conn._pool = None
+        super()._closeall()
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """
+    Connection handed out by a pool. close() returns it to the pool (routers keep
+    closing connections in `finally`), a connection without a pool is really closed.
+    """
+    _pool = None
+
+    def close(self):
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return super().close()
+        try:
+            pool.putconn(self)
+        except PoolError:
+            # pool was retired and closed meanwhile
+            super().close()
+
+
+class DataSourceRegistry:
+    """
+    Active data sources from the central `data_sources` table with one connection pool per source
+    (WaitingConnectionPool: requests over DB_POOL_MAX wait for a free connection).
+
+    Pools are created lazily on first use (one lock per source, so different cities connect in
+    parallel). When a source changes or disappears on refresh, its pool is retired and closed on
+    the next refresh, after requests still holding its connections are done.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool_locks: Dict[str, threading.Lock] = {}
+        self._pools: Dict[str, WaitingConnectionPool] = {}
+        self._retired = []
+        self._last_refresh = 0.0
+        self.coverage = CoverageIndex()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(CENTRAL_DB["host"])
+
+    @staticmethod
+    def _source_params(row) -> dict:
+        name, host, port_internal, port_external, dbname, user, password = row[:7]
+        if DATA_SOURCES_EXTERNAL_HOST:
+            host, port = DATA_SOURCES_EXTERNAL_HOST, port_external
+        else:
+            port = port_internal
+        return {"host": host, "port": str(port), "user": user, "password": password, "dbname": dbname}
+
+    def refresh(self):
+        """Reload active sources from the central registry. Returns the active source names."""
+        if not self.enabled:
+            return list(DATABASES)
+
+        conn = psycopg2.connect(connect_timeout=5, **CENTRAL_DB)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(QUERY_DATA_SOURCES)
+                rows = cur.fetchall()
+        finally:
+            conn.close()
+
+        sources = {row[0]: self._source_params(row) for row in rows}
+        sources.update((name, dict(db)) for name, db in STATIC_DATABASES.items())
+        # built before taking the lock, requests keep using the previous index meanwhile
+        coverage = CoverageIndex({row[0]: row[7] for row in rows})
+
+        with self._lock:
+            self._last_refresh = time.monotonic()
+            retired, self._retired = self._retired, []
+            for name in list(self._pools):
+                if sources.get(name) != DATABASES.get(name):
+                    self._retired.append(self._pools.pop(name))
+            for name in [name for name in DATABASES if name not in sources]:
+                del DATABASES[name]
+            DATABASES.update(sources)
+            self.coverage = coverage
+
+        for pool in retired:
+            pool.closeall()
+        logger.info("Data sources refreshed: %s", ", ".join(sorted(sources)))
+        return list(sources)
+
+    def resolve(self, name: str) -> Optional[dict]:
+        """Connection params of `name`; an unknown name reloads the registry (rate limited) once."""
+        db = DATABASES.get(name)
+        if db is None and self.enabled and time.monotonic() - self._last_refresh > REGISTRY_MISS_REFRESH_SECONDS:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.exception("Data source registry refresh failed: %s", e)
+            db = DATABASES.get(name)
+        return db
+
+    def get_pool(self, name: str) -> WaitingConnectionPool:
+        pool = self._pools.get(name)
+        if pool is not None:
+            return pool
+
+        with self._lock:
+            lock = self._pool_locks.setdefault(name, threading.Lock())
+        with lock:
+            pool = self._pools.get(name)
+            if pool is not None:
+                return pool
+            db = DATABASES[name]
+            sw = time.perf_counter()
+            pool = WaitingConnectionPool(DB_POOL_MIN, DB_POOL_MAX, connection_factory=PooledConnection,
+                                         connect_timeout=5, **db)
+            with self._lock:
+                if DATABASES.get(name) == db:
+                    self._pools[name] = pool
+                else:
+                    # source changed while connecting, serve this request and retire the pool
+                    self._retired.append(pool)
+            logger.info("Pool for '%s' created (%s, %d-%d connections) in %d ms", name, _safe_dsn(db),
+                        DB_POOL_MIN, DB_POOL_MAX, int((time.perf_counter() - sw) * 1000))
+            return pool
+
+    def warm_up(self):
+        """Create the pools of all active sources in parallel; failures are logged, pools stay lazy."""
+        names = list(DATABASES)
+        if not names:
+            return
+
+        def create(name):
+            try:
+                self.get_pool(name)
+            except Exception as e:
+                logger.warning("Pool for '%s' not created at startup: %s", name, e)
+
+        with ThreadPoolExecutor(max_workers=len(names)) as executor:
+            list(executor.map(create, names))
+
+    def close_all(self):
+        with self._lock:
+            pools = list(self._pools.values()) + self._retired
+            self._pools, self._retired = {}, []
+        for pool in pools:
+            pool.closeall()
+
+
+registry = DataSourceRegistry()
+
+
+async def refresh_data_sources_forever(interval: int = REGISTRY_REFRESH_SECONDS):
+    """Background task reloading the registry every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(registry.refresh)
+        except Exception as e:
+            logger.exception("Data source registry refresh failed: %s", e)
+
+
+def resolve_source_names(name: str, route: Optional[List[List[float]]] = None) -> List[str]:
+    """
+    Data sources addressed by the {name} path parameter: one name, a comma list or ALL_SOURCES_ALIAS.
+    Unknown names in a list/alias raise 404; a single name is checked by get_db_connection.
+
+    With a `route` ([[lon, lat], ...]) several sources are narrowed to those whose coverage area
+    intersects it (sources without coverage area are kept); 404 when none does.
+    """
+    if name == ALL_SOURCES_ALIAS:
+        names = sorted(DATABASES)
+    else:
+        names = list(dict.fromkeys(part.strip() for part in name.split(",") if part.strip())) or [name]
+        if len(names) > 1:
+            missing = [source for source in names if registry.resolve(source) is None]
+            if missing:
+                logger.warning("Databases %s not found in config", missing)
+                raise HTTPException(status_code=404, detail=f"Database not found: {', '.join(missing)}")
+
+    if route and len(names) > 1:
+        try:
+            covering = registry.coverage.sources_for(route, names)
+        except (ValueError, TypeError, IndexError):
+            raise HTTPException(status_code=400, detail="Invalid route coordinates")
+        logger.info("Route covered by %s (of %s)", covering, names)
+        if not covering:
+            raise HTTPException(status_code=404, detail="Route is outside the coverage of the selected databases")
+        names = covering
+    return names
+
+
 def get_db_connection(db_name: str = "brno"):
-    db = DATABASES.get(db_name)
+    """
+    Pooled connection to `db_name`. Blocks while the pool is created or full (up to
+    DB_POOL_TIMEOUT_SECONDS), async handlers call it through asyncio.to_thread.
+    """
+    db = registry.resolve(db_name)
     if not db:
         logger.warning("Database '%s' not found in config", db_name)
         raise HTTPException(status_code=404, detail="Database not found")
 
-    safe_dsn = f"postgresql://{db['user']}@{db['host']}:{db['port']}/{db['dbname']}"
+    safe_dsn = _safe_dsn(db)
     try:
         logger.debug("Attempting DB connection: %s", safe_dsn)
-        conn = psycopg2.connect(
-            host=db["host"],
-            port=db["port"],
-            user=db["user"],
-            password=db["password"],
-            dbname=db["dbname"],
-            connect_timeout=5
-        )
+        pool = registry.get_pool(db_name)
+        conn = pool.getconn()
+        if conn.closed:
+            # dropped by the server (restart, idle timeout) - replace it
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
         logger.info("✅ Connected to DB '%s' at %s", db_name, safe_dsn)
         return conn
 
+    except PoolError as e:
+        logger.exception("❌ No free pooled connection for %s within %g s: %s", safe_dsn, DB_POOL_TIMEOUT_SECONDS, e)
+        raise HTTPException(status_code=503, detail=f"Database '{db_name}' busy")
     except OperationalError as e:
         logger.exception("❌ OperationalError connecting to %s: %s", safe_dsn, e)
         raise HTTPException(status_code=503, detail=f"Database '{db_name}' unavailable")
@@ -0,0 +1,71 @@
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import shapely
+from shapely import wkb
+from shapely.geometry import LineString, Point
+from shapely.strtree import STRtree
+
+logger = logging.getLogger("app.coverage")
+
+# Simplification tolerance of coverage polygons in degrees (~50 m); 0 keeps them as stored
+COVERAGE_SIMPLIFY_TOLERANCE = float(os.getenv("COVERAGE_SIMPLIFY_TOLERANCE", "0.0005"))
+
+
+def coords_to_geometry(coords: Sequence[Sequence[float]]):
+    """Point or LineString from [[lon, lat], ...]."""
+    points = [(float(c[0]), float(c[1])) for c in coords]
+    if not points:
+        raise ValueError("No coordinates given")
+    return Point(points[0]) if len(points) == 1 else LineString(points)
+
+
+class CoverageIndex:
+    """
+    In-memory spatial index of data source coverage areas (data_sources.coverage_area).
+
+    Polygons are simplified and prepared once when the index is built; a lookup is an STRtree
+    bbox query followed by prepared intersects tests, well under a millisecond per route.
+    The index is immutable, the registry swaps in a new one on refresh.
+    """
+
+    def __init__(self, coverages: Optional[Dict[str, bytes]] = None):
+        self._names: List[str] = []
+        self._polygons = []
+        for name, coverage in (coverages or {}).items():
+            if coverage is None:
+                continue
+            try:
+                polygon = wkb.loads(bytes(coverage))
+            except Exception as e:
+                logger.warning("Coverage area of '%s' not readable: %s", name, e)
+                continue
+            if COVERAGE_SIMPLIFY_TOLERANCE > 0:
+                polygon = polygon.simplify(COVERAGE_SIMPLIFY_TOLERANCE, preserve_topology=True)
+            shapely.prepare(polygon)
+            self._names.append(name)
+            self._polygons.append(polygon)
+        self._tree = STRtree(self._polygons) if self._polygons else None
+
+    @property
+    def names(self) -> List[str]:
+        """Sources that have a coverage area."""
+        return list(self._names)
+
+    def sources_for(self, coords: Sequence[Sequence[float]], candidates: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Sources among `candidates` (default: all indexed) whose coverage intersects the route/points.
+        Candidates without a coverage area can't be ruled out and are always kept.
+        """
+        geometry = coords_to_geometry(coords)
+        hits = set()
+        if self._tree is not None:
+            for i in self._tree.query(geometry):
+                if self._polygons[i].intersects(geometry):
+                    hits.add(self._names[i])
+
+        if candidates is None:
+            return sorted(hits)
+        indexed = set(self._names)
+        return [name for name in candidates if name in hits or name not in indexed]
@@ -1,13 +1,31 @@
 from constants.queries import QUERY_SUM_STATISTICS, QUERY_SUM_STATISTICS_WITH_STREETS,\
     QUERY_SUM_STATISTICS_WITH_ROUTE, \
     QUERY_TOTAL_STATISTICS, QUERY_TOTAL_STATISTICS_WITH_STREETS, \
-    QUERY_TOTAL_STATISTICS_WITH_ROUTE
+    QUERY_TOTAL_STATISTICS_WITH_ROUTE, ROUTE_BUFFER_METERS, \
+    QUERY_SUM_STATISTICS_WITH_CACHED_ROUTE, QUERY_TOTAL_STATISTICS_WITH_CACHED_ROUTE
+import numpy as np
+import pandas as pd
 from fastapi import HTTPException
-from helpers.universal_helpers import convert_utc_to_local
-from datetime import datetime, timedelta, timezone
+from helpers.route_cache import ensure_route_corridor
+from helpers.streets_dict import street_ids
+from helpers.universal_helpers import local_time_labels
+from datetime import datetime, timezone
 from typing import Iterable, List, Tuple, Optional, Dict, Any
 
 
+def _round2(values: np.ndarray) -> np.ndarray:
+    """
+    round(x, 2) of every element, identical to Python's round(): np.round(x * 100) / 100 gives the same
+    float unless x * 100 lands (within float error) on a .5 tie, those few elements use round() itself.
+    """
+    scaled = values * 100.0
+    rounded = np.round(scaled) / 100.0
+    tie = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) <= 1e-9 * np.maximum(1.0, np.abs(scaled))
+    for i in np.flatnonzero(tie):
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+
 def transform_sum_statistics_to_legacy_format(
     rows: Iterable[dict],
     from_date: datetime,
@@ -16,7 +34,8 @@ def transform_sum_statistics_to_legacy_format(
     now_utc: Optional[datetime] = None,
 ) -> Tuple[List[int], List[int], List[int], List[float], List[float], List[float], List[float]]:
     """
-    Convert rows (from QUERY_SUM_STATISTICS) into the legacy tuple-of-lists format:
+    Convert rows (from QUERY_SUM_STATISTICS; the unquoted alias speedKMH comes back as `speedkmh`)
+    into the legacy tuple-of-lists format:
 
         (data_jams, data_alerts, pubMillis, speedKMH, delay, level, length)
 
@@ -26,6 +45,10 @@ def transform_sum_statistics_to_legacy_format(
         * length=0.0 km, level=0.0, delay=0.0 min, speedKMH=35.0 (legacy default)
       (even if alerts exist in that hour)
     - Round numeric values to 2 decimals; convert delay from seconds->minutes, length m->km.
+    - Several rows of the same hour: the last one wins.
+
+    Vectorized: the axis is an np.arange of datetime64 hours, rows are aligned to it with
+    searchsorted and defaults/unit conversions/rounding are applied column-wise.
     """
     if now_utc is None:
         now_utc = datetime.now(timezone.utc)
@@ -35,77 +58,54 @@ def transform_sum_statistics_to_legacy_format(
             return dt.replace(tzinfo=timezone.utc)
         return dt.astimezone(timezone.utc)
 
-    from_utc = ensure_utc(from_date).replace(minute=0, second=0, microsecond=0)
-    to_utc = ensure_utc(to_date).replace(minute=0, second=0, microsecond=0)
-    now_floor = now_utc.replace(minute=0, second=0, microsecond=0)
-
-    # Index DB rows by their hour (truncate to hour)
-    by_hour = {}
-    for r in rows:
-        t: datetime = r["utc_time"]
-        t = ensure_utc(t).replace(minute=0, second=0, microsecond=0)
-        by_hour[t] = {
-            "data_jams": int(r["data_jams"]) if r.get("data_jams") is not None else 0,
-            "data_alerts": int(r["data_alerts"]) if r.get("data_alerts") is not None else 0,
-            # keep raw values (may be None) – we decide defaults below
-            "length_m": r.get("length"),
-            "level": r.get("level"),
-            "delay_s": r.get("delay"),
-            "speed_kmh": r.get("speedKMH"),
-        }
+    def hour(dt: datetime) -> np.datetime64:
+        return np.datetime64(ensure_utc(dt).replace(tzinfo=None), "h")
+
+    # Complete hourly axis (exclusive of to_date) without future hours
+    axis = np.arange(hour(from_date), min(hour(to_date), hour(now_utc) + 1), dtype="datetime64[h]")
 
-    # Build complete hourly axis (exclusive of to_utc) and exclude future hours
-    axis = []
-    cur = from_utc
-    while cur < to_utc and cur <= now_floor:
-        axis.append(cur)
-        cur += timedelta(hours=1)
-
-    data_jams: List[int] = []
-    data_alerts: List[int] = []
-    pubMillis: List[int] = []
-    speedKMH: List[float] = []
-    delay: List[float] = []
-    level: List[float] = []
-    length: List[float] = []
-
-    for t in axis:
-        rec = by_hour.get(t)
-
-        if rec is None:
-            # No row at all -> legacy defaults
-            jams = 0
-            alerts = 0
-            _length_km = 0.0
-            _level = 0.0
-            _delay_min = 0.0
-            _speed = 35.0
-        else:
-            jams = rec["data_jams"]
-            alerts = rec["data_alerts"]
-
-            # If there are no jams in this hour, legacy code used defaults for jam-derived metrics.
-            if jams == 0:
-                _length_km = 0.0
-                _level = 0.0
-                _delay_min = 0.0
-                _speed = 35.0
-            else:
-                # Convert and round jam-derived metrics
-                _length_km = round(float(rec["length_m"]) / 1000.0, 2) if rec["length_m"] is not None else 0.0
-                _level = round(float(rec["level"]), 2) if rec["level"] is not None else 0.0
-                _delay_min = round(float(rec["delay_s"]) / 60.0, 2) if rec["delay_s"] is not None else 0.0
-                _speed = round(float(rec["speed_kmh"]), 2) if rec["speed_kmh"] is not None else 35.0
-
-        data_jams.append(jams)
-        data_alerts.append(alerts)
-        pubMillis.append(int(t.timestamp() * 1000))  # unix ms
-        speedKMH.append(round(_speed, 2))
-        delay.append(round(_delay_min, 2))
-        level.append(round(_level, 2))
-        length.append(round(_length_km, 2))
-
-    return data_jams, data_alerts, pubMillis, speedKMH, delay, level, length
+    rows = list(rows)
+    if rows:
+        # naive times are UTC, aware ones are converted
+        row_hours = pd.to_datetime([r["utc_time"] for r in rows], utc=True).tz_localize(None) \
+            .to_numpy().astype("datetime64[h]")
+        # np.unique keeps the first occurrence; on the reversed rows that is the last row of each hour
+        hours, first = np.unique(row_hours[::-1], return_index=True)
+        picked = [rows[len(rows) - 1 - i] for i in first]
+    else:
+        hours, picked = np.empty(0, dtype="datetime64[h]"), []
+
+    # axis hour -> index of its row in `picked`
+    pos = np.searchsorted(hours, axis)
+    found = pos < len(hours)
+    found[found] = hours[pos[found]] == axis[found]
+    idx = pos[found]
+
+    def counts(key: str) -> np.ndarray:
+        out = np.zeros(len(axis), dtype=np.int64)
+        out[found] = np.array([int(r[key]) if r.get(key) is not None else 0 for r in picked], dtype=np.int64)[idx]
+        return out
+
+    jams, alerts = counts("data_jams"), counts("data_alerts")
+    with_jams = jams[found] != 0
+
+    def metric(key: str, scale: float, default: float) -> List[float]:
+        # None -> NaN -> default, as are hours without a row or without jams
+        values = np.array([r.get(key) for r in picked], dtype=float)[idx] / scale
+        valid = with_jams & ~np.isnan(values)
+        out = np.full(len(axis), default)
+        out[np.flatnonzero(found)[valid]] = _round2(values[valid])
+        return out.tolist()
+
+    return (
+        jams.tolist(),
+        alerts.tolist(),
+        axis.astype("datetime64[ms]").astype(np.int64).tolist(),
+        metric("speedkmh", 1.0, 35.0),
+        metric("delay", 60.0, 0.0),
+        metric("level", 1.0, 0.0),
+        metric("length", 1000.0, 0.0),
+    )
 
 
 def fetch_sum_statistics(cursor, from_date, to_date):
@@ -123,7 +123,8 @@ def fetch_sum_statistics(cursor, from_date, to_date):
 
 def fetch_hourly_by_streets(cursor, from_date, to_date, streets: List[str]):
     """
-    Function returns statistics for given list of streets
+    Function returns hourly statistics for given list of streets (one row per hour of [from_date, to_date),
+    same structure as QUERY_SUM_STATISTICS; jams and alerts are both filtered by street_id)
 
     :param cursor:
     :param from_date:
@@ -131,23 +132,42 @@ def fetch_hourly_by_streets(cursor, from_date, to_date, streets: List[str]):
     :param streets:
     :return:
     """
+    ids = street_ids(cursor, streets)
     cursor.execute(
         QUERY_SUM_STATISTICS_WITH_STREETS,
-        (from_date, to_date,  # for alerts subquery
-         from_date, to_date, streets)  # for jams main query
+        (from_date, to_date,  # hours CTE
+         from_date, to_date, ids,  # jams_agg
+         from_date, to_date, ids)  # alerts_agg
     )
     return cursor.fetchall()
 
 
 def fetch_hourly_by_route(cursor, from_date, to_date, route_coords):
     """
-    Fetch traffic stats by spatial proximity to a given route.
+    Fetch hourly traffic stats of jams/alerts within ROUTE_BUFFER_METERS of a given route
+    (one row per hour of [from_date, to_date)).
+    Uses the route corridor cache when available (see helpers/route_cache.py).
     """
-    linestring = "LINESTRING(" + ", ".join([f"{lon} {lat}" for lon, lat in route_coords]) + ")"
+    linestring = _build_linestring(route_coords)
+
+    corridor = ensure_route_corridor(cursor, linestring, from_date, to_date)
+    if corridor:
+        ids = corridor.ids_params(from_date, to_date)
+        params = (
+            from_date, to_date,   # hours CTE
+            corridor.route_hash,  # stored corridor
+            *ids,                 # jams on route
+            *ids,                 # alerts on route
+            from_date, to_date,   # jams join
+        )
+        cursor.execute(QUERY_SUM_STATISTICS_WITH_CACHED_ROUTE, params)
+        return cursor.fetchall()
 
     params = (
-        linestring, from_date, to_date,   # For alerts
-        linestring, from_date, to_date,  # For jams
+        from_date, to_date,  # hours CTE
+        linestring, ROUTE_BUFFER_METERS,  # route corridor
+        from_date, to_date,  # For jams
+        from_date, to_date,  # For alerts
     )
 
     cursor.execute(QUERY_SUM_STATISTICS_WITH_ROUTE, params)
@@ -167,7 +187,6 @@ def transform_to_response_statistics(rows):
     delay = []
     level = []
     length = []
-    xaxis = []
 
 
     if not rows:
@@ -181,7 +200,7 @@ def transform_to_response_statistics(rows):
             delay.append(row["delay"])
             level.append(row["level"])
             length.append(row["length"])
-            xaxis.append(convert_utc_to_local(row["utc_time"]))
+        xaxis = local_time_labels(rows)
 
     return {
         "jams": data_jams,
@@ -204,8 +223,7 @@ def transform_to_response_statistics_v2(rows):
     """
     statistics = []
 
-    for row in rows:
-        timestamp = convert_utc_to_local(row["utc_time"])
+    for row, timestamp in zip(rows, local_time_labels(rows)):
         statistics.append({
             "timestamp": timestamp,
             "stats": {
@@ -235,7 +253,7 @@ def _build_linestring(route: List[List[float]]) -> str:
     return "LINESTRING(" + ", ".join(parts) + ")"
 
 
-def fetch_total_statistics(
+def fetch_total_statistics_row(
     cursor,
     from_date: datetime,
     to_date: datetime,
@@ -243,10 +261,10 @@ def fetch_total_statistics(
     route: Optional[List[List[float]]] = None,
 ) -> Dict[str, Any]:
     """
-    Returns single-row totals for the selected scope.
+    Returns the raw single-row totals for the selected scope (see fetch_total_statistics).
     - Without filters -> full area totals
-    - With streets -> filter jams/alerts by street IN (..)
-    - With route   -> spatial filter using ST_Intersects on LINESTRING
+    - With streets -> filter jams/alerts by street_id IN (..)
+    - With route   -> jams/alerts within ROUTE_BUFFER_METERS of the LINESTRING
     """
     streets = streets or []
     route = route or []
@@ -256,22 +274,37 @@ def fetch_total_statistics(
 
     if route:
         linestring = _build_linestring(route)
+        corridor = ensure_route_corridor(cursor, linestring, from_date, to_date)
+        if corridor:
+            ids = corridor.ids_params(from_date, to_date)
+            cursor.execute(
+                QUERY_TOTAL_STATISTICS_WITH_CACHED_ROUTE,
+                (
+                    corridor.route_hash,  # stored corridor
+                    *ids,                 # jams on route
+                    *ids,                 # alerts on route
+                    from_date, to_date,   # jams join
+                ),
+            )
+            return cursor.fetchone() or {}
+
         cursor.execute(
             QUERY_TOTAL_STATISTICS_WITH_ROUTE,
             (
-                linestring,           # route geom
+                linestring, ROUTE_BUFFER_METERS,  # route corridor
                 from_date, to_date,   # alerts window
                 from_date, to_date,   # jams window
             ),
         )
     elif streets:
+        ids = street_ids(cursor, streets)
         cursor.execute(
             QUERY_TOTAL_STATISTICS_WITH_STREETS,
             (
                 from_date, to_date,   # alerts window
-                streets,              # alerts streets
+                ids,                  # alerts street ids
                 from_date, to_date,   # jams window
-                streets,              # jams streets
+                ids,                  # jams street ids
             ),
         )
     else:
@@ -283,8 +316,16 @@ def fetch_total_statistics(
             ),
         )
 
-    row = cursor.fetchone() or {}
-    # Normalize None -> defaults if there are no jams in the interval
+    return cursor.fetchone() or {}
+
+
+def total_statistics_summed_columns(streets: Optional[List[str]], route: Optional[List[List[float]]]) -> Tuple[str, ...]:
+    """Columns the totals query sums instead of averaging (only the unfiltered QUERY_TOTAL_STATISTICS does)."""
+    return () if streets or route else ("delay", "length")
+
+
+def normalize_total_statistics(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a totals row; None -> defaults if there are no jams in the interval."""
     data_jams = int(row.get("data_jams") or 0)
     data_alerts = int(row.get("data_alerts") or 0)
 
@@ -301,8 +342,24 @@ def fetch_total_statistics(
     return {
         "data_jams": data_jams,
         "data_alerts": data_alerts,
-        "speedKMH": float(row.get("speedKMH") or 35.0),
+        "speedKMH": float(row.get("speedkmh") or 35.0),
         "delay": round(float(row.get("delay") or 0.0), 2),
         "level": round(float(row.get("level") or 0.0), 2),
         "length": round(float(row.get("length") or 0.0), 2),
-    }
\ No newline at end of file
+    }
+
+
+def fetch_total_statistics(
+    cursor,
+    from_date: datetime,
+    to_date: datetime,
+    streets: Optional[List[str]] = None,
+    route: Optional[List[List[float]]] = None,
+) -> Dict[str, Any]:
+    """
+    Returns single-row totals for the selected scope.
+    - Without filters -> full area totals
+    - With streets -> filter jams/alerts by street IN (..)
+    - With route   -> jams/alerts within ROUTE_BUFFER_METERS of the LINESTRING
+    """
+    return normalize_total_statistics(fetch_total_statistics_row(cursor, from_date, to_date, streets, route))
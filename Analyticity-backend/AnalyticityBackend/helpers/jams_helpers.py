@@ -1,7 +1,7 @@
 import binascii
 import logging
 import time
-from typing import Optional, List
+from typing import Iterable, Optional, List, Tuple
 
 import numpy as np
 import pandas as pd
@@ -15,6 +15,8 @@ from shapely.errors import GEOSException
 from shapely.geometry.base import BaseGeometry
 from shapely.prepared import prep
 
+from helpers.server_cursor import MemoryBudget, estimate_rows_bytes
+
 
 def _filter_streets(streets_gdf: gpd.GeoDataFrame, streets: List[str]) -> gpd.GeoDataFrame:
     """Filter streets by names safely; if empty list, return all."""
@@ -23,6 +25,12 @@ def _filter_streets(streets_gdf: gpd.GeoDataFrame, streets: List[str]) -> gpd.Ge
     return streets_gdf[streets_gdf["nazev"].isin(streets)].copy()
 
 
+def _street_keys(names: pd.Series) -> pd.Series:
+    """Street names trimmed and lower-cased, None/empty as NA (as street_key() in the database)."""
+    keys = names.astype("string").str.strip().str.lower()
+    return keys.mask(keys == "")
+
+
 def _parse_wkb_any(v) -> Optional["BaseGeometry"]:
     """
     Robustly parse WKB coming from Postgres (bytea) regardless of adaptation:
@@ -127,6 +135,39 @@ def _build_jams_gdf(rows: list, logger) -> gpd.GeoDataFrame:
 
     return gdf
 
+
+def _build_jams_gdf_batched(
+    batches: Iterable[list],
+    street_names: pd.Series,
+    budget: MemoryBudget,
+    logger,
+) -> Tuple[gpd.GeoDataFrame, int]:
+    """
+    Build the jams GeoDataFrame (street, geometry) from row batches of a server-side cursor.
+    Per batch only jams named like one of `street_names` are parsed and kept, the others never
+    match in _count_with_strtree_tolerant; the kept rows are charged to `budget`.
+    Returns (GeoDataFrame, number of rows read).
+    """
+    wanted = set(_street_keys(street_names).dropna())
+    parts = []
+    rows_read = 0
+    for batch in batches:
+        rows_read += len(batch)
+        df = pd.DataFrame(batch)
+        if "street" not in df:
+            continue
+        kept = df[_street_keys(df["street"]).isin(wanted).to_numpy(dtype=bool)].to_dict("records")
+        if not kept:
+            continue
+        budget.charge(estimate_rows_bytes(kept))
+        parts.append(_build_jams_gdf(kept, logger)[["street", "geometry"]])
+
+    if not parts:
+        return gpd.GeoDataFrame(columns=["street", "geometry"], geometry="geometry", crs="EPSG:4326"), rows_read
+    gdf = gpd.GeoDataFrame(pd.concat(parts, ignore_index=True), geometry="geometry", crs="EPSG:4326")
+    return gdf, rows_read
+
+
 # nastaviteľná tolerancia v metroch
 TOLERANCE_M = 15  # tip: 10–20 m funguje dobre v meste
 PROJECTED_CRS = "EPSG:3857"  # metrické; alebo CZ presne: "EPSG:5514"
@@ -199,10 +240,14 @@ def _count_with_strtree_tolerant(street_gdf: gpd.GeoDataFrame,
     jam_geoms = jg["geometry"].tolist()
     sindex = STRtree(jam_geoms)
 
-    # Create mapping from jam geometry to street name for filtering
-    jam_street_map = {}
-    for idx, row in jg.iterrows():
-        jam_street_map[id(row["geometry"])] = row.get("street", "")
+    # Street names normalized once (strip + lower) and coded as ints, the inner loop compares codes
+    # instead of normalizing both names per candidate; -1 = no name
+    jam_names = jg["street"] if "street" in jg else pd.Series(None, index=jg.index, dtype="string")
+    codes, names = pd.factorize(pd.concat([_street_keys(jam_names), _street_keys(sg["nazev"])], ignore_index=True))
+    jam_codes, street_codes = codes[:len(jg)].tolist(), codes[len(jg):].tolist()
+
+    # Create mapping from jam geometry to street name code for filtering
+    jam_street_map = dict(zip(map(id, jam_geoms), jam_codes))
 
     if logger:
         logger.info(
@@ -210,7 +255,7 @@ def _count_with_strtree_tolerant(street_gdf: gpd.GeoDataFrame,
             extra={"request_id": "", "path": "/count", "method": "INTERNAL"}
         )
         # Sample street names from jams
-        sample_jam_streets = list(set([v for v in jam_street_map.values() if v]))[:5]
+        sample_jam_streets = jam_names.dropna().unique().tolist()[:5]
         sample_street_names = sg["nazev"].head(5).tolist()
         logger.info(
             f"[jams] Sample jam streets: {sample_jam_streets}",
@@ -223,9 +268,10 @@ def _count_with_strtree_tolerant(street_gdf: gpd.GeoDataFrame,
 
     counts = []
     matched_pairs = []  # for debugging
-    for idx, street_row in sg.iterrows():
+    for position, (idx, street_row) in enumerate(sg.iterrows()):
         geom = street_row["geometry"]
         street_name = street_row.get("nazev", "")
+        street_code = street_codes[position]
 
         if not _valid(geom):
             counts.append(0)
@@ -252,16 +298,11 @@ def _count_with_strtree_tolerant(street_gdf: gpd.GeoDataFrame,
             # Check if jam intersects with street geometry
             if not prepped.intersects(g):
                 continue
-            # Match street names (case-insensitive, handle None/empty)
-            jam_street = jam_street_map.get(id(g), "")
-            if jam_street and street_name:
-                if jam_street.lower().strip() == street_name.lower().strip():
-                    c += 1
-                    if len(matched_pairs) < 10:  # Store first 10 matches for debugging
-                        matched_pairs.append((street_name, jam_street))
-            elif not jam_street and not street_name:
-                # Both empty - could be a match, but safer to skip
-                pass
+            # Match street names (case-insensitive, None/empty never match)
+            if street_code >= 0 and jam_street_map.get(id(g), -1) == street_code:
+                c += 1
+                if len(matched_pairs) < 10:  # Store first 10 matches for debugging
+                    matched_pairs.append((street_name, names[street_code]))
         counts.append(c)
 
     out = sg.copy()
@@ -0,0 +1,123 @@
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional, Tuple
+
+import psycopg2
+import psycopg2.errors
+
+from constants.queries import (QUERY_ROUTE_CORRIDOR_EVICT, QUERY_ROUTE_CORRIDOR_EXTEND_ALERTS,
+                               QUERY_ROUTE_CORRIDOR_EXTEND_JAMS, QUERY_ROUTE_CORRIDOR_SET_COVERAGE,
+                               QUERY_ROUTE_CORRIDOR_UPSERT, ROUTE_BUFFER_METERS)
+from helpers.logging_helpers import Stopwatch
+
+logger = logging.getLogger("app.route_cache")
+
+# ROUTE_CACHE=off queries every route against its corridor directly (QUERY_*_WITH_ROUTE)
+ROUTE_CACHE_ENABLED = os.getenv("ROUTE_CACHE", "on") != "off"
+
+# The newest data is still being ingested; it is matched live and cached once it is this old
+ROUTE_CACHE_SETTLE = timedelta(minutes=int(os.getenv("ROUTE_CACHE_SETTLE_MINUTES", "60")))
+
+# Corridors of routes not queried for this long are dropped (with their cached ids)
+ROUTE_CACHE_TTL = os.getenv("ROUTE_CACHE_TTL", "30 days")
+
+
+def _as_utc(dt: datetime) -> datetime:
+    # naive request dates are UTC, as in transform_sum_statistics_to_legacy_format
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def route_corridor_hash(linestring: str, buffer_m: float = ROUTE_BUFFER_METERS) -> str:
+    """Cache key of the corridor around a WKT route."""
+    return hashlib.sha1(f"{buffer_m}|{linestring}".encode()).hexdigest()
+
+
+class RouteCorridor(NamedTuple):
+    route_hash: str
+    covered_to: Optional[datetime]   # ids are cached up to here, the rest is matched live
+
+    def ids_params(self, from_date: datetime, to_date: datetime) -> tuple:
+        """Params of ROUTE_CACHED_JAMS_CTE / ROUTE_CACHED_ALERTS_CTE(_TO_INCLUSIVE) for from_date - to_date."""
+        live_from = max(_as_utc(from_date), self.covered_to) if self.covered_to else from_date
+        return self.route_hash, from_date, to_date, live_from, to_date
+
+
+def coverage_gaps(
+    from_date: datetime,
+    to_date: datetime,
+    covered_from: Optional[datetime],
+    covered_to: Optional[datetime],
+    settled_until: datetime,
+) -> Tuple[List[Tuple[datetime, datetime]], Optional[Tuple[datetime, datetime]]]:
+    """
+    Intervals to add to the cached window so that it covers [from_date, min(to_date, settled_until))
+    and the new window. The window stays contiguous: a request apart from it also fills the gap between.
+    Returns ([], None) when nothing is to be cached.
+    """
+    start = _as_utc(from_date)
+    end = min(_as_utc(to_date), settled_until)
+    if start >= end:
+        return [], None
+    if covered_from is None or covered_to is None:
+        return [(start, end)], (start, end)
+
+    window = (min(start, covered_from), max(end, covered_to))
+    gaps = []
+    if window[0] < covered_from:
+        gaps.append((window[0], covered_from))
+    if covered_to < window[1]:
+        gaps.append((covered_to, window[1]))
+    return gaps, window
+
+
+def ensure_route_corridor(
+    cursor,
+    linestring: str,
+    from_date: datetime,
+    to_date: datetime,
+    buffer_m: float = ROUTE_BUFFER_METERS,
+    *,
+    now_utc: Optional[datetime] = None,
+) -> Optional[RouteCorridor]:
+    """
+    Register the route's corridor (buffered once) in the database of `cursor` and extend its cached
+    jam/alert ids so they cover [from_date, to_date) up to ROUTE_CACHE_SETTLE before now.
+
+    The corridor row is locked while extending, concurrent requests for the same route wait and then
+    see the extended window. Commits the connection. Returns None when the cache is disabled or the
+    database has no cache tables (callers fall back to the QUERY_*_WITH_ROUTE queries).
+    """
+    if not ROUTE_CACHE_ENABLED:
+        return None
+    if now_utc is None:
+        now_utc = datetime.now(timezone.utc)
+
+    route_hash = route_corridor_hash(linestring, buffer_m)
+    connection = cursor.connection
+    sw = Stopwatch()
+    try:
+        cursor.execute(QUERY_ROUTE_CORRIDOR_UPSERT, (route_hash, linestring, buffer_m, linestring, buffer_m))
+        row = cursor.fetchone()
+        if row["inserted"]:
+            cursor.execute(QUERY_ROUTE_CORRIDOR_EVICT, (ROUTE_CACHE_TTL,))
+
+        gaps, window = coverage_gaps(from_date, to_date, row["covered_from"], row["covered_to"],
+                                     now_utc - ROUTE_CACHE_SETTLE)
+        for start, end in gaps:
+            cursor.execute(QUERY_ROUTE_CORRIDOR_EXTEND_JAMS, (route_hash, start, end))
+            cursor.execute(QUERY_ROUTE_CORRIDOR_EXTEND_ALERTS, (route_hash, start, end))
+        if gaps:
+            cursor.execute(QUERY_ROUTE_CORRIDOR_SET_COVERAGE, (window[0], window[1], route_hash))
+        connection.commit()
+    except psycopg2.errors.UndefinedTable:
+        connection.rollback()
+        logger.warning("Route corridor cache tables missing (see init.sql), querying the route directly")
+        return None
+
+    if gaps:
+        logger.info(f"Route corridor {route_hash[:12]} extended by {len(gaps)} interval(s), "
+                    f"now covers {window[0]:%Y-%m-%d %H:%M}..{window[1]:%Y-%m-%d %H:%M}",
+                    extra={"duration_ms": sw.ms()})
+    return RouteCorridor(route_hash, window[1] if window else row["covered_to"])
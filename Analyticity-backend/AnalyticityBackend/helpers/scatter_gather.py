@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from psycopg2.extras import RealDictCursor
+
+from db_config import get_db_connection
+from helpers.logging_helpers import Stopwatch
+
+logger = logging.getLogger("app.scatter_gather")
+
+# Counts are summed across sources, every other numeric column is a mean weighted by WEIGHT_COLUMN
+COUNT_COLUMNS = ("data_jams", "data_alerts")
+WEIGHT_COLUMN = "data_jams"
+# Columns determined by the group key (the database-formatted local hour), taken from the first row
+KEY_DERIVED_COLUMNS = ("local_time",)
+
+
+def _fetch_from_source(source: str, fetch: Callable, args: tuple, kwargs: dict):
+    sw = Stopwatch()
+    connection = get_db_connection(source)
+    try:
+        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            result = fetch(cursor, *args, **kwargs)
+        logger.info(f"[scatter_gather] {getattr(fetch, '__name__', fetch)} on '{source}' done",
+                    extra={"duration_ms": sw.ms()})
+        return result
+    finally:
+        connection.close()
+
+
+async def gather_from_sources(sources: Sequence[str], fetch: Callable, *args, **kwargs) -> List[Any]:
+    """
+    Run `fetch(cursor, *args, **kwargs)` on every source concurrently, each in a worker thread
+    with its own pooled connection. Results are in the order of `sources`; the first error is raised.
+    """
+    return list(await asyncio.gather(*(
+        asyncio.to_thread(_fetch_from_source, source, fetch, args, kwargs) for source in sources
+    )))
+
+
+def merge_weighted(rows: Sequence[Dict[str, Any]], summed: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Merge aggregate rows of one group (e.g. the same hour) from several sources:
+    COUNT_COLUMNS and `summed` columns are added up, the remaining columns are means
+    weighted by WEIGHT_COLUMN (rows without jams or with NULL values don't contribute).
+    """
+    summed = set(COUNT_COLUMNS) | set(summed)
+    merged: Dict[str, Any] = {}
+    for key in dict.fromkeys(key for row in rows for key in row):
+        if key in summed:
+            values = [row.get(key) for row in rows if row.get(key) is not None]
+            merged[key] = sum(values) if values else None
+            continue
+        weighted = [(float(row[key]), int(row.get(WEIGHT_COLUMN) or 0)) for row in rows
+                    if row.get(key) is not None and int(row.get(WEIGHT_COLUMN) or 0) > 0]
+        weight = sum(w for _, w in weighted)
+        merged[key] = sum(value * w for value, w in weighted) / weight if weight else None
+    return merged
+
+
+def merge_grouped(results: Iterable[Sequence[Dict[str, Any]]], group_key: str,
+                  summed: Iterable[str] = ()) -> List[Dict[str, Any]]:
+    """Merge row lists from several sources by `group_key` (e.g. utc_time), ordered by it."""
+    groups: Dict[Any, List[Dict[str, Any]]] = {}
+    for rows in results:
+        for row in rows:
+            groups.setdefault(row[group_key], []).append(row)
+
+    merged = []
+    for key in sorted(groups):
+        row = merge_weighted([{k: v for k, v in r.items() if k != group_key and k not in KEY_DERIVED_COLUMNS}
+                              for r in groups[key]], summed)
+        row[group_key] = key
+        row.update((k, v) for k, v in groups[key][0].items() if k in KEY_DERIVED_COLUMNS)
+        merged.append(row)
+    return merged
+
+
+def merge_top_counts(results: Iterable[Tuple[List[str], List[int]]], limit_n: int) -> Tuple[List[str], List[int]]:
+    """Sum per-street counts of several sources and re-rank (count desc, street asc) to the top `limit_n`."""
+    totals: Counter = Counter()
+    for streets, counts in results:
+        for street, count in zip(streets, counts):
+            totals[street] += count
+    ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:limit_n]
+    return [street for street, _ in ranked], [count for _, count in ranked]
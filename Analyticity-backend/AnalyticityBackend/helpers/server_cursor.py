@@ -0,0 +1,87 @@
+import logging
+import os
+import uuid
+from typing import Any, Iterator, List, Optional
+
+from fastapi import HTTPException
+from psycopg2.extras import RealDictCursor
+
+logger = logging.getLogger("app.server_cursor")
+
+# Rows per round trip of a server-side cursor (fetch_batches)
+FETCH_ITERSIZE = int(os.getenv("DB_FETCH_ITERSIZE", "10000"))
+
+# Data one request may keep in memory from batched queries (MemoryBudget), 0 = no limit
+REQUEST_MEMORY_BUDGET_MB = int(os.getenv("REQUEST_MEMORY_BUDGET_MB", "256"))
+
+# Estimated cost of one row besides its values (dict, keys, Python objects)
+ROW_OVERHEAD_BYTES = 200
+
+
+class MemoryBudgetExceeded(HTTPException):
+    """A request kept more data than REQUEST_MEMORY_BUDGET_MB; routers let it through as 413."""
+
+    def __init__(self, label: str, used: int, limit: int):
+        self.used, self.limit = used, limit
+        super().__init__(
+            status_code=413,
+            detail=f"Result of {label} exceeds the memory budget of {limit // (1024 * 1024)} MB per request; "
+                   f"narrow the date range or filter by streets/route.",
+        )
+
+
+class MemoryBudget:
+    """
+    Bytes a request keeps from batched query results. Endpoints charge what they retain of every batch
+    (parsed geometries, encoded JSON, ...), the request fails at most one batch after crossing the limit.
+    """
+
+    def __init__(self, label: str, limit_mb: int = REQUEST_MEMORY_BUDGET_MB):
+        self.label = label
+        self.limit = limit_mb * 1024 * 1024
+        self.used = 0
+
+    def charge(self, nbytes: int):
+        self.used += nbytes
+        if self.limit and self.used > self.limit:
+            raise MemoryBudgetExceeded(self.label, self.used, self.limit)
+
+
+def estimate_rows_bytes(rows: List[Any]) -> int:
+    """Rough in-memory size of fetched rows: bytes/text by length, other values as 8 B scalars."""
+    total = 0
+    for row in rows:
+        total += ROW_OVERHEAD_BYTES
+        for v in (row.values() if isinstance(row, dict) else row):
+            total += len(v) if isinstance(v, (bytes, bytearray, memoryview, str)) else 8
+    return total
+
+
+def fetch_batches(
+    connection,
+    query: str,
+    params: tuple,
+    itersize: int = FETCH_ITERSIZE,
+    cursor_factory=RealDictCursor,
+    label: Optional[str] = None,
+) -> Iterator[List[Any]]:
+    """
+    Run `query` on a server-side (named) cursor and yield its rows in lists of at most `itersize`,
+    so the whole result is never held by the client at once. The cursor lives in the connection's
+    current transaction; it is closed when the generator finishes or is closed.
+    """
+    cursor = connection.cursor(name=f"{label or 'batches'}_{uuid.uuid4().hex[:12]}", cursor_factory=cursor_factory)
+    cursor.itersize = itersize
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(itersize)
+            if not rows:
+                return
+            yield rows
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            # connection broke mid-fetch, the error is reported by the caller
+            logger.debug("Server-side cursor not closed", exc_info=True)
@@ -0,0 +1,21 @@
+import logging
+from typing import List
+
+from constants.queries import QUERY_STREET_IDS
+
+logger = logging.getLogger("app.streets_dict")
+
+
+def street_ids(cursor, streets: List[str]) -> List[int]:
+    """
+    street_id of the requested street names (streets_dict, names normalized by street_key(), so
+    'Husova' and ' husova' are the same street). Ids are per database: translate on the cursor of
+    the source the filtered query runs on. Unknown names are dropped; when none is known the list
+    is empty and `street_id = ANY(%s)` matches no row, as the name filter did.
+    """
+    cursor.execute(QUERY_STREET_IDS, (list(streets),))
+    rows = cursor.fetchall()
+    if len(rows) < len(streets):
+        known = {row["name"] for row in rows}
+        logger.debug(f"[streets_dict] Unknown streets: {[s for s in streets if s not in known]}")
+    return sorted({row["street_id"] for row in rows})
@@ -1,12 +1,16 @@
 import pytz
 from datetime import datetime
+from typing import Any, Dict, List, Sequence
 
-from constants.universal_constants import LOCAL_TZ
+import numpy as np
+import pandas as pd
+
+from constants.universal_constants import LOCAL_TIME_FORMAT, LOCAL_TZ, LOCAL_TZ_NAME
 
 
 def convert_utc_to_local(utc_time_input):
     """
-    Converts a UTC time (string or datetime) to local time (e.g., Europe/Prague)
+    Converts a UTC time (string or datetime) to local time (LOCAL_TZ, e.g. Europe/Prague)
     """
     if isinstance(utc_time_input, str):
         utc_time = datetime.strptime(utc_time_input, "%Y-%m-%dT%H:%M:%SZ")
@@ -16,6 +20,28 @@ def convert_utc_to_local(utc_time_input):
         raise ValueError("Unsupported time format")
 
     utc_time = utc_time.replace(tzinfo=pytz.UTC)
-    local_tz = pytz.timezone("Europe/Prague")
-    local_time = utc_time.astimezone(local_tz)
-    return local_time.strftime("%Y-%m-%d %H:%M:%S")
+    local_time = utc_time.astimezone(LOCAL_TZ)
+    return local_time.strftime(LOCAL_TIME_FORMAT)
+
+
+def convert_utc_to_local_bulk(utc_times: Sequence[Any]) -> List[str]:
+    """
+    convert_utc_to_local for a whole column: parsed at once (naive datetimes and strings are UTC,
+    aware datetimes are converted), shifted with one tz_convert and formatted in bulk (LOCAL_TIME_FORMAT).
+    """
+    if not len(utc_times):
+        return []
+    try:
+        times = pd.to_datetime(list(utc_times), utc=True)
+    except (TypeError, ValueError):
+        raise ValueError("Unsupported time format")
+    local = times.tz_convert(LOCAL_TZ_NAME).tz_localize(None).to_numpy().astype("datetime64[s]")
+    # ISO "YYYY-MM-DDTHH:MM:SS" -> LOCAL_TIME_FORMAT; an order of magnitude faster than strftime per element
+    return np.char.replace(np.datetime_as_string(local, unit="s"), "T", " ").tolist()
+
+
+def local_time_labels(rows: Sequence[Dict[str, Any]]) -> List[str]:
+    """Local time strings of hourly rows: the database-formatted local_time (LOCAL_TIME_IN_DB) or utc_time converted."""
+    if rows and rows[0].get("local_time") is not None:
+        return [row["local_time"] for row in rows]
+    return convert_utc_to_local_bulk([row["utc_time"] for row in rows])
@@ -1,7 +1,11 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.gzip import GZipMiddleware
 
+from db_config import registry, refresh_data_sources_forever
 from logging_config import setup_logging
 from middleware.request_logging import request_logging_middleware
 
@@ -10,7 +14,25 @@ from routers import homepage_endpoints, alerts_endpoints, jams_endpoints, plot_e
 
 logger = setup_logging()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Data sources from the central registry; without it the env-configured databases are used
+    try:
+        await asyncio.to_thread(registry.refresh)
+    except Exception as e:
+        logger.exception(f"Data source registry not loaded, using configured databases only: {e}")
+
+    # Pools are created in the background, requests create missing ones on demand
+    warm_up = asyncio.create_task(asyncio.to_thread(registry.warm_up))
+    refresher = asyncio.create_task(refresh_data_sources_forever())
+    yield
+    refresher.cancel()
+    await asyncio.gather(warm_up, refresher, return_exceptions=True)
+    registry.close_all()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(homepage_endpoints.router)
 app.include_router(alerts_endpoints.router)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import List
+from typing import Any, Dict, List
 
 
 class Stats(BaseModel):
@@ -50,3 +50,10 @@ class TotalStatsResponse(BaseModel):
     delay: float
     level: float
     length: float
+
+
+class DashboardBundleResponse(BaseModel):
+    total_stats: TotalStatsResponse
+    plot_drawer: LegacyPlotResponse
+    plot_alerts: Dict[str, Any]
+    plot_streets: Dict[str, List[Any]]
@@ -177,20 +177,28 @@
 #             )
 
 # app/routers/alerts_draw_endpoints.py
+import asyncio
+import json
 import logging
 from datetime import datetime, timedelta
 from typing import Optional, List
 
 import psycopg2
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
 from psycopg2.extras import RealDictCursor
 
 from constants.queries import (
+    QUERY_ALERTS_WITH_CACHED_ROUTE,
     QUERY_ALERTS_WITH_ROUTE,
     QUERY_ALERTS_WITH_STREETS,
     QUERY_ALERTS,
+    ROUTE_BUFFER_METERS,
 )
 from db_config import get_db_connection
+from helpers.route_cache import ensure_route_corridor
+from helpers.server_cursor import MemoryBudget, MemoryBudgetExceeded, fetch_batches
+from helpers.streets_dict import street_ids
 from models.request_models import PlotDataRequestBody
 from helpers.logging_helpers import request_extras, Stopwatch  # <-- helpery na logovanie/časovanie
 
@@ -216,6 +224,12 @@ def _build_linestring(route: List[List[float]]) -> str:
     return "LINESTRING(" + ", ".join(parts) + ")"
 
 
+def _encode_rows(rows: List[dict]) -> bytes:
+    """JSON array items of `rows` (without brackets), encoded as FastAPI's JSONResponse does."""
+    return json.dumps(jsonable_encoder(rows), ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":"))[1:-1].encode("utf-8")
+
+
 @router.post("/{name}/draw_alerts/")
 async def get_all_alerts_for_drawing(name: str, body: PlotDataRequestBody, request: Request):
     """
@@ -250,7 +264,7 @@ async def get_all_alerts_for_drawing(name: str, body: PlotDataRequestBody, reque
     )
 
     try:
-        connection = get_db_connection(name)
+        connection = await asyncio.to_thread(get_db_connection, name)
         cursor = connection.cursor(cursor_factory=RealDictCursor)
 
         if not streets and not route:
@@ -262,27 +276,47 @@ async def get_all_alerts_for_drawing(name: str, body: PlotDataRequestBody, reque
             if not all(isinstance(s, str) and s.strip() for s in streets):
                 raise HTTPException(status_code=400, detail="Invalid 'streets' list.")
             query = QUERY_ALERTS_WITH_STREETS
-            params = (from_date, to_date, streets)
+            params = (from_date, to_date, street_ids(cursor, streets))
             qlabel = f"STREETS[{len(streets)}]"
             logger.info(f"[draw_alerts] Branch: STREETS count={len(streets)}", extra=extras)
         else:
             linestring = _build_linestring(route)
-            query = QUERY_ALERTS_WITH_ROUTE
-            params = (from_date, to_date, linestring)
-            qlabel = f"ROUTE[{len(route)}]"
+            corridor = ensure_route_corridor(cursor, linestring, from_date, to_date)
+            if corridor:
+                query = QUERY_ALERTS_WITH_CACHED_ROUTE
+                params = (corridor.route_hash, *corridor.ids_params(from_date, to_date), from_date, to_date)
+                qlabel = f"CACHED_ROUTE[{len(route)}]"
+            else:
+                query = QUERY_ALERTS_WITH_ROUTE
+                params = (linestring, ROUTE_BUFFER_METERS, from_date, to_date)
+                qlabel = f"ROUTE[{len(route)}]"
             logger.info(f"[draw_alerts] Branch: ROUTE points={len(route)}", extra=extras)
 
+        # server-side cursor: every batch is encoded right away, only the JSON is kept (MemoryBudget)
         qsw = Stopwatch()
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        budget = MemoryBudget("draw_alerts")
+        chunks: List[bytes] = []
+        n_rows = 0
+        for batch in fetch_batches(connection, query, params, label="draw_alerts"):
+            n_rows += len(batch)
+            chunks.append(_encode_rows(batch))
+            budget.charge(len(chunks[-1]))
         q_ms = qsw.ms()
-        logger.info(f"[draw_alerts] Query {qlabel} executed in {q_ms} ms; rows={len(rows)}", extra=extras | {"duration_ms": q_ms})
+        logger.info(
+            f"[draw_alerts] Query {qlabel} executed in {q_ms} ms; rows={n_rows} json_bytes={budget.used}",
+            extra=extras | {"duration_ms": q_ms},
+        )
 
-        if not rows:
+        if not n_rows:
             logger.warning("[draw_alerts] No data found for the selected parameters.", extra=extras | {"status": 404})
             raise HTTPException(status_code=404, detail="No data found for the selected parameters.")
 
-        return rows
+        return Response(content=b"[" + b",".join(chunks) + b"]", media_type="application/json")
+
+    except MemoryBudgetExceeded as e:
+        logger.warning(f"[draw_alerts] Memory budget exceeded: {e.used} > {e.limit} bytes",
+                       extra=extras | {"status": e.status_code})
+        raise
 
     except HTTPException:
         raise
@@ -1,26 +1,66 @@
+import asyncio
 import logging
+import os
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
 import psycopg2
+import psycopg2.errors
 from fastapi import APIRouter, HTTPException, Request
 from psycopg2.extras import RealDictCursor
 
-from db_config import get_db_connection
+from db_config import get_db_connection, resolve_source_names
 from models.request_models import PlotDataRequestBody
+from models.response_models import DashboardBundleResponse
+from helpers.homepage_helpers import normalize_total_statistics, total_statistics_summed_columns, \
+    transform_sum_statistics_to_legacy_format
 from helpers.logging_helpers import request_extras, Stopwatch, safe_dsn_from_connection
+from helpers.scatter_gather import gather_from_sources, merge_top_counts
+from helpers.streets_dict import street_ids
 from constants.queries import (
     QUERY_ALERTS_TYPES_BASE,
     QUERY_ALERTS_TYPES_WITH_STREETS,
-    QUERY_TOP_STREETS_JAMS_BASE,
-    QUERY_TOP_STREETS_JAMS_WITH_STREETS,
-    QUERY_TOP_STREETS_ALERTS_BASE,
-    QUERY_TOP_STREETS_ALERTS_WITH_STREETS,
+    QUERY_ALERTS_TYPES_ROLLUP_BASE,
+    QUERY_ALERTS_TYPES_ROLLUP_WITH_STREETS,
+    QUERY_BUNDLE_ALERTS_BASE,
+    QUERY_BUNDLE_ALERTS_WITH_STREETS,
+    QUERY_BUNDLE_JAMS_BASE,
+    QUERY_BUNDLE_JAMS_WITH_STREETS,
+    QUERY_TOP_STREETS_BOTH_BASE,
+    QUERY_TOP_STREETS_BOTH_WITH_STREETS,
+    QUERY_TOP_STREETS_BOTH_ROLLUP_BASE,
+    QUERY_TOP_STREETS_BOTH_ROLLUP_WITH_STREETS,
 )
 
 router = APIRouter(tags=["dashboard"])
 logger = logging.getLogger("app.dashboard")
 
+TOP_N_STREETS = 10
+
+# Top streets of intervals at least this long are counted from the hourly street rollups
+TOP_STREETS_ROLLUP_MIN_DAYS = int(os.getenv("TOP_STREETS_ROLLUP_MIN_DAYS", "7"))
+
+# Alert type/subtype counts come from the hourly alerts rollup for intervals at least this long
+ALERTS_TYPES_ROLLUP_MIN_DAYS = int(os.getenv("ALERTS_TYPES_ROLLUP_MIN_DAYS", "1"))
+
+# Jam metrics of the bundle pass, each as <metric>_sum and <metric>_n (non-NULL count)
+BUNDLE_JAM_METRICS = ("speed", "delay", "level", "length")
+
+
+def _fetch_with_rollup(cursor, rollup_query: str, query: str, params: tuple) -> List[Dict[str, Any]]:
+    """
+    Rows of `rollup_query` (hourly rollups, database_creation/timescale_policies.py); a database
+    without the rollups falls back to `query` over the hypertables.
+    """
+    try:
+        cursor.execute(rollup_query, params)
+        return cursor.fetchall() or []
+    except psycopg2.errors.UndefinedTable:
+        cursor.connection.rollback()
+        logger.warning("Hourly rollups missing (see timescale_policies.py), querying the hypertables")
+    cursor.execute(query, params)
+    return cursor.fetchall() or []
+
 
 def _fetch_alerts_type_rows(
     cursor,
@@ -28,16 +68,24 @@ def _fetch_alerts_type_rows(
     to_date: datetime,
     streets: Optional[List[str]],
 ) -> List[Dict[str, Any]]:
-    """Run SQL and return rows: [{type, subtype, count}, ...]."""
+    """
+    Run SQL and return rows: [{type, subtype, count}, ...].
+    Intervals of ALERTS_TYPES_ROLLUP_MIN_DAYS and more sum the hourly alerts rollup.
+    """
     streets = streets or []
 
     if streets:
         if not all(isinstance(s, str) and s.strip() for s in streets):
             raise HTTPException(status_code=400, detail="Invalid 'streets' list.")
-        cursor.execute(QUERY_ALERTS_TYPES_WITH_STREETS, (from_date, to_date, streets))
+        params: Tuple[Any, ...] = (from_date, to_date, street_ids(cursor, streets))
+        rollup_query, query = QUERY_ALERTS_TYPES_ROLLUP_WITH_STREETS, QUERY_ALERTS_TYPES_WITH_STREETS
     else:
-        cursor.execute(QUERY_ALERTS_TYPES_BASE, (from_date, to_date))
+        params = (from_date, to_date)
+        rollup_query, query = QUERY_ALERTS_TYPES_ROLLUP_BASE, QUERY_ALERTS_TYPES_BASE
 
+    if to_date - from_date >= timedelta(days=ALERTS_TYPES_ROLLUP_MIN_DAYS):
+        return _fetch_with_rollup(cursor, rollup_query, query, params)
+    cursor.execute(query, params)
     return cursor.fetchall()
 
 
@@ -127,13 +175,21 @@ async def get_data_for_plot_pies(name: str, body: PlotDataRequestBody, request:
 
     # 2) DB query
     try:
-        connection = get_db_connection(name)
-        logger.info(f"[plot_alerts_types] DB connection established: {safe_dsn_from_connection(connection)}", extra=extras)
-        cursor = connection.cursor(cursor_factory=RealDictCursor)
-
+        sources = resolve_source_names(name)
         qsw = Stopwatch()
-        rows = _fetch_alerts_type_rows(cursor, from_date, to_date, streets)
-        logger.info(f"[plot_alerts_types] Rows fetched: {len(rows)}", extra=extras | {"duration_ms": qsw.ms()})
+
+        if len(sources) > 1:
+            # scatter-gather: _aggregate_alerts_types sums the same type/subtype across sources
+            results = await gather_from_sources(sources, _fetch_alerts_type_rows, from_date, to_date, streets)
+            rows = [row for source_rows in results for row in source_rows]
+        else:
+            connection = await asyncio.to_thread(get_db_connection, sources[0])
+            logger.info(f"[plot_alerts_types] DB connection established: {safe_dsn_from_connection(connection)}", extra=extras)
+            cursor = connection.cursor(cursor_factory=RealDictCursor)
+            rows = _fetch_alerts_type_rows(cursor, from_date, to_date, streets)
+
+        logger.info(f"[plot_alerts_types] Rows fetched: {len(rows)}; sources={','.join(sources)}",
+                    extra=extras | {"duration_ms": qsw.ms()})
 
         if not rows:
             logger.warning("[plot_alerts_types] No alerts found for selected parameters.", extra=extras | {"status": 404})
@@ -180,36 +236,43 @@ def _fetch_top_streets(
     from_date: datetime,
     to_date: datetime,
     streets: Optional[List[str]],
-    limit_n: int,
-    *,
-    which: str,  # "jams" | "alerts"
-) -> Tuple[List[str], List[int]]:
-    """Run the appropriate SQL and return (streets, counts) for the chosen source."""
+    limit_n: Optional[int],
+) -> Tuple[Tuple[List[str], List[int]], Tuple[List[str], List[int]]]:
+    """
+    Run one query ranking both jams and alerts streets and return ((streets, counts) of jams,
+    (streets, counts) of alerts) (limit_n=None -> all streets).
+
+    Intervals of TOP_STREETS_ROLLUP_MIN_DAYS and more are counted from the hourly street rollups;
+    a database without them falls back to counting the hypertables.
+    """
     streets = streets or []
-    params: Tuple[Any, ...]
-    rows: List[Dict[str, Any]]
+    args: Tuple[Any, ...] = (from_date, to_date, street_ids(cursor, streets)) if streets else (from_date, to_date)
+    params = args + (limit_n,) + args + (limit_n,)
 
-    if which == "jams":
-        if streets:
-            params = (from_date, to_date, streets, limit_n)
-            cursor.execute(QUERY_TOP_STREETS_JAMS_WITH_STREETS, params)
-        else:
-            params = (from_date, to_date, limit_n)
-            cursor.execute(QUERY_TOP_STREETS_JAMS_BASE, params)
-    elif which == "alerts":
-        if streets:
-            params = (from_date, to_date, streets, limit_n)
-            cursor.execute(QUERY_TOP_STREETS_ALERTS_WITH_STREETS, params)
-        else:
-            params = (from_date, to_date, limit_n)
-            cursor.execute(QUERY_TOP_STREETS_ALERTS_BASE, params)
+    query = QUERY_TOP_STREETS_BOTH_WITH_STREETS if streets else QUERY_TOP_STREETS_BOTH_BASE
+    if to_date - from_date >= timedelta(days=TOP_STREETS_ROLLUP_MIN_DAYS):
+        rollup_query = QUERY_TOP_STREETS_BOTH_ROLLUP_WITH_STREETS if streets else QUERY_TOP_STREETS_BOTH_ROLLUP_BASE
+        rows = _fetch_with_rollup(cursor, rollup_query, query, params)
     else:
-        raise ValueError("Invalid 'which' argument")
+        cursor.execute(query, params)
+        rows = cursor.fetchall() or []
 
-    rows = cursor.fetchall() or []
-    streets_out = [r["street"] for r in rows]
-    counts_out = [int(r["cnt"]) for r in rows]
-    return streets_out, counts_out
+    ranking: Dict[str, Tuple[List[str], List[int]]] = {"jams": ([], []), "alerts": ([], [])}
+    for r in rows:
+        streets_out, counts_out = ranking[r["source"]]
+        streets_out.append(r["street"])
+        counts_out.append(int(r["cnt"]))
+    return ranking["jams"], ranking["alerts"]
+
+
+def _fetch_street_counts(
+    cursor,
+    from_date: datetime,
+    to_date: datetime,
+    streets: Optional[List[str]],
+) -> Tuple[Tuple[List[str], List[int]], Tuple[List[str], List[int]]]:
+    """Counts of all streets (no LIMIT) for jams and alerts, used to merge rankings across sources."""
+    return _fetch_top_streets(cursor, from_date, to_date, streets, None)
 
 
 @router.post("/{name}/data_for_plot_streets/")
@@ -248,25 +311,34 @@ async def get_data_for_plot_bar(name: str, body: PlotDataRequestBody, request: R
 
     # 2) DB + queries
     try:
-        connection = get_db_connection(name)
-        logger.info(f"[plot_streets] DB connection established: {safe_dsn_from_connection(connection)}", extra=extras)
-        cursor = connection.cursor(cursor_factory=RealDictCursor)
-
-        # top-N jams streets
-        sw_j = Stopwatch()
-        streets_jams, values_jams = _fetch_top_streets(cursor, from_date, to_date, streets_filter, limit_n=10, which="jams")
-        logger.info(
-            f"[plot_streets] JAMS top streets fetched; n={len(streets_jams)}",
-            extra=extras | {"duration_ms": sw_j.ms()},
-        )
-
-        # top-N alerts streets
-        sw_a = Stopwatch()
-        streets_alerts, values_alerts = _fetch_top_streets(cursor, from_date, to_date, streets_filter, limit_n=10, which="alerts")
-        logger.info(
-            f"[plot_streets] ALERTS top streets fetched; n={len(streets_alerts)}",
-            extra=extras | {"duration_ms": sw_a.ms()},
-        )
+        sources = resolve_source_names(name)
+
+        if len(sources) > 1:
+            # scatter-gather: full per-street counts of every source, summed and re-ranked,
+            # so a street just below the top-N in each source still ranks correctly
+            sw = Stopwatch()
+            results = await gather_from_sources(sources, _fetch_street_counts, from_date, to_date, streets_filter)
+            streets_jams, values_jams = merge_top_counts((jams for jams, _ in results), TOP_N_STREETS)
+            streets_alerts, values_alerts = merge_top_counts((alerts for _, alerts in results), TOP_N_STREETS)
+            logger.info(
+                f"[plot_streets] Top streets merged from sources={','.join(sources)}; "
+                f"n_jams={len(streets_jams)} n_alerts={len(streets_alerts)}",
+                extra=extras | {"duration_ms": sw.ms()},
+            )
+        else:
+            connection = await asyncio.to_thread(get_db_connection, sources[0])
+            logger.info(f"[plot_streets] DB connection established: {safe_dsn_from_connection(connection)}", extra=extras)
+            cursor = connection.cursor(cursor_factory=RealDictCursor)
+
+            # top-N jams and alerts streets in one round trip
+            sw = Stopwatch()
+            (streets_jams, values_jams), (streets_alerts, values_alerts) = _fetch_top_streets(
+                cursor, from_date, to_date, streets_filter, TOP_N_STREETS
+            )
+            logger.info(
+                f"[plot_streets] Top streets fetched; n_jams={len(streets_jams)} n_alerts={len(streets_alerts)}",
+                extra=extras | {"duration_ms": sw.ms()},
+            )
 
         # if both empty -> 404
         if not streets_jams and not streets_alerts:
@@ -307,3 +379,205 @@ async def get_data_for_plot_bar(name: str, body: PlotDataRequestBody, request: R
                 )
         except Exception:
             logger.exception("[plot_streets] Failed to close connection", extra=extras)
+
+
+def _fetch_bundle_pass(
+    cursor,
+    table: str,  # "jams" | "alerts"
+    from_date: datetime,
+    to_date: datetime,
+    streets: Optional[List[str]],
+) -> List[Dict[str, Any]]:
+    """One scan of `table` grouped by hour, street (and alert type/subtype) at once (QUERY_BUNDLE_*)."""
+    streets = streets or []
+    if table == "jams":
+        query = QUERY_BUNDLE_JAMS_WITH_STREETS if streets else QUERY_BUNDLE_JAMS_BASE
+    elif table == "alerts":
+        query = QUERY_BUNDLE_ALERTS_WITH_STREETS if streets else QUERY_BUNDLE_ALERTS_BASE
+    else:
+        raise ValueError("Invalid 'table' argument")
+
+    cursor.execute(query, (from_date, to_date, street_ids(cursor, streets)) if streets else (from_date, to_date))
+    return cursor.fetchall()
+
+
+def _sum_bundle_rows(
+    rows: List[Dict[str, Any]],
+    part: str,
+    key_columns: Tuple[str, ...],
+    value_columns: Tuple[str, ...],
+) -> Dict[tuple, Dict[str, float]]:
+    """Add up the values of `part` rows (of one or several sources) with the same key."""
+    totals: Dict[tuple, Dict[str, float]] = {}
+    for r in rows:
+        if r["part"] != part:
+            continue
+        acc = totals.setdefault(tuple(r[c] for c in key_columns), dict.fromkeys(value_columns, 0))
+        for c in value_columns:
+            acc[c] += r[c] or 0
+    return totals
+
+
+def _mean(acc: Optional[Dict[str, float]], metric: str) -> Optional[float]:
+    if not acc or not acc[f"{metric}_n"]:
+        return None
+    return acc[f"{metric}_sum"] / acc[f"{metric}_n"]
+
+
+def _build_dashboard_bundle(
+    jams_rows: List[Dict[str, Any]],
+    alerts_rows: List[Dict[str, Any]],
+    from_date: datetime,
+    to_date: datetime,
+    streets: Optional[List[str]],
+) -> Dict[str, Any]:
+    """
+    Derive all dashboard widgets from the bundle pass rows, in the shapes of the single endpoints:
+    total_stats, data_for_plot_drawer, data_for_plot_alerts and data_for_plot_streets.
+    """
+    jam_values = ("data_jams",) + tuple(f"{m}_{x}" for m in BUNDLE_JAM_METRICS for x in ("sum", "n"))
+    jams_by_hour = _sum_bundle_rows(jams_rows, "hour", ("utc_time",), jam_values)
+    jams_by_street = _sum_bundle_rows(jams_rows, "street", ("street",), ("data_jams",))
+    alerts_by_hour = _sum_bundle_rows(alerts_rows, "hour", ("utc_time",), ("data_alerts",))
+    alerts_by_street = _sum_bundle_rows(alerts_rows, "street", ("street",), ("data_alerts",))
+    alerts_by_type = _sum_bundle_rows(alerts_rows, "type", ("type", "subtype"), ("data_alerts",))
+
+    # hourly series, rows as from QUERY_SUM_STATISTICS
+    hourly_rows = []
+    for key in sorted(set(jams_by_hour) | set(alerts_by_hour)):
+        jams = jams_by_hour.get(key)
+        hourly_rows.append({
+            "utc_time": key[0],
+            "data_jams": int(jams["data_jams"]) if jams else 0,
+            "data_alerts": int(alerts_by_hour.get(key, {}).get("data_alerts", 0)),
+            "speedkmh": _mean(jams, "speed"),
+            "delay": _mean(jams, "delay"),
+            "level": _mean(jams, "level"),
+            "length": _mean(jams, "length"),
+        })
+    data_jams, data_alerts, xaxis, speedKMH, delay, level, length = transform_sum_statistics_to_legacy_format(
+        hourly_rows, from_date, to_date
+    )
+
+    # totals, as QUERY_TOTAL_STATISTICS(_WITH_STREETS): summed columns only without a streets filter
+    totals = dict.fromkeys(jam_values, 0)
+    for acc in jams_by_hour.values():
+        for c in jam_values:
+            totals[c] += acc[c]
+    summed = total_statistics_summed_columns(streets, None)
+
+    def total_of(metric: str) -> Optional[float]:
+        return totals[f"{metric}_sum"] if metric in summed else _mean(totals, metric)
+
+    total_stats = normalize_total_statistics({
+        "data_jams": totals["data_jams"],
+        "data_alerts": sum(acc["data_alerts"] for acc in alerts_by_hour.values()),
+        "speedkmh": total_of("speed"),
+        "delay": (total_of("delay") or 0.0) / 60.0,
+        "level": total_of("level"),
+        "length": (total_of("length") or 0.0) / 1000.0,
+    })
+
+    def top_streets(by_street: Dict[tuple, Dict[str, float]], column: str) -> Tuple[List[str], List[int]]:
+        named = [(key[0], int(acc[column])) for key, acc in by_street.items() if key[0] and key[0].strip()]
+        return merge_top_counts([([n for n, _ in named], [c for _, c in named])], TOP_N_STREETS)
+
+    streets_jams, values_jams = top_streets(jams_by_street, "data_jams")
+    streets_alerts, values_alerts = top_streets(alerts_by_street, "data_alerts")
+
+    return {
+        "total_stats": total_stats,
+        "plot_drawer": {
+            "jams": data_jams,
+            "alerts": data_alerts,
+            "speedKMH": speedKMH,
+            "delay": delay,
+            "level": level,
+            "length": length,
+            "xaxis": xaxis,
+        },
+        "plot_alerts": _aggregate_alerts_types([
+            {"type": key[0], "subtype": key[1], "count": acc["data_alerts"]} for key, acc in alerts_by_type.items()
+        ]),
+        "plot_streets": {
+            "streets_jams": streets_jams,
+            "values_jams": values_jams,
+            "streets_alerts": streets_alerts,
+            "values_alerts": values_alerts,
+        },
+    }
+
+
+@router.post("/{name}/dashboard_bundle/", response_model=DashboardBundleResponse)
+async def get_dashboard_bundle(name: str, body: PlotDataRequestBody, request: Request):
+    """
+    All dashboard widgets in one request: total_stats, data_for_plot_drawer, data_for_plot_alerts
+    and data_for_plot_streets for the same interval and optional streets filter.
+    - One pass over jams and one over alerts (per source), both running concurrently.
+    - Route filtering is not supported (use the single endpoints).
+    """
+    extras = request_extras(request)
+    whole = Stopwatch()
+
+    # 1) Validate dates (+ include whole 'to' day)
+    try:
+        from_date = datetime.strptime(body.from_date, "%Y-%m-%d")
+        to_date = datetime.strptime(body.to_date, "%Y-%m-%d") + timedelta(days=1)
+    except Exception:
+        logger.warning("[dashboard_bundle] Invalid date format. Expected YYYY-MM-DD.", extra=extras | {"status": 400})
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
+    if from_date >= to_date:
+        logger.warning(f"[dashboard_bundle] Invalid date range: {from_date}..{to_date}", extra=extras | {"status": 400})
+        raise HTTPException(status_code=400, detail="'from_date' must be before 'to_date'.")
+
+    streets = body.streets or []
+    if body.route:
+        logger.warning("[dashboard_bundle] Route filter not supported.", extra=extras | {"status": 400})
+        raise HTTPException(status_code=400, detail="Route filter is not supported by dashboard_bundle.")
+    if not all(isinstance(s, str) and s.strip() for s in streets):
+        logger.warning("[dashboard_bundle] Invalid 'streets' list.", extra=extras | {"status": 400})
+        raise HTTPException(status_code=400, detail="Invalid 'streets' list.")
+
+    logger.info(
+        f"[dashboard_bundle] range={from_date.date()}..{(to_date - timedelta(days=1)).date()} streets={len(streets)}",
+        extra=extras,
+    )
+
+    # 2) One pass per hypertable and source, all concurrently (each with its own pooled connection)
+    try:
+        sources = resolve_source_names(name)
+        qsw = Stopwatch()
+        jams_results, alerts_results = await asyncio.gather(
+            gather_from_sources(sources, _fetch_bundle_pass, "jams", from_date, to_date, streets),
+            gather_from_sources(sources, _fetch_bundle_pass, "alerts", from_date, to_date, streets),
+        )
+        jams_rows = [row for rows in jams_results for row in rows]
+        alerts_rows = [row for rows in alerts_results for row in rows]
+        logger.info(
+            f"[dashboard_bundle] Passes done; sources={','.join(sources)} rows_jams={len(jams_rows)} "
+            f"rows_alerts={len(alerts_rows)}",
+            extra=extras | {"duration_ms": qsw.ms()},
+        )
+
+        if not jams_rows and not alerts_rows:
+            logger.warning("[dashboard_bundle] No data found for selected parameters.", extra=extras | {"status": 404})
+            raise HTTPException(status_code=404, detail="No data found for the selected parameters.")
+
+        # 3) Derive the widgets
+        bsw = Stopwatch()
+        bundle = _build_dashboard_bundle(jams_rows, alerts_rows, from_date, to_date, streets)
+        logger.info(f"[dashboard_bundle] Widgets derived; total handler time {whole.ms()} ms",
+                    extra=extras | {"duration_ms": bsw.ms()})
+        return DashboardBundleResponse(**bundle)
+
+    except HTTPException:
+        raise
+    except psycopg2.OperationalError as e:
+        logger.exception(f"[dashboard_bundle] OperationalError: {e}", extra=extras | {"status": 503})
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    except psycopg2.Error as e:
+        logger.exception(f"[dashboard_bundle] psycopg2 error: {e}", extra=extras | {"status": 500})
+        raise HTTPException(status_code=500, detail="Query execution error")
+    except Exception as e:
+        logger.exception(f"[dashboard_bundle] Unexpected error: {e}", extra=extras | {"status": 500})
+        raise HTTPException(status_code=500, detail="Internal server error")
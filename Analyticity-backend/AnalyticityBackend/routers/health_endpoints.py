@@ -1,4 +1,4 @@
-import logging, time, psycopg2
+import asyncio, logging, time, psycopg2
 from typing import Dict
 from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
@@ -22,13 +22,13 @@ async def db_healthcheck(request: Request):
     results = {}
     all_sw = Stopwatch()
 
-    for db_name in DATABASES.keys():
+    for db_name in list(DATABASES):
         conn = None
         db_info = {"status": "ok", "tables": {}, "latency_ms": None}
         sw = Stopwatch()
 
         try:
-            conn = get_db_connection(db_name)
+            conn = await asyncio.to_thread(get_db_connection, db_name)
             with conn.cursor() as cur:
                 cur.execute("SELECT 1;")
                 _ = cur.fetchone()
@@ -1,15 +1,17 @@
 from datetime import datetime, timedelta
 from typing import List, Optional
+import asyncio
 import logging
 
 import psycopg2
 from fastapi import APIRouter, HTTPException, Request
 from psycopg2.extras import RealDictCursor
 
-from db_config import get_db_connection
+from db_config import get_db_connection, resolve_source_names
 from helpers.homepage_helpers import fetch_sum_statistics, fetch_hourly_by_streets, transform_to_response_statistics, \
     fetch_hourly_by_route, transform_to_response_statistics_v2, transform_sum_statistics_to_legacy_format, \
-    fetch_total_statistics
+    fetch_total_statistics, fetch_total_statistics_row, normalize_total_statistics, total_statistics_summed_columns
+from helpers.scatter_gather import gather_from_sources, merge_grouped, merge_weighted
 from models.request_models import PlotDataRequestBody
 from models.response_models import StatsResponse, LegacyPlotResponse, TotalStatsResponse
 from helpers.logging_helpers import request_extras, Stopwatch, safe_dsn_from_connection
@@ -99,47 +101,44 @@ async def get_data_for_plot_drawer_v2(name: str, body: PlotDataRequestBody, requ
     )
 
     try:
-        connection = get_db_connection(name)
-        logger.info(
-            f"[data_for_plot_drawer] DB connection established: {safe_dsn_from_connection(connection)}",
-            extra=extras,
-        )
-        cursor = connection.cursor(cursor_factory=RealDictCursor)
-
-        rows = []
         if not streets and not route:
-            logger.info("[data_for_plot_drawer] Branch: summary stats", extra=extras)
-            qsw = Stopwatch()
-            rows = fetch_sum_statistics(cursor, from_date, to_date)
-            logger.info(
-                f"[data_for_plot_drawer] Summary query executed; rows={len(rows)}",
-                extra=extras | {"duration_ms": qsw.ms()},
-            )
+            branch, fetch, args = "summary stats", fetch_sum_statistics, (from_date, to_date)
 
         elif streets and not route:
             if not all(isinstance(s, str) and s.strip() for s in streets):
                 logger.warning("[data_for_plot_drawer] Invalid 'streets' list.", extra=extras | {"status": 400})
                 raise HTTPException(status_code=400, detail="Invalid 'streets' list.")
-            logger.info(f"[data_for_plot_drawer] Branch: hourly by streets (count={len(streets)})", extra=extras)
-            qsw = Stopwatch()
-            rows = fetch_hourly_by_streets(cursor, from_date, to_date, streets)
-            logger.info(
-                f"[data_for_plot_drawer] Streets query executed; rows={len(rows)}",
-                extra=extras | {"duration_ms": qsw.ms()},
-            )
+            branch = f"hourly by streets (count={len(streets)})"
+            fetch, args = fetch_hourly_by_streets, (from_date, to_date, streets)
 
         else:
             # route has priority if present
             if not isinstance(route, list) or len(route) < 2:
                 logger.warning("[data_for_plot_drawer] Route must contain at least two points.", extra=extras | {"status": 400})
                 raise HTTPException(status_code=400, detail="Route must contain at least two points.")
-            logger.info(f"[data_for_plot_drawer] Branch: hourly by route (points={len(route)})", extra=extras)
-            qsw = Stopwatch()
-            rows = fetch_hourly_by_route(cursor, from_date, to_date, route)
+            branch = f"hourly by route (points={len(route)})"
+            fetch, args = fetch_hourly_by_route, (from_date, to_date, route)
+
+        sources = resolve_source_names(name, route)
+        logger.info(f"[data_for_plot_drawer] Branch: {branch}; sources={','.join(sources)}", extra=extras)
+        qsw = Stopwatch()
+
+        if len(sources) > 1:
+            # scatter-gather: hourly rows of every source merged per hour
+            rows = merge_grouped(await gather_from_sources(sources, fetch, *args), "utc_time")
+        else:
+            connection = await asyncio.to_thread(get_db_connection, sources[0])
             logger.info(
-                f"[data_for_plot_drawer] Route query executed; rows={len(rows)}",
-                extra=extras | {"duration_ms": qsw.ms()},
+                f"[data_for_plot_drawer] DB connection established: {safe_dsn_from_connection(connection)}",
+                extra=extras,
             )
+            cursor = connection.cursor(cursor_factory=RealDictCursor)
+            rows = fetch(cursor, *args)
+
+        logger.info(
+            f"[data_for_plot_drawer] Query executed; rows={len(rows)}",
+            extra=extras | {"duration_ms": qsw.ms()},
+        )
 
         if not rows:
             logger.warning("[data_for_plot_drawer] No data found for the selected parameters.", extra=extras | {"status": 404})
@@ -226,13 +225,23 @@ async def total_stats(name: str, body: PlotDataRequestBody, request: Request):
 
     # 2) DB & fetch totals
     try:
-        connection = get_db_connection(name)
-        logger.info(f"[total_stats] DB connection established: {safe_dsn_from_connection(connection)}", extra=extras)
-        cursor = connection.cursor(cursor_factory=RealDictCursor)
-
+        sources = resolve_source_names(name, route)
         qsw = Stopwatch()
-        totals = fetch_total_statistics(cursor, from_date, to_date, streets=streets, route=route)
-        logger.info(f"[total_stats] Totals computed", extra=extras | {"duration_ms": qsw.ms()})
+
+        if len(sources) > 1:
+            # scatter-gather: counts and sums added up, averages weighted by number of jams
+            rows = await gather_from_sources(sources, fetch_total_statistics_row, from_date, to_date,
+                                             streets=streets, route=route)
+            totals = normalize_total_statistics(
+                merge_weighted(rows, summed=total_statistics_summed_columns(streets, route))
+            )
+        else:
+            connection = await asyncio.to_thread(get_db_connection, sources[0])
+            logger.info(f"[total_stats] DB connection established: {safe_dsn_from_connection(connection)}", extra=extras)
+            cursor = connection.cursor(cursor_factory=RealDictCursor)
+            totals = fetch_total_statistics(cursor, from_date, to_date, streets=streets, route=route)
+
+        logger.info(f"[total_stats] Totals computed; sources={','.join(sources)}", extra=extras | {"duration_ms": qsw.ms()})
 
         payload = TotalStatsResponse(**totals)
         logger.info(
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import time
 from typing import Optional
@@ -6,7 +7,6 @@ import psycopg2
 from datetime import datetime, timedelta
 
 from fastapi import APIRouter, HTTPException, Request
-from psycopg2.extras import RealDictCursor
 
 import geopandas as gpd
 
@@ -15,7 +15,8 @@ from db_config import get_db_connection
 from models.request_models import PlotDataRequestBody
 
 from helpers.jams_helpers import _filter_streets, _assign_color, _count_with_strtree_tolerant, \
-    _build_jams_gdf, _serialize_street_paths
+    _build_jams_gdf_batched, _serialize_street_paths
+from helpers.server_cursor import MemoryBudget, MemoryBudgetExceeded, fetch_batches
 
 router = APIRouter(tags=["jams"])
 logger = logging.getLogger("app.jams")
@@ -45,6 +46,23 @@ def _load_streets_once( path: str = "./datasets/streets_exploded.geojson") -> gp
     return _STREETS_GDF
 
 
+def _log_first_batch(batches, request_id: str, path: str):
+    """Pass the batches through, logging sample street names of the first one."""
+    for number, rows in enumerate(batches):
+        if number == 0:
+            sample_streets = [r.get("street", "") for r in rows[:10]]
+            unique_streets = list(set([r.get("street", "") for r in rows if r.get("street")]))[:10]
+            logger.info(
+                f"[jams] Sample jam streets from DB: {sample_streets}",
+                extra={"request_id": request_id, "path": path, "method": "POST"},
+            )
+            logger.info(
+                f"[jams] Unique streets in jams (sample): {unique_streets}",
+                extra={"request_id": request_id, "path": path, "method": "POST"},
+            )
+        yield rows
+
+
 @router.post("/{name}/all_delays/")
 async def get_all_delays_for_drawing(name: str, body: PlotDataRequestBody, request: Request):
     """
@@ -101,48 +119,34 @@ async def get_all_delays_for_drawing(name: str, body: PlotDataRequestBody, reque
     )
 
     connection: Optional[psycopg2.extensions.connection] = None
-    cursor: Optional[psycopg2.extensions.cursor] = None
 
     try:
-        # DB fetch
-        connection = get_db_connection(name)
-        cursor = connection.cursor(cursor_factory=RealDictCursor)
+        connection = await asyncio.to_thread(get_db_connection, name)
 
+        # DB fetch on a server-side cursor, each batch is parsed right away (supports WKB/WKT) and only
+        # the street/geometry of jams on the requested streets is kept, within the request memory budget
         t_db = time.perf_counter()
-        cursor.execute(QUERY_JAMS, (from_date, to_date))
-        rows = cursor.fetchall()
+        budget = MemoryBudget("all_delays")
+        jams_gdf, rows_read = _build_jams_gdf_batched(
+            _log_first_batch(fetch_batches(connection, QUERY_JAMS, (from_date, to_date), label="all_delays"),
+                             request_id, request.url.path),
+            filtered_streets_gdf["nazev"], budget, logger,
+        )
         db_ms = int((time.perf_counter() - t_db) * 1000)
 
         logger.info(
-            f"[jams] DB query executed in {db_ms} ms; rows={len(rows)}",
+            f"[jams] DB query and parsing done in {db_ms} ms; rows={rows_read} kept={len(jams_gdf)} "
+            f"bytes={budget.used}",
             extra={"request_id": request_id, "path": request.url.path, "method": "POST"},
         )
 
-        # Log sample street names from jams data
-        if rows:
-            sample_streets = [r.get("street", "") for r in rows[:10]]
-            unique_streets = list(set([r.get("street", "") for r in rows if r.get("street")]))[:10]
-            logger.info(
-                f"[jams] Sample jam streets from DB: {sample_streets}",
-                extra={"request_id": request_id, "path": request.url.path, "method": "POST"},
-            )
-            logger.info(
-                f"[jams] Unique streets in jams (sample): {unique_streets}",
-                extra={"request_id": request_id, "path": request.url.path, "method": "POST"},
-            )
-
-        if not rows:
+        if not rows_read:
             logger.warning(
                 "[jams] No data found for the selected parameters.",
                 extra={"request_id": request_id, "path": request.url.path, "method": "POST", "status": 404},
             )
             raise HTTPException(status_code=404, detail="No data found for the selected parameters.")
 
-        # Build jams GDF (supports WKB/WKT)
-        t_geo = time.perf_counter()
-        jams_gdf = _build_jams_gdf(rows, logger)
-        geo_ms = int((time.perf_counter() - t_geo) * 1000)
-
         # Spatial counting via STRtree
         t_cnt = time.perf_counter()
         counted = _count_with_strtree_tolerant(filtered_streets_gdf, jams_gdf, logger)
@@ -159,13 +163,20 @@ async def get_all_delays_for_drawing(name: str, body: PlotDataRequestBody, reque
 
         total_ms = int((time.perf_counter() - t_all) * 1000)
         logger.info(
-            f"[jams] OK - db:{db_ms}ms geo:{geo_ms}ms count:{count_ms}ms ser:{ser_ms}ms total:{total_ms}ms "
+            f"[jams] OK - db+geo:{db_ms}ms count:{count_ms}ms ser:{ser_ms}ms total:{total_ms}ms "
             f"payload_items={len(response)}",
             extra={"request_id": request_id, "path": request.url.path, "method": "POST", "status": 200},
         )
 
         return response
 
+    except MemoryBudgetExceeded as e:
+        logger.warning(
+            f"[jams] Memory budget exceeded: {e.used} > {e.limit} bytes",
+            extra={"request_id": request_id, "path": request.url.path, "method": "POST", "status": e.status_code},
+        )
+        raise
+
     except HTTPException:
         raise
 
@@ -192,8 +203,6 @@ async def get_all_delays_for_drawing(name: str, body: PlotDataRequestBody, reque
 
     finally:
         try:
-            if cursor:
-                cursor.close()
             if connection:
                 connection.close()
         except Exception:
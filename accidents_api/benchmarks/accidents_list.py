@@ -0,0 +1,54 @@
+"""
+GET /api/v1/accidents/ assembly: per-row iterrows + Waze frame scan vs. match index.
+
+    cd accidents_api && python -m benchmarks.accidents_list [limit]
+"""
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import accidents_frame, waze_frame
+from bp_api.routers.accidents import serialize_accidents
+
+
+def _iterrows_serialize(sorted_df: pd.DataFrame, waze_df: pd.DataFrame) -> list:
+    """Previous implementation of the endpoint body."""
+    result_data = []
+    for _, row in sorted_df.iterrows():
+        attributes = row.filter(like="attributes.").to_dict()
+        geometry = {"x": row["geometry.x"], "y": row["geometry.y"]}
+        attributes = {key.replace("attributes.", ""): value for key, value in attributes.items()}
+        if "datum" in attributes and pd.notnull(attributes["datum"]):
+            attributes["datum"] = attributes["datum"].isoformat()
+        waze_matches = waze_df[waze_df["matching_police_id"] == attributes["id_nehody"]]
+        attributes["waze_matches_count"] = len(waze_matches)
+        attributes["matched_waze"] = waze_matches["uuid"].to_list()
+        result_data.append({"attributes": attributes, "geometry": geometry})
+    return result_data
+
+
+def main(limit: int = 5000) -> None:
+    accidents = accidents_frame(100_000)
+    waze = waze_frame(accidents.head(limit * 2))
+    sorted_df = accidents.sort_values(by="attributes.datum", ascending=False).head(limit)
+
+    t0 = time.perf_counter()
+    matches = waze[waze["matching_police_id"].notnull()].groupby("matching_police_id", sort=False)["uuid"].agg(list).to_dict()
+    index_ms = 1000 * (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    new = serialize_accidents(sorted_df, lambda police_id: matches.get(police_id, []))
+    new_ms = 1000 * (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    old = _iterrows_serialize(sorted_df, waze)
+    old_ms = 1000 * (time.perf_counter() - t0)
+
+    assert [r["attributes"]["matched_waze"] for r in old] == [r["attributes"]["matched_waze"] for r in new]
+    print(f"limit={limit} waze={len(waze)}: iterrows {old_ms:.0f} ms, match index {new_ms:.0f} ms "
+          f"(+{index_ms:.0f} ms one-off index build), {old_ms / new_ms:.0f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,74 @@
+"""
+Charts endpoints: groupby over the filtered frame vs. AccidentsCube.
+
+    cd accidents_api && python -m benchmarks.charts_cube [rows]
+"""
+import itertools
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import accidents_frame
+from bp_api.utils.cube import AccidentsCube
+from bp_api.utils.filter import get_filtered_df
+
+DATE_FILTERS = {
+    "all dates": {},
+    "1 year": {"startDate": "2020-01-01T00:00:00.000Z", "endDate": "2020-12-31T00:00:00.000Z"},
+    "1 month": {"startDate": "2020-06-01T00:00:00.000Z", "endDate": "2020-06-30T00:00:00.000Z"},
+}
+ATTRIBUTE_FILTERS = {
+    "no attrs": {},
+    "eq": {"alkohol:eq:1": "ano"},
+    "eq+neq": {"alkohol:eq:1": "ano", "lokalita:neq:2": "mimo obce"},
+    "in+gte": {"druh_nehody:in:1": "srazka_chodec,havarie", "usmrceno_osob:gte:2": "1"},
+}
+
+
+def _groupby_endpoints(df: pd.DataFrame, filters: dict) -> None:
+    filtered = get_filtered_df(df, filters)
+    filtered.groupby("attributes.druh_nehody").size().to_dict()
+    len(filtered), filtered["attributes.usmrceno_osob"].fillna(0).sum()
+    dated = filtered.dropna(subset=["attributes.datum"])
+    dated.groupby([dated["attributes.datum"].dt.month, dated["attributes.datum"].dt.year]).size()
+    timed = dated.dropna(subset=["attributes.cas"])
+    timed.groupby([pd.to_datetime(timed["attributes.cas"], format="%H:%M").dt.hour,
+                   timed["attributes.datum"].dt.dayofweek]).size()
+    dated.groupby(dated["attributes.datum"].dt.date).size()
+
+
+def _cube_endpoints(cube: AccidentsCube, filters: dict) -> None:
+    cube.by_attribute("druh_nehody", filters)
+    cube.period_summary(filters)
+    cube.by_month(filters)
+    cube.heatmap(filters)
+    cube.timeline(filters)
+
+
+def _ms(fn, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main(rows: int = 100_000) -> None:
+    df = accidents_frame(rows)
+
+    t0 = time.perf_counter()
+    cube = AccidentsCube(df)
+    print(f"rows={rows} cube build {1000 * (time.perf_counter() - t0):.0f} ms")
+    print(f"{'dates':10s} {'attributes':10s} {'groupby ms':>11s} {'cube ms':>9s} {'speedup':>8s}")
+
+    for (date_label, dates), (attr_label, attrs) in itertools.product(DATE_FILTERS.items(), ATTRIBUTE_FILTERS.items()):
+        filters = {**dates, **attrs}
+        baseline = _ms(_groupby_endpoints, df, filters)
+        cubed = _ms(_cube_endpoints, cube, filters)
+        print(f"{date_label:10s} {attr_label:10s} {baseline:11.1f} {cubed:9.1f} {baseline / cubed:7.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
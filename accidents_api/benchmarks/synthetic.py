@@ -0,0 +1,65 @@
+"""
+Synthetic accidents / Waze frames shaped like the ones built by DataLoader.
+
+The real datasets are downloaded at image build time, so benchmarks generate
+frames with the same columns and comparable cardinalities instead.
+"""
+import numpy as np
+import pandas as pd
+
+CATEGORICAL_ATTRIBUTES = {
+    "druh_nehody": ["srazka_jedouci_nekolejove", "srazka_zaparkovane", "srazka_pevna_prekazka",
+                    "srazka_chodec", "havarie", "jiny_druh_nehody"],
+    "alkohol": ["ano", "ne", "nezjistovano"],
+    "povetrnostni_podm": ["neztizene", "mlha", "dest", "snezeni", "naledi", "vitr"],
+    "lokalita": ["v obci", "mimo obce"],
+    "druh_vozidla": ["osobni", "nakladni", "motocykl", "autobus", "tramvaj", "kolo"],
+}
+
+
+def accidents_frame(n: int = 100_000, days: int = 3_000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+
+    hours = rng.integers(0, 24, n)
+    minutes = rng.integers(0, 60, n)
+    cas = pd.Series([f"{h:02d}:{m:02d}" for h, m in zip(hours, minutes)], dtype=object)
+    cas[rng.random(n) < 0.05] = None
+
+    df = pd.DataFrame({
+        "attributes.id_nehody": np.arange(n, dtype=np.int64) + 10_000_000,
+        "attributes.datum": pd.Timestamp("2016-01-01") + pd.to_timedelta(rng.integers(0, days, n), unit="D"),
+        "attributes.cas": cas,
+    })
+    for attribute, values in CATEGORICAL_ATTRIBUTES.items():
+        df[f"attributes.{attribute}"] = rng.choice(values + [None], n)
+    df["attributes.usmrceno_osob"] = rng.choice([0, 0, 0, 1, 2], n)
+    df["attributes.tezce_zraneno_osob"] = rng.choice([0, 0, 1, 2], n)
+    df["attributes.lehce_zraneno_osob"] = rng.choice([0, 1, 2, 3], n)
+    df["geometry.x"] = rng.uniform(16.5, 16.7, n)
+    df["geometry.y"] = rng.uniform(49.1, 49.3, n)
+    return df
+
+
+def waze_frame(accidents: pd.DataFrame, n: int = 50_000, matched_share: float = 0.3, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+
+    matched = rng.random(n) < matched_share
+    police_ids = accidents["attributes.id_nehody"].to_numpy()
+    matching = pd.Series([None] * n, dtype=object)
+    matching[matched] = rng.choice(police_ids, int(matched.sum()))
+
+    return pd.DataFrame({
+        "uuid": [f"uuid-{i}" for i in range(n)],
+        "type": "ACCIDENT",
+        "subtype": rng.choice(["ACCIDENT_MINOR", "ACCIDENT_MAJOR", None], n),
+        "street": rng.choice(["Hlinky", "Kotlářská", "Husova", None], n),
+        "reportRating": rng.integers(0, 6, n),
+        "confidence": rng.integers(0, 11, n),
+        "pubMillis": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 10**9, n), unit="s"),
+        "x": rng.uniform(16.5, 16.7, n),
+        "y": rng.uniform(49.1, 49.3, n),
+        "matching_police_id": matching,
+        "match_distance": np.where(matched, rng.uniform(0, 500, n), np.nan),
+        "match_time_diff": np.where(matched, rng.uniform(0, 120, n), np.nan),
+        "match_score": np.where(matched, rng.random(n), np.nan),
+    })
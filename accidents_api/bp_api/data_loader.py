@@ -1,5 +1,6 @@
 import json
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 import numpy as np
@@ -12,7 +13,9 @@ from pydantic import ValidationError
 from bp_api.models.models import Feature
 from bp_api.models.waze_model import WazeFileAttributes
 from bp_api.models.accidents_model import AccidentsAttributes
+from bp_api.utils.cube import AccidentsCube
 from bp_api.utils.logger import logger
+from bp_api.utils.serialization import RecordStore
 from bp_api.models.data_map import column_mapping
 
 class DataLoader:
@@ -36,6 +39,13 @@ class DataLoader:
         self._accident_dataframe: Optional[pd.DataFrame] = None
         self._waze_data: Optional[List[WazeFileAttributes]] = None
         self._waze_dataframe: Optional[pd.DataFrame] = None
+        self._accidents_cube: Optional[AccidentsCube] = None
+        self._waze_matches: Dict[Any, List[str]] = {}
+        self._waze_rows_by_police_id: Dict[Any, List[int]] = {}
+        self._accident_records: Optional[RecordStore] = None
+        self._waze_records: Optional[RecordStore] = None
+        self._match_settings: Optional[Tuple[float, float]] = None
+        self._merge_lock = threading.Lock()
 
     @staticmethod
     def _transform_accident(accident: Dict[str, Any]) -> Dict[str, Any]:
@@ -57,6 +67,39 @@ class DataLoader:
             if key in column_mapping
         }
 
+    def validate_accident(self, properties: Dict[str, Any], x: float, y: float) -> Optional[Feature[AccidentsAttributes]]:
+        """
+        Map raw police attributes (p1, p2a, ...) and validate them into an accident feature
+
+        Args:
+            properties (Dict[str, Any]): Raw accident attributes
+            x (float): Longitude (EPSG:4326)
+            y (float): Latitude (EPSG:4326)
+
+        Returns:
+            Optional[Feature[AccidentsAttributes]]: Validated feature or None if validation fails
+        """
+        accident_data = {
+            "attributes": self._transform_accident(properties),
+            "geometry": {
+                "x": x,
+                "y": y,
+            },
+        }
+
+        try:
+            return Feature[AccidentsAttributes](**accident_data)
+        except ValidationError as e:
+            logger.error(f"Validation Error: {e}")
+            return None
+
+    @staticmethod
+    def _accidents_to_dataframe(accidents: List[Feature[AccidentsAttributes]]) -> pd.DataFrame:
+        return pd.json_normalize([
+            {"attributes": accident.attributes.__dict__, "geometry": accident.geometry.__dict__}
+            for accident in accidents
+        ])
+
     def load_accidents_file(self, file_path: str = "bp_api/data/nehody.geojson") -> List[Feature[AccidentsAttributes]]:
         """
         Load and validate accident data from GeoJSON file
@@ -86,27 +129,17 @@ class DataLoader:
         # Validate and process features
         accidents = []
         for feature, geom in zip(data.get("features", []), gdf.geometry):
-            accident_data = {
-                "attributes": self._transform_accident(feature.get("properties", {})),
-                "geometry": {
-                    "x": geom.x,
-                    "y": geom.y,
-                },
-            }
-
-            try:
-                validated_data = Feature[AccidentsAttributes](**accident_data)
+            validated_data = self.validate_accident(feature.get("properties", {}), geom.x, geom.y)
+            if validated_data is not None:
                 accidents.append(validated_data)
-            except ValidationError as e:
+            else:
                 print(feature)
-                logger.error(f"Validation Error: {e}")
 
         # Store data
         self._accident_data = accidents
-        self._accident_dataframe = pd.json_normalize([
-            {"attributes": accident.attributes.__dict__, "geometry": accident.geometry.__dict__} 
-            for accident in accidents
-        ])
+        self._accident_dataframe = self._accidents_to_dataframe(accidents)
+
+        self._accident_records = RecordStore(self._accident_dataframe, key_column="attributes.id_nehody")
 
         logger.info(f"Accidents data loaded - got {len(accidents)} accidents")
         return accidents
@@ -156,10 +189,30 @@ class DataLoader:
         logger.info(f"Waze data loaded - got {len(accidents)} accident reports")
         return accidents
 
-    def create_matched_tables(self, max_distance_meters=500, max_time_diff_minutes=(2*60)):
-        police_df = self._accident_dataframe.copy()
-        waze_df = self._waze_dataframe.copy()
-        
+    def build_accidents_cube(self) -> AccidentsCube:
+        """
+        Pre-aggregate loaded accidents into the cube used by the charts endpoints
+
+        Returns:
+            AccidentsCube: Aggregation cube over the accidents DataFrame
+        """
+        if self._accident_dataframe is None:
+            raise RuntimeError("Accidents must be loaded before building the cube")
+
+        self._accidents_cube = AccidentsCube(self._accident_dataframe)
+        return self._accidents_cube
+
+    @staticmethod
+    def _prepare_police_df(police_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Combine police date and time into `datetime_with_time`, keeping only records eligible for matching
+
+        Args:
+            police_df (pd.DataFrame): Accidents DataFrame (copy)
+
+        Returns:
+            pd.DataFrame: Police records with `datetime` and `datetime_with_time` columns
+        """
         # Convert police date to datetime format first (date only)
         police_df['datetime'] = pd.to_datetime(police_df['attributes.datum'])
         police_df = police_df[police_df['datetime'].dt.year >= 2025]
@@ -182,7 +235,15 @@ class DataLoader:
                 return date_part.replace(hour=0, minute=0, second=0)
         
         # Apply the time parsing function
-        police_df['datetime_with_time'] = police_df.apply(parse_time_and_combine, axis=1)
+        if police_df.empty:
+            police_df['datetime_with_time'] = pd.Series(dtype="datetime64[ns]")
+        else:
+            police_df['datetime_with_time'] = police_df.apply(parse_time_and_combine, axis=1)
+        return police_df
+
+    def create_matched_tables(self, max_distance_meters=500, max_time_diff_minutes=(2*60)):
+        police_df = self._prepare_police_df(self._accident_dataframe.copy())
+        waze_df = self._waze_dataframe.copy()
         
         # Convert Waze pubMillis to datetime
         waze_df['datetime'] = pd.to_datetime(waze_df['pubMillis'], unit='ms')
@@ -194,6 +255,40 @@ class DataLoader:
         waze_df['match_time_diff'] = None
         waze_df['match_score'] = None
         
+        match_count = len(self._match_police_records(police_df, waze_df, max_distance_meters, max_time_diff_minutes))
+        
+        # Filter to only matched waze reports if needed
+        matched_waze_df = waze_df[waze_df['matching_police_id'].notnull()]
+        
+        logger.info(f"Found {match_count} matches between police reports and Waze alerts")
+        logger.info(f"{len(matched_waze_df)} Waze reports matched to police data")
+        
+        self._match_settings = (max_distance_meters, max_time_diff_minutes)
+        self._waze_dataframe = waze_df
+        self._build_match_index(waze_df)
+
+        return police_df, waze_df
+
+    @staticmethod
+    def _match_police_records(police_df: pd.DataFrame, waze_df: pd.DataFrame,
+                              max_distance_meters: float, max_time_diff_minutes: float) -> List[int]:
+        """
+        Match police records to Waze reports, updating the match columns of `waze_df` in place
+        where a better scoring police record is found
+
+        Args:
+            police_df (pd.DataFrame): Police records prepared by _prepare_police_df
+            waze_df (pd.DataFrame): Waze reports with `datetime` and match columns
+            max_distance_meters (float): Maximum distance of a match
+            max_time_diff_minutes (float): Maximum time difference of a match
+
+        Returns:
+            List[int]: Positions of Waze reports whose match changed
+        """
+        changed: set = set()
+        if police_df.empty or waze_df.empty:
+            return []
+
         # Create spatial index for efficient querying
         from scipy.spatial import KDTree
         
@@ -201,8 +296,6 @@ class DataLoader:
         waze_coords = waze_df[['y', 'x']].values
         waze_tree = KDTree(waze_coords)
         
-        match_count = 0
-        
         for police_idx, police_row in police_df.iterrows():
             police_id = police_row['attributes.id_nehody']
             police_coords = np.array([[police_row['geometry.y'], police_row['geometry.x']]])
@@ -242,19 +335,83 @@ class DataLoader:
                             waze_df.at[waze_row_idx, 'match_distance'] = distance
                             waze_df.at[waze_row_idx, 'match_time_diff'] = time_diff
                             waze_df.at[waze_row_idx, 'match_score'] = match_score
-                            
-                            if current_score is None:
-                                match_count += 1
+                            changed.add(int(waze_idx))
         
-        # Filter to only matched waze reports if needed
-        matched_waze_df = waze_df[waze_df['matching_police_id'].notnull()]
-        
-        logger.info(f"Found {match_count} matches between police reports and Waze alerts")
-        logger.info(f"{len(matched_waze_df)} Waze reports matched to police data")
-        
-        self._waze_dataframe = waze_df
+        return sorted(changed)
 
-        return police_df, waze_df
+    def merge_accidents(self, accidents: List[Feature[AccidentsAttributes]]) -> int:
+        """
+        Append newly synced accidents in place - extends the DataFrame, record store and cube,
+        and matches only the new records against Waze reports
+
+        Args:
+            accidents (List[Feature[AccidentsAttributes]]): Validated accidents, already known IDs are skipped
+
+        Returns:
+            int: Number of accidents added
+        """
+        if self._accident_dataframe is None:
+            raise RuntimeError("Accidents must be loaded before merging new records")
+
+        with self._merge_lock:
+            known = set(self._accident_dataframe['attributes.id_nehody'].tolist())
+            new_accidents = []
+            for accident in accidents:
+                if accident.attributes.id_nehody not in known:
+                    known.add(accident.attributes.id_nehody)
+                    new_accidents.append(accident)
+
+            if not new_accidents:
+                return 0
+
+            new_df = self._accidents_to_dataframe(new_accidents)
+            accident_df = pd.concat([self._accident_dataframe, new_df], ignore_index=True)
+
+            self._accident_data = (self._accident_data or []) + new_accidents
+            self._accident_dataframe = accident_df
+            self._accident_records.extend(accident_df)
+            if self._accidents_cube is not None:
+                self._accidents_cube = AccidentsCube(accident_df)
+
+            if self._match_settings is not None and self._waze_dataframe is not None:
+                waze_df = self._waze_dataframe.copy()
+                police_df = self._prepare_police_df(new_df.copy())
+                changed = self._match_police_records(police_df, waze_df, *self._match_settings)
+                if changed:
+                    self._waze_dataframe = waze_df
+                    self._build_match_index(waze_df, changed)
+                logger.info(f"Matched {len(changed)} Waze reports to newly synced accidents")
+
+        logger.info(f"Merged {len(new_accidents)} new accidents - {len(accident_df)} accidents in total")
+        return len(new_accidents)
+
+    def _build_match_index(self, waze_df: pd.DataFrame, changed: Optional[List[int]] = None):
+        """
+        Index Waze reports by UUID and by matched police accident ID, and encode them for responses
+
+        Args:
+            waze_df (pd.DataFrame): Waze reports with match columns
+            changed (Optional[List[int]]): Positions whose match changed - only these are re-encoded
+        """
+        matching = waze_df["matching_police_id"].to_numpy()
+        uuids = waze_df["uuid"].to_numpy()
+
+        rows_by_police_id: Dict[Any, List[int]] = {}
+        for position in np.flatnonzero(waze_df["matching_police_id"].notnull().to_numpy()):
+            rows_by_police_id.setdefault(matching[position], []).append(int(position))
+
+        self._waze_rows_by_police_id = rows_by_police_id
+        self._waze_matches = {
+            police_id: uuids[rows].tolist() for police_id, rows in rows_by_police_id.items()
+        }
+
+        if changed is None or self._waze_records is None:
+            self._waze_records = RecordStore(waze_df, key_column="uuid")
+            self._waze_records.warm()
+        else:
+            self._waze_records.refresh(waze_df, changed)
+
+        logger.info(f"Match index built - {len(self._waze_matches)} police reports with Waze matches")
     
     def get_accidents_data(self) -> Optional[List[Feature[AccidentsAttributes]]]:
         """
@@ -274,6 +431,57 @@ class DataLoader:
         """
         return self._accident_dataframe
 
+    def get_accidents_cube(self) -> Optional[AccidentsCube]:
+        """
+        Get accidents aggregation cube
+
+        Returns:
+            Optional[AccidentsCube]: Cube built by build_accidents_cube
+        """
+        return self._accidents_cube
+
+    def get_waze_matches(self, police_id: Any) -> List[str]:
+        """
+        Get UUIDs of Waze reports matched to a police accident
+
+        Args:
+            police_id (Any): Police accident ID (attributes.id_nehody)
+
+        Returns:
+            List[str]: Matched Waze report UUIDs, empty if there are none
+        """
+        return self._waze_matches.get(police_id, [])
+
+    def get_waze_rows_by_police_id(self, police_id: Any) -> List[int]:
+        """
+        Get positions of Waze reports matched to a police accident
+
+        Args:
+            police_id (Any): Police accident ID (attributes.id_nehody)
+
+        Returns:
+            List[int]: Row positions in the Waze DataFrame / record store
+        """
+        return self._waze_rows_by_police_id.get(police_id, [])
+
+    def get_accident_records(self) -> Optional[RecordStore]:
+        """
+        Get JSON-encoded accidents, keyed by attributes.id_nehody
+
+        Returns:
+            Optional[RecordStore]: Accidents record store
+        """
+        return self._accident_records
+
+    def get_waze_records(self) -> Optional[RecordStore]:
+        """
+        Get JSON-encoded Waze reports, keyed by uuid
+
+        Returns:
+            Optional[RecordStore]: Waze record store
+        """
+        return self._waze_records
+
     def get_waze_data(self) -> Optional[List[WazeFileAttributes]]:
         """
         Get loaded Waze data
@@ -1,17 +1,31 @@
+import asyncio
+import contextlib
+
 from bp_api.data_loader import DataLoader
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from bp_api.routers import accidents, charts, waze
+from bp_api.utils.accidents_sync import AccidentsSync
+from bp_api.utils.serialization import ORJSONResponse
 
 data_loader = DataLoader()
 
 async def lifespan(app: FastAPI):
     data_loader.load_waze()
     data_loader.load_accidents_file()
+    data_loader.build_accidents_cube()
     data_loader.create_matched_tables()
+
+    # Incremental police data sync, enabled by ACCIDENTS_SYNC_URL
+    sync = AccidentsSync.from_env(data_loader)
+    sync_task = asyncio.create_task(sync.run_forever()) if sync is not None else None
     yield
+    if sync_task is not None:
+        sync_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await sync_task
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 origins = [
     "http://localhost:5173",
@@ -1,6 +1,9 @@
 from pydantic import BaseModel, field_validator
 from typing import Optional
 from datetime import datetime
+from zoneinfo import ZoneInfo
+
+PRAGUE_TZ = ZoneInfo("Europe/Prague")
 
 
 class AccidentsAttributes(BaseModel):
@@ -62,6 +65,12 @@ class AccidentsAttributes(BaseModel):
 
     @field_validator("datum", mode="before")
     def validate_date(cls, value):
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, (int, float)):
+            # ArcGIS REST returns date fields as epoch milliseconds
+            date = datetime.fromtimestamp(value / 1000, tz=PRAGUE_TZ)
+            return datetime(date.year, date.month, date.day)
         return datetime.strptime(value, "%d/%m/%Y")
 
     @field_validator("cas", mode="before")
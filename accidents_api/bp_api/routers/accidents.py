@@ -1,3 +1,5 @@
+from typing import Any, Callable, Dict, List
+
 from fastapi import APIRouter, Request
 from bp_api.data_loader import DataLoader
 import pandas as pd
@@ -7,6 +9,40 @@ from bp_api.utils.filter import get_filtered_df
 router = APIRouter()
 data_loader = DataLoader()
 
+
+def serialize_accidents(df: pd.DataFrame, get_matches: Callable[[Any], List[str]]) -> List[Dict[str, Any]]:
+    """
+    Build the accidents list response column-wise instead of row by row.
+
+    :param df: Accidents to serialize (already filtered, sorted and limited)
+    :param get_matches: Police ID -> matched Waze UUIDs lookup
+    :return: [{"attributes": {...}, "geometry": {"x": ..., "y": ...}}, ...]
+    """
+    attribute_columns = [col for col in df.columns if col.startswith("attributes.")]
+    attributes_df = df[attribute_columns].rename(columns=lambda col: col.replace("attributes.", "", 1))
+
+    if "datum" in attributes_df.columns:
+        datum = attributes_df["datum"]
+        attributes_df["datum"] = datum.dt.strftime("%Y-%m-%dT%H:%M:%S").astype(object).where(datum.notnull(), datum)
+
+    attributes = attributes_df.to_dict(orient="records")
+    xs = df["geometry.x"].tolist()
+    ys = df["geometry.y"].tolist()
+
+    result_data = []
+    for record, x, y in zip(attributes, xs, ys):
+        matched_waze = get_matches(record["id_nehody"])
+        record["waze_matches_count"] = len(matched_waze)
+        record["matched_waze"] = list(matched_waze)
+
+        result_data.append({
+            "attributes": record,
+            "geometry": {"x": x, "y": y},
+        })
+
+    return result_data
+
+
 @router.get("/")
 def get_police_accidents(request: Request):
     params = dict(request.query_params)
@@ -20,28 +56,5 @@ def get_police_accidents(request: Request):
             pass
 
     sorted_df = accidents_df.sort_values(by="attributes.datum", ascending=False).head(limit)
-    waze_df = data_loader.get_waze_dataframe()
-
-    result_data = []
-    
-    for _, row in sorted_df.iterrows():
-        attributes = row.filter(like="attributes.").to_dict()
-        geometry = {"x": row["geometry.x"], "y": row["geometry.y"]}
-
-        attributes = {key.replace("attributes.", ""): value for key, value in attributes.items()}
-
-        if "datum" in attributes and pd.notnull(attributes["datum"]):
-            attributes["datum"] = attributes["datum"].isoformat()
 
-        waze_matches = waze_df[waze_df['matching_police_id'] == attributes['id_nehody']]
-        waze_matches_count = len(waze_matches)
-        attributes["waze_matches_count"] = waze_matches_count
-
-        attributes["matched_waze"] = waze_matches['uuid'].to_list()
-
-        result_data.append({
-            "attributes": attributes,
-            "geometry": geometry,
-        })
-
-    return result_data
+    return serialize_accidents(sorted_df, data_loader.get_waze_matches)
@@ -1,7 +1,6 @@
 from fastapi import APIRouter, HTTPException, Query, Request
 import pandas as pd
 from bp_api.data_loader import DataLoader
-from bp_api.utils.filter import get_filtered_df
 from bp_api.utils.logger import logger
 
 router = APIRouter()
@@ -18,15 +17,13 @@ def get_accidents_chart_by_attribute(
     request: Request,
     attribute: str = Query(..., description="The attribute to group accidents by"),
 ):
-    accidents_df = get_filtered_df(data_loader.get_accidents_dataframe(), dict(request.query_params))
-
-    if f"attributes.{attribute}" not in accidents_df.columns:
+    if f"attributes.{attribute}" not in data_loader.get_accidents_dataframe().columns:
         raise HTTPException(
             status_code=400,
             detail=f"Attribute '{attribute}' does not exist in accident data.",
         )
 
-    grouped_data = accidents_df.groupby(f"attributes.{attribute}").size().to_dict()
+    grouped_data = data_loader.get_accidents_cube().by_attribute(attribute, dict(request.query_params))
 
     return grouped_data
 
@@ -35,14 +32,8 @@ def get_accidents_chart_by_attribute(
     request: Request,
 ):
     print(request.query_params)
-    accidents_df = get_filtered_df(data_loader.get_accidents_dataframe(), dict(request.query_params))
-
-    result_data = {
-        "accident_count": len(accidents_df),  # Count number of accidents
-        "fatalities_count": int(accidents_df["attributes.usmrceno_osob"].fillna(0).sum()),  # Sum fatalities
-        "seriously_injured": int(accidents_df["attributes.tezce_zraneno_osob"].fillna(0).sum()),  # Sum serious injuries
-        "light_injured": int(accidents_df["attributes.lehce_zraneno_osob"].fillna(0).sum()),  # Sum light injuries
-    }
+    # accident count + fatalities, serious and light injuries summed from cube cells
+    result_data = data_loader.get_accidents_cube().period_summary(dict(request.query_params))
 
     return result_data
 
@@ -76,37 +67,15 @@ def get_events_by_day():
 
 @router.get("/accidents-by-month")
 def accidents_by_month(request: Request):
-    accidents_df = get_filtered_df(data_loader.get_accidents_dataframe(), dict(request.query_params))
-
-    gdf = accidents_df.dropna(subset=["attributes.datum"])
-
-    gdf["month"] = gdf["attributes.datum"].dt.month
-    gdf["year"] = gdf["attributes.datum"].dt.year
-
-    accidents_per_month_year = gdf.groupby(["month", "year"]).size().reset_index(name="count")
-
-    result = {}
-    for month in range(1, 13):
-        month_data = accidents_per_month_year[accidents_per_month_year["month"] == month]
-        if not month_data.empty:
-            result[month] = {int(year): int(count) for year, count in zip(month_data["year"], month_data["count"])}
-        else:
-            result[month] = {}
+    # {month: {year: count}} for months 1-12
+    result = data_loader.get_accidents_cube().by_month(dict(request.query_params))
 
     return result
 
 @router.get("/heatmap-table")
 def heatmap_table(request: Request):
-    accidents_df = get_filtered_df(data_loader.get_accidents_dataframe(), dict(request.query_params))
-
-    df = accidents_df.dropna(subset=["attributes.datum", "attributes.cas"])
-
-    df["hour"] = pd.to_datetime(df["attributes.cas"], format="%H:%M").dt.hour
-    df["day_of_week"] = df["attributes.datum"].dt.dayofweek
-
-    heatmap_data = df.pivot_table(index="hour", columns="day_of_week", aggfunc="size", fill_value=0)
-
-    heatmap_json = heatmap_data.to_dict(orient="index")
+    # {hour: {day_of_week: count}}
+    heatmap_json = data_loader.get_accidents_cube().heatmap(dict(request.query_params))
 
     return heatmap_json
 
@@ -136,12 +105,6 @@ def get_filter_schema():
 
 @router.get("/timeline-chart")
 def timeline_chart(request: Request):
-    accidents_df = get_filtered_df(data_loader.get_accidents_dataframe(), dict(request.query_params))
-
-    df = accidents_df.dropna(subset=["attributes.datum"])
-
-    daily_counts = df.groupby(df["attributes.datum"].dt.date).size()
-
-    timeline_data = [{"date": str(date), "incidents": int(count)} for date, count in daily_counts.items()]
+    timeline_data = data_loader.get_accidents_cube().timeline(dict(request.query_params))
 
     return timeline_data
\ No newline at end of file
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from bp_api.models.models import ArcGISResponse
+from bp_api.utils.api_client import APIClient
+from bp_api.utils.logger import logger
+
+# Sync is enabled only when the ArcGIS query URL of the police accidents layer is set
+SYNC_URL_ENV = "ACCIDENTS_SYNC_URL"
+SYNC_INTERVAL_ENV = "ACCIDENTS_SYNC_INTERVAL"
+SYNC_WHERE_ENV = "ACCIDENTS_SYNC_WHERE"
+SYNC_DIR_ENV = "ACCIDENTS_SYNC_DIR"
+
+DEFAULT_INTERVAL_SECONDS = 3600
+DEFAULT_SYNC_DIR = "bp_api/data"
+
+STATE_FILE = "accidents_sync_state.json"
+FEATURES_FILE = "accidents_sync.jsonl"
+
+# (p2a date, p1 id) of the newest synced record
+Watermark = Tuple[date, int]
+
+
+class AccidentsSync:
+    """
+    Incremental sync of police accidents from the ArcGIS layer into the DataLoader.
+
+    Only records newer than the (p2a, p1) watermark are requested. Synced raw features are
+    appended to a JSONL file and replayed on startup, since the loader itself starts from the
+    static geojson; the watermark is persisted next to them.
+    """
+
+    def __init__(
+        self,
+        data_loader,
+        url: str,
+        interval_seconds: float = DEFAULT_INTERVAL_SECONDS,
+        where: Optional[str] = None,
+        sync_dir: str = DEFAULT_SYNC_DIR,
+    ):
+        self.data_loader = data_loader
+        self.client = APIClient(url, ArcGISResponse[Dict[str, Any]])
+        self.interval_seconds = interval_seconds
+        self.where = where
+        self.state_path = Path(sync_dir) / STATE_FILE
+        self.features_path = Path(sync_dir) / FEATURES_FILE
+        self.watermark: Optional[Watermark] = None
+
+    @classmethod
+    def from_env(cls, data_loader) -> Optional["AccidentsSync"]:
+        url = os.getenv(SYNC_URL_ENV)
+        if not url:
+            return None
+        return cls(
+            data_loader,
+            url,
+            interval_seconds=float(os.getenv(SYNC_INTERVAL_ENV, DEFAULT_INTERVAL_SECONDS)),
+            where=os.getenv(SYNC_WHERE_ENV) or None,
+            sync_dir=os.getenv(SYNC_DIR_ENV, DEFAULT_SYNC_DIR),
+        )
+
+    # ------------------------------------------------------------------
+    # Watermark
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _data_watermark(df: Optional[pd.DataFrame]) -> Optional[Watermark]:
+        """Newest (date, id) in the loaded accidents."""
+        if df is None or df.empty:
+            return None
+        dated = df[["attributes.datum", "attributes.id_nehody"]].dropna()
+        if dated.empty:
+            return None
+        last_day = dated["attributes.datum"].max()
+        last_id = dated.loc[dated["attributes.datum"] == last_day, "attributes.id_nehody"].max()
+        return pd.Timestamp(last_day).date(), int(last_id)
+
+    @staticmethod
+    def _feature_watermark(feature: Dict[str, Any]) -> Optional[Watermark]:
+        attributes = feature.get("attributes", {})
+        try:
+            day = attributes.get("p2a")
+            if isinstance(day, (int, float)):
+                day = pd.Timestamp(day, unit="ms", tz="Europe/Prague").date()
+            else:
+                day = datetime.strptime(day, "%d/%m/%Y").date()
+            return day, int(attributes["p1"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _load_state(self) -> Optional[Watermark]:
+        if not self.state_path.exists():
+            return None
+        with open(self.state_path, "r", encoding="utf-8") as file:
+            state = json.load(file)
+        return date.fromisoformat(state["p2a"]), int(state["p1"])
+
+    def _save_state(self):
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"p2a": self.watermark[0].isoformat(), "p1": self.watermark[1]}, file)
+        os.replace(tmp_path, self.state_path)
+
+    def _advance(self, watermark: Optional[Watermark]):
+        if watermark is not None and (self.watermark is None or watermark > self.watermark):
+            self.watermark = watermark
+
+    def _where(self) -> str:
+        clauses = [self.where] if self.where else []
+        if self.watermark is not None:
+            day, last_id = self.watermark
+            day = day.isoformat()
+            clauses.append(f"(p2a > DATE '{day}' OR (p2a = DATE '{day}' AND p1 > {last_id}))")
+        return " AND ".join(f"({clause})" for clause in clauses) or "1=1"
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def _merge(self, features: List[Dict[str, Any]]) -> int:
+        accidents = []
+        for feature in features:
+            geometry = feature.get("geometry") or {}
+            if "x" not in geometry or "y" not in geometry:
+                continue
+            accident = self.data_loader.validate_accident(feature.get("attributes", {}), geometry["x"], geometry["y"])
+            if accident is not None:
+                accidents.append(accident)
+        return self.data_loader.merge_accidents(accidents)
+
+    def restore(self) -> int:
+        """
+        Replay previously synced features into the loader and restore the watermark.
+
+        Returns:
+            int: Number of accidents added
+        """
+        features = []
+        if self.features_path.exists():
+            with open(self.features_path, "r", encoding="utf-8") as file:
+                features = [json.loads(line) for line in file if line.strip()]
+
+        added = self._merge(features) if features else 0
+
+        self._advance(self._data_watermark(self.data_loader.get_accidents_dataframe()))
+        self._advance(self._load_state())
+        logger.info(f"Accidents sync restored - {added} synced accidents replayed, watermark {self.watermark}")
+        return added
+
+    async def sync_once(self) -> int:
+        """
+        Fetch records newer than the watermark, merge them and persist the new watermark.
+
+        Returns:
+            int: Number of accidents added
+        """
+        params = {"where": self._where(), "orderByFields": "p2a,p1"}
+
+        features: List[Dict[str, Any]] = []
+        async for page in self.client.iter_features(params):
+            features.extend(feature.model_dump() for feature in page)
+
+        if not features:
+            return 0
+
+        added = await asyncio.to_thread(self._merge, features)
+
+        self.features_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.features_path, "a", encoding="utf-8") as file:
+            for feature in features:
+                file.write(json.dumps(feature, ensure_ascii=False) + "\n")
+
+        for feature in features:
+            self._advance(self._feature_watermark(feature))
+        # no watermark yet when none of the records has a parsable (p2a, p1)
+        if self.watermark is not None:
+            self._save_state()
+
+        logger.info(f"Accidents sync - fetched {len(features)} records, {added} new, watermark {self.watermark}")
+        return added
+
+    async def run_forever(self):
+        """Sync on a fixed interval until cancelled, errors are logged and retried next round."""
+        await asyncio.to_thread(self.restore)
+        while True:
+            try:
+                await self.sync_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Accidents sync failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
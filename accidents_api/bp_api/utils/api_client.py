@@ -1,30 +1,47 @@
-from typing import Type, TypeVar, Generic, Dict, Any, Optional, Union
+import asyncio
+from collections import deque
+from typing import Type, TypeVar, Generic, Dict, Any, Optional, Union, AsyncIterator, List
 from pydantic import BaseModel, ValidationError
-import requests
+import httpx
+
+from bp_api.utils.logger import logger
 
 # Define a type variable T to represent the schema type
 T = TypeVar("T", bound=BaseModel)
 
+# Status codes worth retrying (rate limiting / transient server errors)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
 
 class APIClient(Generic[T]):
-    def __init__(self, url: str, schema: Type[T]):
+    def __init__(
+        self,
+        url: str,
+        schema: Type[T],
+        max_concurrency: int = 4,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 30.0,
+    ):
         """
         Initializes the APIClient with the API URL and the expected schema for validation.
 
         :param url: API endpoint URL
         :param schema: Pydantic model class to validate the response
+        :param max_concurrency: Maximum number of pages fetched at once
+        :param retries: Number of retries of a failed page request
+        :param backoff: Base delay in seconds between retries (doubled after each attempt)
+        :param timeout: Timeout of a single request in seconds
         """
         self.url = url
         self.schema = schema
+        self.max_concurrency = max(1, max_concurrency)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
 
-    def get_data(self, params: Optional[Dict[str, Any]] = None) -> Union[T, None]:
-        """
-        Fetches data from the API, validates the response using the Pydantic model.
-
-        :param params: Optional query parameters for the API request.
-        :return: An instance of the schema or None if an error occurs.
-        """
-
+    @staticmethod
+    def _merge_params(params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         default_params = {
             "where": "1=1",
             "outFields": "*",
@@ -35,39 +52,189 @@ class APIClient(Generic[T]):
             # "resultOffset": 0,
         }
 
-        offset = params.get("resultOffset", 0)
-
         # merge default params with the provided config
-        params = {**default_params, **(params or {})}
+        return {**default_params, **(params or {})}
 
-        response_data = []
+    async def _fetch_json(self, client: httpx.AsyncClient, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fetches one page, retrying transient failures with exponential backoff.
 
-        try:
-            while True:
-                params["resultOffset"] = offset
-                response = requests.get(self.url, params=params)
+        :param client: Shared HTTP client (connection pool)
+        :param params: Query parameters of the page
+        :return: Decoded JSON body
+        """
+        attempt = 0
+        while True:
+            try:
+                response = await client.get(self.url, params=params)
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.retries:
+                    raise httpx.HTTPStatusError(
+                        f"Retryable status {response.status_code}", request=response.request, response=response
+                    )
                 response.raise_for_status()
+                return response.json()
+            except (httpx.TransportError, httpx.HTTPStatusError) as error:
+                retryable = isinstance(error, httpx.TransportError) or \
+                    error.response.status_code in RETRY_STATUS_CODES
+                if not retryable or attempt >= self.retries:
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                attempt += 1
+                logger.warning(f"Request failed ({error}), retry {attempt}/{self.retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _fetch_page(self, client: httpx.AsyncClient, params: Dict[str, Any], offset: int) -> T:
+        data = await self._fetch_json(client, {**params, "resultOffset": offset})
+        # Validate response against the provided schema
+        return self.schema.model_validate(data)
+
+    async def _fetch_count(self, client: httpx.AsyncClient, params: Dict[str, Any]) -> Optional[int]:
+        """
+        Asks the endpoint for the total number of matching records (ArcGIS `returnCountOnly`).
 
-                data = response.json()
+        :return: Record count or None if the endpoint does not support it
+        """
+        count_params = {
+            key: value for key, value in params.items()
+            if key not in ("resultOffset", "resultRecordCount", "outFields", "returnGeometry", "outSR")
+        }
+        count_params["returnCountOnly"] = "true"
+        try:
+            count = (await self._fetch_json(client, count_params)).get("count")
+        except (httpx.HTTPError, ValueError) as error:
+            logger.warning(f"Record count not available ({error}), paging sequentially")
+            return None
+        return count if isinstance(count, int) else None
+
+    async def _complete_page(
+        self, client: httpx.AsyncClient, params: Dict[str, Any], page: T, offset: int, expected: int
+    ) -> T:
+        """
+        Re-fetches the rest of a page the server returned short (e.g. a lower `maxRecordCount`
+        than the first page suggested), so no range between two offsets is skipped.
 
-                # Validate response against the provided schema
-                validated_data = self.schema(**data)
-                response_data.append(validated_data)
-                if not validated_data.exceededTransferLimit:
-                    break
-                offset += len(validated_data.features)
+        :param page: Page fetched at `offset`
+        :param expected: Number of records the page should cover
+        """
+        while len(page.features) < expected:
+            rest = await self._fetch_page(client, params, offset + len(page.features))
+            if not rest.features:
+                break
+            page.features.extend(rest.features[:expected - len(page.features)])
+            page.exceededTransferLimit = rest.exceededTransferLimit
+        return page
+
+    async def _iter_sequential(self, client: httpx.AsyncClient, params: Dict[str, Any], offset: int) -> AsyncIterator[T]:
+        """Follows `exceededTransferLimit` page by page, stepping by the records actually returned."""
+        while True:
+            page = await self._fetch_page(client, params, offset)
+            yield page
+            if not page.exceededTransferLimit or not page.features:
+                return
+            offset += len(page.features)
+
+    async def iter_pages(self, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[T]:
+        """
+        Yields validated pages in offset order.
 
-            resp_struct = response_data[0]
-            for resp in response_data[1:]:
-                resp_struct.features = resp_struct.features + resp.features
+        The first page tells the page size: the records the server actually returned, which
+        can be fewer than `resultRecordCount` (server `maxRecordCount`). Once the total count
+        is known the remaining pages are fetched concurrently (at most `max_concurrency` in
+        flight); a page that comes back short is completed before it is yielded. Without a
+        count the client follows `exceededTransferLimit` page by page.
 
+        :param params: Optional query parameters for the API request.
+        """
+        params = self._merge_params(params)
+        start = int(params.pop("resultOffset", 0))
+
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            page = await self._fetch_page(client, params, start)
+            yield page
+            if not page.exceededTransferLimit or not page.features:
+                return
+
+            page_size = len(page.features)
+            offset = start + page_size
+
+            count = await self._fetch_count(client, params)
+            if count is None:
+                async for page in self._iter_sequential(client, params, offset):
+                    yield page
+                return
+
+            offsets = iter(range(offset, count, page_size))
+            in_flight: deque = deque()
+            try:
+                for next_offset in offsets:
+                    in_flight.append((next_offset, asyncio.create_task(self._fetch_page(client, params, next_offset))))
+                    if len(in_flight) >= self.max_concurrency:
+                        break
+                while in_flight:
+                    page_offset, task = in_flight.popleft()
+                    page = await task
+                    next_offset = next(offsets, None)
+                    if next_offset is not None:
+                        in_flight.append((next_offset, asyncio.create_task(self._fetch_page(client, params, next_offset))))
+                    page = await self._complete_page(client, params, page, page_offset,
+                                                     min(page_size, count - page_offset))
+                    offset = page_offset + len(page.features)
+                    yield page
+            finally:
+                for _, task in in_flight:
+                    task.cancel()
+
+            # records added after the count was taken
+            if page.exceededTransferLimit and page.features:
+                async for page in self._iter_sequential(client, params, offset):
+                    yield page
+
+    async def iter_features(self, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[List[Any]]:
+        """
+        Yields validated features page by page.
+
+        :param params: Optional query parameters for the API request.
+        """
+        async for page in self.iter_pages(params):
+            yield page.features
+
+    async def fetch_data(self, params: Optional[Dict[str, Any]] = None) -> Union[T, None]:
+        """
+        Fetches all pages and merges them into a single response.
+
+        :param params: Optional query parameters for the API request.
+        :return: An instance of the schema or None if an error occurs.
+        """
+        resp_struct = None
+        features: List[Any] = []
+
+        try:
+            async for page in self.iter_pages(params):
+                if resp_struct is None:
+                    resp_struct = page
+                features.extend(page.features)
+
+            resp_struct.features = features
+            resp_struct.exceededTransferLimit = False
             return resp_struct
 
-        except requests.exceptions.RequestException as req_error:
-            print(f"Request failed: {req_error}")
+        except httpx.HTTPError as req_error:
+            logger.error(f"Request failed: {req_error}")
         except ValidationError as val_error:
-            print(f"Validation error: {val_error}")
+            logger.error(f"Validation error: {val_error}")
         except Exception as e:
-            print(f"An unexpected error occurred: {e}")
+            logger.error(f"An unexpected error occurred: {e}")
 
         return None
+
+    def get_data(self, params: Optional[Dict[str, Any]] = None) -> Union[T, None]:
+        """
+        Fetches data from the API, validates the response using the Pydantic model.
+
+        Blocking wrapper around `fetch_data`, use `fetch_data` / `iter_features` inside an event loop.
+
+        :param params: Optional query parameters for the API request.
+        :return: An instance of the schema or None if an error occurs.
+        """
+        return asyncio.run(self.fetch_data(params))
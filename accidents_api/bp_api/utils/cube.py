@@ -0,0 +1,270 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import threading
+
+import numpy as np
+import pandas as pd
+import logging
+
+from bp_api.utils.filter import DATE_COLUMN, FilterEngine, FilterSpec, get_filter_engine
+
+logger = logging.getLogger(__name__)
+
+TIME_COLUMN = "attributes.cas"
+MEASURE_COLUMNS = (
+    "attributes.usmrceno_osob",
+    "attributes.tezce_zraneno_osob",
+    "attributes.lehce_zraneno_osob",
+)
+
+# Hour slots 0-23, slot 24 holds accidents without a (valid) time
+HOUR_SLOTS = 25
+NO_HOUR = 24
+
+# Attributes with more distinct values than this are grouped from rows instead of a dense cube
+MAX_ATTRIBUTE_CARDINALITY = 1024
+
+# Aggregated cells kept for attribute-filtered specs (charts page fires several endpoints per filter)
+MAX_CACHED_SLICES = 64
+
+
+@dataclass
+class CubeSlice:
+    """
+    Aggregated cells selected by one filter spec.
+
+    `counts` / `sums` hold one row per day starting at day index `lo`,
+    `undated_*` hold accidents without a date (only present when no date range is applied).
+    """
+    lo: int
+    counts: np.ndarray          # (days, HOUR_SLOTS) accident counts
+    sums: np.ndarray            # (days, len(MEASURE_COLUMNS)) measure sums
+    undated_counts: np.ndarray  # (HOUR_SLOTS,)
+    undated_sums: np.ndarray    # (len(MEASURE_COLUMNS),)
+
+
+class AccidentsCube:
+    """
+    In-memory aggregation cube over the accidents DataFrame.
+
+    Counts and injury/fatality sums are pre-aggregated per (day, hour); weekday,
+    month and year are derived from the day. Per-attribute (day, value) cubes are
+    built lazily on first use. Requests filtered only by date are answered by summing
+    cube cells; attribute filters fall back to a cached row mask from the FilterEngine
+    reduced with bincount over precomputed cell keys.
+    """
+
+    def __init__(self, df: pd.DataFrame, max_cached_slices: int = MAX_CACHED_SLICES):
+        self._df = df
+        self._engine: FilterEngine = get_filter_engine(df)
+        self._lock = threading.Lock()
+        self._max_cached_slices = max_cached_slices
+        self._slices: "OrderedDict[FilterSpec, CubeSlice]" = OrderedDict()
+
+        dates = df[DATE_COLUMN].to_numpy(dtype="datetime64[ns]") if DATE_COLUMN in df.columns \
+            else np.full(len(df), np.datetime64("NaT"), dtype="datetime64[ns]")
+        dated = ~np.isnat(dates)
+        days = dates.astype("datetime64[D]")
+
+        if dated.any():
+            self._first_day = days[dated].min()
+            self._n_days = int((days[dated].max() - self._first_day).astype(int)) + 1
+        else:
+            self._first_day = np.datetime64("1970-01-01", "D")
+            self._n_days = 0
+
+        # Day index per row, undated rows go to the extra last slot
+        self._row_day = np.full(len(df), self._n_days, dtype=np.int64)
+        self._row_day[dated] = (days[dated] - self._first_day).astype(np.int64)
+
+        # Dense date ranges only work if every date sits on midnight
+        self._day_aligned = bool((dates[dated] == days[dated].astype("datetime64[ns]")).all())
+
+        self._row_hour = np.full(len(df), NO_HOUR, dtype=np.int64)
+        if TIME_COLUMN in df.columns:
+            times = df[TIME_COLUMN].astype("string")
+            valid = times.str.fullmatch(r"\d{2}:\d{2}").fillna(False).to_numpy(dtype=bool)
+            hours = pd.to_numeric(times.str.slice(0, 2), errors="coerce").to_numpy(dtype=float)
+            valid &= hours < 24
+            self._row_hour[valid] = hours[valid].astype(np.int64)
+
+        self._row_measures = np.column_stack([
+            pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy(dtype=float)
+            if col in df.columns else np.zeros(len(df))
+            for col in MEASURE_COLUMNS
+        ]) if len(df) else np.zeros((0, len(MEASURE_COLUMNS)))
+
+        # Calendar of the day axis
+        calendar = pd.DatetimeIndex(self._first_day + np.arange(self._n_days))
+        self._day_weekday = calendar.dayofweek.to_numpy()
+        self._day_year = calendar.year.to_numpy()
+        self._day_month = calendar.month.to_numpy()
+
+        # Dense (day, hour) cube incl. the undated slot
+        self._counts, self._sums = self._aggregate(None)
+
+        self._attribute_codes: Dict[str, Tuple[np.ndarray, List[Any]]] = {}
+        self._attribute_cubes: Dict[str, np.ndarray] = {}
+
+        logger.info(f"Accidents cube built - {self._n_days} days x {HOUR_SLOTS} hour slots over {len(df)} rows")
+
+    # ------------------------------------------------------------------
+    # Cell selection
+    # ------------------------------------------------------------------
+
+    def _aggregate(self, mask: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Reduce (masked) rows into (day, hour) counts and per-day measure sums."""
+        row_day, row_hour, row_measures = self._row_day, self._row_hour, self._row_measures
+        if mask is not None:
+            row_day, row_hour, row_measures = row_day[mask], row_hour[mask], row_measures[mask]
+
+        n_slots = self._n_days + 1
+        counts = np.bincount(row_day * HOUR_SLOTS + row_hour, minlength=n_slots * HOUR_SLOTS)
+        counts = counts.reshape(n_slots, HOUR_SLOTS)
+        sums = np.column_stack([
+            np.bincount(row_day, weights=row_measures[:, i], minlength=n_slots)
+            for i in range(len(MEASURE_COLUMNS))
+        ])
+        return counts, sums
+
+    def _day_range(self, spec: FilterSpec) -> Tuple[int, int]:
+        """Translate the spec's inclusive [start, end] timestamps into day indexes [lo, hi)."""
+        start, end, _ = spec
+        start_day = start.astype("datetime64[D]")
+        if start_day.astype(start.dtype) < start:
+            start_day += 1
+        end_day = end.astype("datetime64[D]")
+
+        lo = int((start_day - self._first_day).astype(np.int64))
+        hi = int((end_day - self._first_day).astype(np.int64)) + 1
+        return min(max(lo, 0), self._n_days), min(max(hi, 0), self._n_days)
+
+    def _is_dense(self, spec: FilterSpec) -> bool:
+        start, _, conditions = spec
+        return not conditions and (start is None or self._day_aligned)
+
+    def select(self, filters: dict) -> CubeSlice:
+        spec = self._engine.parse(filters)
+
+        if self._is_dense(spec):
+            if spec[0] is None:
+                lo, hi = 0, self._n_days
+                undated_counts, undated_sums = self._counts[-1], self._sums[-1]
+            else:
+                lo, hi = self._day_range(spec)
+                hi = max(lo, hi)
+                undated_counts = np.zeros(HOUR_SLOTS, dtype=self._counts.dtype)
+                undated_sums = np.zeros(len(MEASURE_COLUMNS))
+            return CubeSlice(lo, self._counts[lo:hi], self._sums[lo:hi], undated_counts, undated_sums)
+
+        with self._lock:
+            cells = self._slices.get(spec)
+            if cells is not None:
+                self._slices.move_to_end(spec)
+                return cells
+
+        counts, sums = self._aggregate(self._engine.mask(spec))
+        cells = CubeSlice(0, counts[:-1], sums[:-1], counts[-1], sums[-1])
+
+        with self._lock:
+            self._slices[spec] = cells
+            while len(self._slices) > self._max_cached_slices:
+                self._slices.popitem(last=False)
+        return cells
+
+    # ------------------------------------------------------------------
+    # Chart aggregations
+    # ------------------------------------------------------------------
+
+    def period_summary(self, filters: dict) -> Dict[str, int]:
+        cells = self.select(filters)
+        sums = cells.sums.sum(axis=0) + cells.undated_sums
+        return {
+            "accident_count": int(cells.counts.sum() + cells.undated_counts.sum()),
+            "fatalities_count": int(sums[0]),
+            "seriously_injured": int(sums[1]),
+            "light_injured": int(sums[2]),
+        }
+
+    def timeline(self, filters: dict) -> List[Dict[str, Any]]:
+        cells = self.select(filters)
+        day_counts = cells.counts.sum(axis=1)
+        days = np.flatnonzero(day_counts)
+        dates = (self._first_day + cells.lo + days).astype(str)
+        return [{"date": date, "incidents": int(count)} for date, count in zip(dates, day_counts[days])]
+
+    def by_month(self, filters: dict) -> Dict[int, Dict[int, int]]:
+        cells = self.select(filters)
+        day_counts = cells.counts.sum(axis=1)
+        span = slice(cells.lo, cells.lo + len(day_counts))
+
+        result: Dict[int, Dict[int, int]] = {month: {} for month in range(1, 13)}
+        if not len(day_counts):
+            return result
+
+        years, months = self._day_year[span], self._day_month[span]
+        first_year = int(years.min())
+        keys = (years - first_year) * 12 + (months - 1)
+        per_month = np.bincount(keys, weights=day_counts, minlength=int(keys.max()) + 1)
+
+        for key in np.flatnonzero(per_month):
+            year, month = divmod(int(key), 12)
+            result[month + 1][first_year + year] = int(per_month[key])
+        return result
+
+    def heatmap(self, filters: dict) -> Dict[int, Dict[int, int]]:
+        cells = self.select(filters)
+        weekdays = self._day_weekday[cells.lo:cells.lo + len(cells.counts)]
+
+        table = np.zeros((24, 7), dtype=np.int64)
+        np.add.at(table.T, weekdays, cells.counts[:, :NO_HOUR])
+
+        hours = np.flatnonzero(table.sum(axis=1))
+        days_of_week = np.flatnonzero(table.sum(axis=0))
+        return {
+            int(hour): {int(dow): int(table[hour, dow]) for dow in days_of_week}
+            for hour in hours
+        }
+
+    def by_attribute(self, attribute: str, filters: dict) -> Dict[Any, int]:
+        column = f"attributes.{attribute}"
+        codes, values = self._codes(column)
+        spec = self._engine.parse(filters)
+
+        if self._is_dense(spec) and len(values) <= MAX_ATTRIBUTE_CARDINALITY:
+            cube = self._attribute_cube(column)
+            if spec[0] is None:
+                counts = cube.sum(axis=0)
+            else:
+                lo, hi = self._day_range(spec)
+                counts = cube[lo:max(lo, hi)].sum(axis=0)
+        else:
+            mask = self._engine.mask(spec)
+            selected = codes if mask is None else codes[mask]
+            counts = np.bincount(selected[selected >= 0], minlength=len(values))
+
+        return {values[i]: int(counts[i]) for i in np.flatnonzero(counts)}
+
+    def _codes(self, column: str) -> Tuple[np.ndarray, List[Any]]:
+        """Sorted value codes of a column (NaN -> -1), matching groupby key order."""
+        with self._lock:
+            entry = self._attribute_codes.get(column)
+            if entry is None:
+                codes, uniques = pd.factorize(self._df[column], sort=True, use_na_sentinel=True)
+                entry = (codes, list(uniques))
+                self._attribute_codes[column] = entry
+            return entry
+
+    def _attribute_cube(self, column: str) -> np.ndarray:
+        """Dense (day, value) counts for one attribute, undated rows included in the last day slot."""
+        codes, values = self._codes(column)
+        with self._lock:
+            cube = self._attribute_cubes.get(column)
+            if cube is None:
+                valid = codes >= 0
+                flat = self._row_day[valid] * len(values) + codes[valid]
+                cube = np.bincount(flat, minlength=(self._n_days + 1) * len(values))
+                cube = cube.reshape(self._n_days + 1, len(values))
+                self._attribute_cubes[column] = cube
+            return cube
@@ -1,48 +1,233 @@
-from typing import Dict
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import threading
+import weakref
+
+import numpy as np
 import pandas as pd
 import logging
 
 logger = logging.getLogger(__name__)
 
+DATE_COLUMN = "attributes.datum"
 
-def get_filtered_df(
-    df: pd.DataFrame, filters: dict
-) -> pd.DataFrame:
-    start_date = pd.to_datetime(filters.get("startDate"), errors="coerce")
-    end_date = pd.to_datetime(filters.get("endDate"), errors="coerce")
+# Operators accepted in `<attribute>:<operator>:<id>` query params
+EQUALITY_OPERATORS = ("eq", "neq")
+SET_OPERATORS = ("in", "nin")
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
 
-    if pd.notnull(start_date):
-        start_date = start_date.to_datetime64()
-    if pd.notnull(end_date):
-        end_date = end_date.to_datetime64()
+# (start, end, ((attribute, operator, value), ...))
+FilterSpec = Tuple[Optional[np.datetime64], Optional[np.datetime64], Tuple[Tuple[str, str, Hashable], ...]]
 
-    # Filter by date range if both dates are provided
-    if pd.notnull(start_date) and pd.notnull(end_date):
-        df = df[
-            (df["attributes.datum"] >= start_date) &
-            (df["attributes.datum"] <= end_date)
-        ]
 
-    # Process dynamic filters
-    for key, value in filters.items():
-        if ":" not in key:
-            continue 
+class FilterEngine:
+    """
+    Evaluates accident filters over one DataFrame as a single boolean mask.
 
-        attribute, operator, _ = key.split(":", 2)
-        attribute = "attributes." + attribute
+    Filters are parsed into a canonical, hashable spec, so the same set of
+    query params (in any order) maps to the same cached mask.
+    """
 
-        if attribute not in df.columns:
-            logger.warning(f"Attribute {attribute} not in DataFrame, skipping.")
-            continue
+    def __init__(self, df: pd.DataFrame, max_cached_masks: int = 256):
+        self._df = df
+        self._max_cached_masks = max_cached_masks
+        self._masks: "OrderedDict[FilterSpec, np.ndarray]" = OrderedDict()
+        self._codes: Dict[str, Tuple[np.ndarray, Dict[Any, int]]] = {}
+        self._lock = threading.Lock()
 
-        if operator == "eq":
-            df = df[df[attribute] == value]
-        elif operator == "neq":
-            df = df[df[attribute] != value]
-        else:
-            logger.warning(f"Unsupported operator {operator}, skipping.")
+        # Sorted view of the date column, used for range lookups via searchsorted
+        self._date_order: Optional[np.ndarray] = None
+        self._date_sorted: Optional[np.ndarray] = None
+        if DATE_COLUMN in df.columns:
+            dates = df[DATE_COLUMN].to_numpy(dtype="datetime64[ns]")
+            self._date_order = np.argsort(dates, kind="stable")
+            self._date_sorted = dates[self._date_order]
 
-    return df
+    def parse(self, filters: dict) -> FilterSpec:
+        """
+        Parse raw query params into a canonical spec.
+
+        Unknown attributes and unsupported operators are skipped with a warning.
+        """
+        start_date = _parse_date(filters.get("startDate"))
+        end_date = _parse_date(filters.get("endDate"))
+
+        # Date range is applied only if both dates are provided
+        if start_date is None or end_date is None:
+            start_date = end_date = None
+
+        conditions = set()
+        for key, value in filters.items():
+            if ":" not in key:
+                continue
+
+            attribute, operator, _ = key.split(":", 2)
+            attribute = "attributes." + attribute
+
+            if attribute not in self._df.columns:
+                logger.warning(f"Attribute {attribute} not in DataFrame, skipping.")
+                continue
+
+            if operator in EQUALITY_OPERATORS or operator in RANGE_OPERATORS:
+                conditions.add((attribute, operator, value))
+            elif operator in SET_OPERATORS:
+                values = tuple(sorted({v.strip() for v in str(value).split(",") if v.strip()}))
+                conditions.add((attribute, operator, values))
+            else:
+                logger.warning(f"Unsupported operator {operator}, skipping.")
+
+        return start_date, end_date, tuple(sorted(conditions, key=repr))
+
+    def mask(self, spec: FilterSpec) -> Optional[np.ndarray]:
+        """
+        Return the (read-only) boolean row mask for the spec, or None if the spec filters nothing.
+        """
+        start_date, end_date, conditions = spec
+        if start_date is None and not conditions:
+            return None
+
+        with self._lock:
+            cached = self._masks.get(spec)
+            if cached is not None:
+                self._masks.move_to_end(spec)
+                return cached
+
+        mask = np.ones(len(self._df), dtype=bool)
+        if start_date is not None:
+            mask &= self._date_range_mask(start_date, end_date, right_inclusive=True)
+        for attribute, operator, value in conditions:
+            mask &= self._condition_mask(attribute, operator, value)
+        mask.flags.writeable = False
+
+        with self._lock:
+            self._masks[spec] = mask
+            self._masks.move_to_end(spec)
+            while len(self._masks) > self._max_cached_masks:
+                self._masks.popitem(last=False)
+
+        return mask
+
+    def filter(self, filters: dict) -> pd.DataFrame:
+        mask = self.mask(self.parse(filters))
+        if mask is None:
+            return self._df
+        return self._df[mask]
+
+    def _date_range_mask(
+        self,
+        start: Optional[np.datetime64],
+        end: Optional[np.datetime64],
+        *,
+        left_inclusive: bool = True,
+        right_inclusive: bool = True,
+    ) -> np.ndarray:
+        mask = np.zeros(len(self._df), dtype=bool)
+        if self._date_sorted is None:
+            return mask
+
+        lo = 0
+        hi = len(self._date_sorted) - int(np.isnat(self._date_sorted).sum())
+        if start is not None:
+            lo = np.searchsorted(self._date_sorted[:hi], start, side="left" if left_inclusive else "right")
+        if end is not None:
+            hi = np.searchsorted(self._date_sorted[:hi], end, side="right" if right_inclusive else "left")
+        if lo < hi:
+            mask[self._date_order[lo:hi]] = True
+        return mask
+
+    def _column_codes(self, attribute: str) -> Tuple[np.ndarray, Dict[Any, int]]:
+        """
+        Categorical codes of a column (NaN -> -1) and the value -> code lookup.
+        """
+        entry = self._codes.get(attribute)
+        if entry is None:
+            codes, uniques = pd.factorize(self._df[attribute], use_na_sentinel=True)
+            lookup = {value: code for code, value in enumerate(uniques.tolist())}
+            entry = (codes, lookup)
+            self._codes[attribute] = entry
+        return entry
+
+    @staticmethod
+    def _lookup_code(lookup: Dict[Any, int], value: Any) -> Optional[int]:
+        code = lookup.get(value)
+        if code is None and isinstance(value, str):
+            # Query params are strings, numeric columns hold numbers (1 == 1.0 when hashing)
+            try:
+                code = lookup.get(float(value))
+            except ValueError:
+                return None
+        return code
+
+    def _condition_mask(self, attribute: str, operator: str, value: Any) -> np.ndarray:
+        if operator in RANGE_OPERATORS:
+            return self._range_mask(attribute, operator, value)
+
+        codes, lookup = self._column_codes(attribute)
+
+        if operator in EQUALITY_OPERATORS:
+            code = self._lookup_code(lookup, value)
+            matches = np.zeros(len(codes), dtype=bool) if code is None else codes == code
+            return matches if operator == "eq" else ~matches
+
+        wanted = [c for c in (self._lookup_code(lookup, v) for v in value) if c is not None]
+        matches = np.isin(codes, wanted)
+        return matches if operator == "in" else ~matches
+
+    def _range_mask(self, attribute: str, operator: str, value: Any) -> np.ndarray:
+        if attribute == DATE_COLUMN:
+            bound = _parse_date(value)
+            if bound is None:
+                logger.warning(f"Invalid date {value} for {attribute}, skipping.")
+                return np.ones(len(self._df), dtype=bool)
+            if operator in ("gt", "gte"):
+                return self._date_range_mask(bound, None, left_inclusive=operator == "gte")
+            return self._date_range_mask(None, bound, right_inclusive=operator == "lte")
+
+        try:
+            bound = float(value)
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid numeric value {value} for {attribute}, skipping.")
+            return np.ones(len(self._df), dtype=bool)
+
+        column = pd.to_numeric(self._df[attribute], errors="coerce").to_numpy(dtype=float)
+        with np.errstate(invalid="ignore"):
+            if operator == "gt":
+                return column > bound
+            if operator == "gte":
+                return column >= bound
+            if operator == "lt":
+                return column < bound
+            return column <= bound
+
+
+def _parse_date(value) -> Optional[np.datetime64]:
+    date = pd.to_datetime(value, errors="coerce")
+    if pd.isnull(date):
+        return None
+    return date.to_datetime64()
+
+
+# One engine per DataFrame, dropped together with the frame
+_engines: Dict[int, Tuple[weakref.ref, FilterEngine]] = {}
+_engines_lock = threading.Lock()
+
+
+def get_filter_engine(df: pd.DataFrame) -> FilterEngine:
+    with _engines_lock:
+        entry = _engines.get(id(df))
+        if entry is not None and entry[0]() is df:
+            return entry[1]
+
+        engine = FilterEngine(df)
+        key = id(df)
+        _engines[key] = (weakref.ref(df, lambda _: _engines.pop(key, None)), engine)
+        return engine
+
+
+def get_filtered_df(
+    df: pd.DataFrame, filters: dict
+) -> pd.DataFrame:
+    return get_filter_engine(df).filter(filters)
 
 
 def get_filtered_waze_df(
@@ -0,0 +1,215 @@
+import datetime
+import json
+import threading
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+# orjson is a dependency of the project; stdlib json is the fallback outside its environment
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Frames with more rows than this are streamed in chunks instead of encoded in one go
+STREAM_THRESHOLD = 20_000
+STREAM_CHUNK_SIZE = 5_000
+
+
+def _default(obj: Any) -> Any:
+    """Encode values neither orjson nor json handle natively."""
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _null_non_finite(obj: Any) -> Any:
+    """Copy of `obj` with NaN/inf floats replaced by None, as orjson encodes them."""
+    if isinstance(obj, (float, np.floating)):
+        return float(obj) if np.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _null_non_finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return [_null_non_finite(value) for value in obj]
+    if isinstance(obj, np.ndarray):
+        return _null_non_finite(obj.tolist())
+    return obj
+
+
+def _json_dumps(content: Any) -> bytes:
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content to JSON bytes (NaN/inf become null)."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    try:
+        return _json_dumps(content)
+    except ValueError:
+        # out of range float, only then walk the content to null them
+        return _json_dumps(_null_non_finite(content))
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered through `dumps` (orjson when available)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _format_datetimes(values: np.ndarray) -> List[Optional[str]]:
+    """datetime64 -> isoformat strings (microseconds only when non-zero), NaT -> None."""
+    full = np.datetime_as_string(values, unit="us")
+    whole_seconds = values.astype("datetime64[us]").astype(np.int64) % 1_000_000 == 0
+    formatted = np.where(whole_seconds, full.astype("<U19"), full).astype(object)
+    formatted[np.isnat(values)] = None
+    return formatted.tolist()
+
+
+def _column_values(series: pd.Series) -> List[Any]:
+    """One column as a list of JSON-ready Python values."""
+    kind = series.dtype.kind
+    values = series.to_numpy()
+
+    if kind == "M":
+        return _format_datetimes(values)
+
+    if kind in "fc":
+        out = values.tolist()
+        for i in np.flatnonzero(~np.isfinite(values)):
+            out[i] = None
+        return out
+
+    if kind in "iub":
+        return values.tolist()
+
+    # object / extension dtypes: only None out scalar missing values
+    values = np.asarray(series.astype(object))
+    out = values.tolist()
+    for i in np.flatnonzero(pd.isna(values)):
+        out[i] = None
+    return out
+
+
+def frame_to_columns(df: pd.DataFrame) -> Dict[str, List[Any]]:
+    return {str(col): _column_values(df[col]) for col in df.columns}
+
+
+def frame_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Vectorized replacement of `clean_for_json(df).to_dict(orient="records")`.
+
+    NaN/inf are nulled column-wise, datetimes are pre-formatted, numpy scalars become Python values.
+    """
+    columns = frame_to_columns(df)
+    names = list(columns.keys())
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def iter_json_array(df: pd.DataFrame, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Encode frame rows as a JSON array, chunk by chunk."""
+    yield b"["
+    first = True
+    for start in range(0, len(df), chunk_size):
+        body = dumps(frame_to_records(df.iloc[start:start + chunk_size]))[1:-1]
+        if not body:
+            continue
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
+
+
+def records_response(df: pd.DataFrame, stream_threshold: int = STREAM_THRESHOLD) -> Response:
+    """JSON array of frame rows; large frames are streamed."""
+    if len(df) > stream_threshold:
+        return StreamingResponse(iter_json_array(df), media_type="application/json")
+    return Response(content=dumps(frame_to_records(df)), media_type="application/json")
+
+
+class RecordStore:
+    """
+    JSON-encoded rows of a DataFrame, addressable by position or by a key column.
+
+    Rows are encoded on first access (or all at once with `warm`) and kept as bytes,
+    so responses can be assembled without copying or re-cleaning the frame.
+    """
+
+    def __init__(self, df: pd.DataFrame, key_column: Optional[str] = None):
+        self._df = df
+        self._encoded: List[Optional[bytes]] = [None] * len(df)
+        self._lock = threading.Lock()
+        self._key_column = key_column
+
+        self._positions: Dict[Hashable, int] = {}
+        self._index_keys(0)
+
+    def _index_keys(self, start: int):
+        if self._key_column is not None and self._key_column in self._df.columns:
+            # First occurrence wins, same as `df[df[key] == value].iloc[0]`
+            for position, key in enumerate(self._df[self._key_column].iloc[start:].tolist(), start):
+                self._positions.setdefault(key, position)
+
+    def __len__(self) -> int:
+        return len(self._encoded)
+
+    def position(self, key: Hashable) -> Optional[int]:
+        return self._positions.get(key)
+
+    def extend(self, df: pd.DataFrame):
+        """Switch to `df`, which holds the current rows followed by new ones - only new rows get encoded."""
+        with self._lock:
+            start = len(self._encoded)
+            self._df = df
+            self._encoded.extend([None] * (len(df) - start))
+            self._index_keys(start)
+
+    def refresh(self, df: pd.DataFrame, positions: Iterable[int]):
+        """Switch to `df` (same rows, same order) and re-encode the changed positions on next access."""
+        with self._lock:
+            self._df = df
+            for position in positions:
+                self._encoded[position] = None
+
+    def warm(self, chunk_size: int = 10_000):
+        """Encode every row up front."""
+        for start in range(0, len(self._encoded), chunk_size):
+            self._encode_rows(range(start, min(start + chunk_size, len(self._encoded))))
+
+    def encoded(self, position: int) -> bytes:
+        data = self._encoded[position]
+        if data is None:
+            self._encode_rows([position])
+            data = self._encoded[position]
+        return data
+
+    def encoded_array(self, positions: Iterable[int]) -> bytes:
+        positions = list(positions)
+        missing = [p for p in positions if self._encoded[p] is None]
+        if missing:
+            self._encode_rows(missing)
+        return b"[" + b",".join(self._encoded[p] for p in positions) + b"]"
+
+    def _encode_rows(self, positions: Iterable[int]):
+        positions = list(positions)
+        encoded = [dumps(record) for record in frame_to_records(self._df.iloc[positions])]
+        with self._lock:
+            for position, data in zip(positions, encoded):
+                self._encoded[position] = data
@@ -0,0 +1,120 @@
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+DAY_MS = 24 * 3600 * 1000
+# 2024-01-01T12:00:00Z
+FIRST_DAY_MS = 1704110400000
+
+
+def make_records(count, day_size=40, p2a=True):
+    """Police accident features ordered by (p2a, p1), `day_size` records per day."""
+    records = []
+    for i in range(count):
+        attributes = {"p1": 1000 + i}
+        if p2a:
+            attributes["p2a"] = FIRST_DAY_MS + (i // day_size) * DAY_MS
+        records.append({"attributes": attributes, "geometry": {"x": 16.6 + i * 1e-5, "y": 49.2}})
+    return records
+
+
+class StandInArcGIS:
+    """
+    Local stand-in of an ArcGIS `query` endpoint serving `records` in pages.
+
+    - pages hold at most `max_record_count` records regardless of `resultRecordCount`
+      (ArcGIS `maxRecordCount`), `later_max_record_count` lowers the cap after the first page,
+    - `returnCountOnly=true` returns the count unless `count_supported` is False,
+    - the first `failures` requests answer `failure_status`.
+    """
+
+    def __init__(self, records, max_record_count=100, later_max_record_count=None,
+                 count_supported=True, failures=0, failure_status=503):
+        self.records = records
+        self.max_record_count = max_record_count
+        self.later_max_record_count = later_max_record_count
+        self.count_supported = count_supported
+        self.failures = failures
+        self.failure_status = failure_status
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/query"
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+                status, body = stand_in.respond(params)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def respond(self, params):
+        with self._lock:
+            self.requests.append(params)
+            if self.failures:
+                self.failures -= 1
+                return self.failure_status, {"error": "temporarily unavailable"}
+            pages_served = sum(1 for request in self.requests if "returnCountOnly" not in request)
+
+        if params.get("returnCountOnly") == "true":
+            if not self.count_supported:
+                return 400, {"error": "returnCountOnly not supported"}
+            return 200, {"count": len(self.records)}
+
+        cap = self.max_record_count
+        if self.later_max_record_count and pages_served > 1:
+            cap = self.later_max_record_count
+        offset = int(params.get("resultOffset", 0))
+        size = min(int(params.get("resultRecordCount", cap)), cap)
+        features = self.records[offset:offset + size]
+        return 200, {
+            "features": features,
+            "exceededTransferLimit": offset + len(features) < len(self.records),
+        }
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def arcgis():
+    """Factory of started StandInArcGIS servers, shut down after the test."""
+    servers = []
+
+    def start(records, **options):
+        server = StandInArcGIS(records, **options).__enter__()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.__exit__(None, None, None)
@@ -0,0 +1,70 @@
+import asyncio
+import json
+from datetime import date
+
+from bp_api.utils.accidents_sync import AccidentsSync, FEATURES_FILE, STATE_FILE
+from conftest import make_records
+
+
+class FakeDataLoader:
+    """Accidents by id, the parts of DataLoader AccidentsSync uses."""
+
+    def __init__(self):
+        self.accidents = {}
+
+    def validate_accident(self, attributes, x, y):
+        return {"id": attributes["p1"], "x": x, "y": y}
+
+    def merge_accidents(self, accidents):
+        new = [accident for accident in accidents if accident["id"] not in self.accidents]
+        self.accidents.update((accident["id"], accident) for accident in new)
+        return len(new)
+
+    def get_accidents_dataframe(self):
+        return None
+
+
+def _sync(server, tmp_path, loader=None):
+    return AccidentsSync(loader or FakeDataLoader(), server.url, sync_dir=str(tmp_path))
+
+
+def test_sync_pages_past_server_cap(arcgis, tmp_path):
+    records = make_records(1000, day_size=40)
+    server = arcgis(records, max_record_count=100)
+    sync = _sync(server, tmp_path)
+
+    assert asyncio.run(sync.sync_once()) == 1000
+
+    lines = (tmp_path / FEATURES_FILE).read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["attributes"]["p1"] for line in lines] == [r["attributes"]["p1"] for r in records]
+    # 1000 records, 40 per day from 2024-01-01 -> the last one is on day 24
+    assert sync.watermark == (date(2024, 1, 25), 1999)
+    assert json.loads((tmp_path / STATE_FILE).read_text()) == {"p2a": "2024-01-25", "p1": 1999}
+
+    # the next round asks only for records after the watermark
+    asyncio.run(sync.sync_once())
+    assert "p1 > 1999" in server.requests[-1]["where"]
+    assert "DATE '2024-01-25'" in server.requests[-1]["where"]
+
+
+def test_sync_without_parsable_watermark(arcgis, tmp_path):
+    server = arcgis(make_records(30, p2a=False))
+    sync = _sync(server, tmp_path)
+
+    assert asyncio.run(sync.sync_once()) == 30
+
+    assert sync.watermark is None
+    assert not (tmp_path / STATE_FILE).exists()
+    assert len((tmp_path / FEATURES_FILE).read_text(encoding="utf-8").splitlines()) == 30
+
+
+def test_restore_replays_synced_features(arcgis, tmp_path):
+    server = arcgis(make_records(250, day_size=100), max_record_count=100)
+    asyncio.run(_sync(server, tmp_path).sync_once())
+
+    loader = FakeDataLoader()
+    restored = _sync(server, tmp_path, loader)
+
+    assert restored.restore() == 250
+    assert len(loader.accidents) == 250
+    assert restored.watermark == (date(2024, 1, 3), 1249)
@@ -0,0 +1,83 @@
+import asyncio
+from typing import Any, Dict
+
+from bp_api.models.models import ArcGISResponse
+from bp_api.utils.api_client import APIClient
+from conftest import make_records
+
+
+def _client(server, **options):
+    return APIClient(server.url, ArcGISResponse[Dict[str, Any]], backoff=0.0, **options)
+
+
+def _ids(response):
+    return [feature.attributes["p1"] for feature in response.features]
+
+
+def test_server_cap_below_requested_page_size(arcgis):
+    records = make_records(1000)
+    server = arcgis(records, max_record_count=100)
+
+    response = _client(server).get_data({"resultRecordCount": 500})
+
+    assert _ids(response) == [record["attributes"]["p1"] for record in records]
+    assert response.exceededTransferLimit is False
+
+
+def test_count_not_multiple_of_page_size(arcgis):
+    records = make_records(1050)
+    server = arcgis(records, max_record_count=100)
+
+    response = _client(server, max_concurrency=3).get_data()
+
+    assert _ids(response) == [record["attributes"]["p1"] for record in records]
+
+
+def test_short_page_is_completed(arcgis):
+    # the first page suggests 100 records per page, the server then returns only 60
+    records = make_records(430)
+    server = arcgis(records, max_record_count=100, later_max_record_count=60)
+
+    response = _client(server).get_data()
+
+    assert _ids(response) == [record["attributes"]["p1"] for record in records]
+
+
+def test_without_count_follows_transfer_limit(arcgis):
+    records = make_records(350)
+    server = arcgis(records, max_record_count=100, count_supported=False)
+
+    response = _client(server).get_data({"resultRecordCount": 500})
+
+    assert _ids(response) == [record["attributes"]["p1"] for record in records]
+
+
+def test_retries_server_errors(arcgis):
+    records = make_records(250)
+    server = arcgis(records, max_record_count=100, failures=2, failure_status=503)
+
+    response = _client(server, retries=3).get_data()
+
+    assert _ids(response) == [record["attributes"]["p1"] for record in records]
+    assert len(server.requests) > 2
+
+
+def test_gives_up_after_retries(arcgis):
+    server = arcgis(make_records(10), failures=5, failure_status=502)
+
+    assert _client(server, retries=2).get_data() is None
+    assert len(server.requests) == 3
+
+
+def test_empty_result(arcgis):
+    server = arcgis([])
+    client = _client(server)
+
+    response = client.get_data()
+    assert response.features == []
+
+    async def collect():
+        return [page async for page in client.iter_features()]
+
+    assert asyncio.run(collect()) == [[]]
+    assert len(server.requests) == 2  # one page request per call, no count request
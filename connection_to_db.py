@@ -15,4 +15,16 @@ conn_params_brno = {
     "password": os.getenv("POSTGRES_PASSWORD_BRNO"),
 }
 
-CONN_BRNO = psycopg2.connect(**conn_params_brno)
\ No newline at end of file
+
+
+def connect_brno():
+    return psycopg2.connect(**conn_params_brno)
+
+
+def __getattr__(name):
+    # CONN_BRNO is opened on first use, so worker processes importing connect_brno don't connect twice
+    if name == "CONN_BRNO":
+        conn = connect_brno()
+        globals()["CONN_BRNO"] = conn
+        return conn
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
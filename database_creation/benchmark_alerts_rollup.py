@@ -0,0 +1,64 @@
+"""
+Alert type/subtype breakdown and top-N streets from the raw hypertables against the hourly
+rollups (continuous aggregates alerts_hourly / jams_street_hourly, see timescale_policies.py).
+
+    python benchmark_alerts_rollup.py 2025-01-01 2025-02-01
+
+Reported per query: rows read from the source relation, median time (BENCHMARK_REPEATS runs
+after a warm-up) and whether the results match. Run `python timescale_policies.py rollups` first.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "Analyticity-backend", "AnalyticityBackend"))
+
+from benchmark_timescale import REPEATS, time_query
+from constants.queries import (QUERY_ALERTS_TYPES_BASE, QUERY_ALERTS_TYPES_ROLLUP_BASE, QUERY_TOP_STREETS_BOTH_BASE,
+                               QUERY_TOP_STREETS_BOTH_ROLLUP_BASE)
+
+TOP_N = 10
+
+
+def fetch(conn, sql, params):
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+    conn.rollback()
+    return rows
+
+
+def count_rows(conn, relation, time_column, interval):
+    return fetch(conn, f"SELECT count(*) FROM {relation} WHERE {time_column} >= %s AND {time_column} < %s;",
+                 interval)[0][0]
+
+
+def main(args):
+    from connection_to_db import CONN_BRNO
+
+    from_date = datetime.strptime(args[0], "%Y-%m-%d")
+    to_date = datetime.strptime(args[1], "%Y-%m-%d") + timedelta(days=1)  # include whole 'to' day
+    interval = (from_date, to_date)
+    top_params = interval + (TOP_N,) + interval + (TOP_N,)
+
+    queries = [
+        ("alerts_types", (QUERY_ALERTS_TYPES_BASE, interval), (QUERY_ALERTS_TYPES_ROLLUP_BASE, interval)),
+        ("top_streets_both", (QUERY_TOP_STREETS_BOTH_BASE, top_params), (QUERY_TOP_STREETS_BOTH_ROLLUP_BASE, top_params)),
+    ]
+
+    try:
+        print(f"Riadky alertov: {count_rows(CONN_BRNO, 'alerts', 'published_at', interval)} -> "
+              f"{count_rows(CONN_BRNO, 'alerts_hourly', 'hour', interval)} v rollupe")
+        print(f"\nČas dotazov (ms, medián z {REPEATS}):")
+        for name, raw, rollup in queries:
+            raw_ms, rollup_ms = time_query(CONN_BRNO, *raw), time_query(CONN_BRNO, *rollup)
+            status = "zhoda" if sorted(fetch(CONN_BRNO, *raw)) == sorted(fetch(CONN_BRNO, *rollup)) else "ROZDIEL"
+            speedup = raw_ms / rollup_ms if rollup_ms else 0
+            print(f"  {name:<18} {raw_ms:10.1f} -> {rollup_ms:10.1f}  ({speedup:.1f}x, {status})")
+    finally:
+        CONN_BRNO.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
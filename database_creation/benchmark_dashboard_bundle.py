@@ -0,0 +1,61 @@
+"""
+DB time of one dashboard load: the four single endpoints (total_stats, data_for_plot_drawer,
+data_for_plot_alerts, data_for_plot_streets) against the two passes of /dashboard_bundle/.
+
+    python benchmark_dashboard_bundle.py 2025-01-01 2025-02-01
+
+Every query is run BENCHMARK_REPEATS times after one warm-up run, the median is reported.
+The bundle passes run concurrently in the backend, so its wall time is the slower pass.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "Analyticity-backend", "AnalyticityBackend"))
+
+from benchmark_timescale import REPEATS, time_query
+from constants.queries import (QUERY_ALERTS_TYPES_BASE, QUERY_BUNDLE_ALERTS_BASE, QUERY_BUNDLE_JAMS_BASE,
+                               QUERY_SUM_STATISTICS, QUERY_TOP_STREETS_BOTH_BASE, QUERY_TOTAL_STATISTICS)
+
+TOP_N = 10
+
+
+def main(args):
+    from connection_to_db import CONN_BRNO
+
+    from_date = datetime.strptime(args[0], "%Y-%m-%d")
+    to_date = datetime.strptime(args[1], "%Y-%m-%d") + timedelta(days=1)  # include whole 'to' day
+    interval = (from_date, to_date)
+
+    single = [
+        ("total_stats", QUERY_TOTAL_STATISTICS, interval + interval),
+        ("data_for_plot_drawer", QUERY_SUM_STATISTICS, interval + interval + interval),
+        ("data_for_plot_alerts", QUERY_ALERTS_TYPES_BASE, interval),
+        ("data_for_plot_streets", QUERY_TOP_STREETS_BOTH_BASE, interval + (TOP_N,) + interval + (TOP_N,)),
+    ]
+    bundle = [
+        ("bundle jams", QUERY_BUNDLE_JAMS_BASE, interval),
+        ("bundle alerts", QUERY_BUNDLE_ALERTS_BASE, interval),
+    ]
+
+    try:
+        print(f"Čas dotazov (ms, medián z {REPEATS}):")
+        single_ms = []
+        for name, sql, params in single:
+            single_ms.append(time_query(CONN_BRNO, sql, params))
+            print(f"  {name:<22} {single_ms[-1]:10.1f}")
+        bundle_ms = []
+        for name, sql, params in bundle:
+            bundle_ms.append(time_query(CONN_BRNO, sql, params))
+            print(f"  {name:<22} {bundle_ms[-1]:10.1f}")
+
+        print(f"\nJednotlivé endpointy: spolu {sum(single_ms):10.1f} ms DB času")
+        print(f"dashboard_bundle:     spolu {sum(bundle_ms):10.1f} ms DB času, súbežne {max(bundle_ms):.1f} ms "
+              f"({sum(single_ms) / sum(bundle_ms):.1f}x menej DB času)")
+    finally:
+        CONN_BRNO.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,112 @@
+"""
+Hourly-by-streets query before/after the hour-axis rewrite (QUERY_SUM_STATISTICS_WITH_STREETS).
+
+    python benchmark_hourly_streets.py 2025-01-01 2025-02-01              # top 5 streets by jams
+    python benchmark_hourly_streets.py 2025-01-01 2025-02-01 Husova Pekařská
+
+The original query grouped jams by raw published_at (one row per distinct timestamp) and
+repeated an unfiltered alerts count on every row; the new one filters by street_id (streets_dict).
+Reported: rows transferred, median time (BENCHMARK_REPEATS runs after a warm-up) and whether the
+per-hour jam statistics match (original rows merged per hour, averages weighted by the jam count).
+"""
+import math
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "Analyticity-backend", "AnalyticityBackend"))
+
+from benchmark_timescale import REPEATS, time_query
+from constants.queries import QUERY_STREET_IDS, QUERY_SUM_STATISTICS_WITH_STREETS, QUERY_TOP_STREETS_JAMS_BASE
+
+TOP_STREETS = 5
+
+LEGACY_SUM_STATISTICS_WITH_STREETS = """
+       SELECT
+            COUNT(*) AS data_jams,
+            AVG(speed_kmh_avg)::FLOAT AS speedKMH,
+            AVG(delay_avg)::FLOAT AS delay,
+            AVG(jam_level_avg)::FLOAT AS level,
+            AVG(jam_length_avg)::FLOAT AS length,
+            published_at AT TIME ZONE 'UTC' AS utc_time,
+            (
+                SELECT COUNT(*)
+                FROM alerts
+                WHERE published_at >= %s AND published_at < %s
+            ) AS data_alerts
+        FROM jams
+        WHERE published_at >= %s AND published_at < %s
+          AND street = ANY(%s)
+        GROUP BY utc_time
+        ORDER BY utc_time
+    """
+
+METRICS = (1, 2, 3, 4)  # speedKMH, delay, level, length
+
+
+def fetch(conn, sql, params):
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+    conn.rollback()
+    return rows
+
+
+def per_hour(rows):
+    """hour -> (jam count, weighted averages) of rows with jams."""
+    merged = defaultdict(lambda: [0, [0.0] * len(METRICS)])
+    for row in rows:
+        if not row[0]:
+            continue
+        hour = row[5].astimezone(timezone.utc) if row[5].tzinfo else row[5].replace(tzinfo=timezone.utc)
+        hour = hour.replace(minute=0, second=0, microsecond=0)
+        merged[hour][0] += row[0]
+        for i, column in enumerate(METRICS):
+            merged[hour][1][i] += (row[column] or 0.0) * row[0]
+    return {hour: (count, [total / count for total in sums]) for hour, (count, sums) in merged.items()}
+
+
+def compare(legacy_rows, new_rows):
+    legacy, new = per_hour(legacy_rows), per_hour(new_rows)
+    if legacy.keys() != new.keys():
+        return f"ROZDIEL v hodinách ({len(legacy)} vs {len(new)})"
+    for hour, (count, averages) in legacy.items():
+        new_count, new_averages = new[hour]
+        if count != new_count or not all(math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+                                         for a, b in zip(averages, new_averages)):
+            return f"ROZDIEL v hodine {hour:%Y-%m-%d %H:00}"
+    return f"zhoda ({len(new)} hodín so zápchami)"
+
+
+def main(args):
+    from connection_to_db import CONN_BRNO
+
+    dates = args[:2]
+    from_date = datetime.strptime(dates[0], "%Y-%m-%d")
+    to_date = datetime.strptime(dates[1], "%Y-%m-%d") + timedelta(days=1)  # include whole 'to' day
+    interval = (from_date, to_date)
+
+    try:
+        streets = args[2:] or [row[0] for row in fetch(CONN_BRNO, QUERY_TOP_STREETS_JAMS_BASE,
+                                                       interval + (TOP_STREETS,))]
+        ids = [row[1] for row in fetch(CONN_BRNO, QUERY_STREET_IDS, (streets,))]
+        print(f"Ulice: {', '.join(streets)} (street_id: {', '.join(map(str, ids))})")
+
+        legacy = (LEGACY_SUM_STATISTICS_WITH_STREETS, interval + interval + (streets,))
+        new = (QUERY_SUM_STATISTICS_WITH_STREETS, interval + interval + (ids,) + interval + (ids,))
+        legacy_rows, new_rows = fetch(CONN_BRNO, *legacy), fetch(CONN_BRNO, *new)
+
+        print(f"Riadky:  {len(legacy_rows):10d} -> {len(new_rows):10d}")
+        print(f"Čas (ms, medián z {REPEATS}): {time_query(CONN_BRNO, *legacy):10.1f} -> "
+              f"{time_query(CONN_BRNO, *new):10.1f}")
+        print(f"Štatistiky zápch po hodinách: {compare(legacy_rows, new_rows)}")
+        print(f"Alerty: {legacy_rows[0][6] if legacy_rows else 0} (všetky ulice) -> "
+              f"{sum(row[6] for row in new_rows)} (vybrané ulice)")
+    finally:
+        CONN_BRNO.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,158 @@
+"""
+Route filter benchmark: the original per-row ST_DWithin(geography) route queries against
+the corridor queries (Analyticity-backend constants/queries.py, ROUTE_CORRIDOR_CTE).
+
+    python benchmark_route_filter.py 2025-01-01 2025-02-01
+
+Long synthetic routes are built inside the extent of the jams in the interval (a diagonal
+and a zigzag with many vertices, several kilometres each). Every query is run
+BENCHMARK_REPEATS times after one warm-up run, the median is reported together with the
+number of matched jams/alerts. The counts should match; the corridor is a buffered polygon,
+so a row touching its edge can rarely differ from the exact ST_DWithin distance test.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "Analyticity-backend", "AnalyticityBackend"))
+
+from benchmark_timescale import REPEATS, time_query
+from constants.queries import (QUERY_ALERTS_WITH_ROUTE, QUERY_SUM_STATISTICS_WITH_ROUTE,
+                               QUERY_TOTAL_STATISTICS_WITH_ROUTE, ROUTE_BUFFER_METERS)
+
+ZIGZAG_VERTICES = int(os.getenv("BENCHMARK_ROUTE_VERTICES", "60"))
+
+# Route queries as they were before the corridor CTE (distance test per row, no index use)
+LEGACY_SUM_STATISTICS_WITH_ROUTE = """
+        SELECT
+            COUNT(*) AS data_jams,
+            AVG(speed_kmh_avg)::FLOAT AS speedKMH,
+            AVG(delay_avg)::FLOAT AS delay,
+            AVG(jam_level_avg)::FLOAT AS level,
+            AVG(jam_length_avg)::FLOAT AS length,
+            published_at AT TIME ZONE 'UTC' AS utc_time,
+            (
+                SELECT COUNT(*)
+                FROM alerts
+                WHERE ST_DWithin(
+                          location::geography,
+                          ST_GeomFromText(%s, 4326)::geography,
+                          %s
+                      )
+                  AND published_at >= %s AND published_at < %s
+            ) AS data_alerts
+        FROM jams
+        WHERE ST_DWithin(
+                  jam_line::geography,
+                  ST_GeomFromText(%s, 4326)::geography,
+                  %s
+              )
+          AND published_at >= %s AND published_at < %s
+        GROUP BY utc_time
+        ORDER BY utc_time
+    """
+
+LEGACY_ALERTS_WITH_ROUTE = """
+    SELECT uuid
+    FROM alerts
+    WHERE published_at BETWEEN %s AND %s
+        AND ST_DWithin(
+                location::geography,
+                ST_GeomFromText(%s, 4326)::geography,
+                %s
+            );
+"""
+
+
+def synthetic_routes(conn, from_date, to_date):
+    """(name, WKT, length in km) of long routes across the extent of the jams in the interval."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT ST_XMin(e), ST_YMin(e), ST_XMax(e), ST_YMax(e)
+            FROM (SELECT ST_Extent(jam_line::geometry) AS e FROM jams
+                  WHERE published_at >= %s AND published_at < %s) s;
+        """, (from_date, to_date))
+        xmin, ymin, xmax, ymax = cur.fetchone()
+        if xmin is None:
+            return []
+
+        # stay inside the extent, the edges are usually sparse
+        dx, dy = (xmax - xmin) * 0.1, (ymax - ymin) * 0.1
+        xmin, ymin, xmax, ymax = xmin + dx, ymin + dy, xmax - dx, ymax - dy
+        diagonal = [(xmin, ymin), (xmax, ymax)]
+        step = (xmax - xmin) / (ZIGZAG_VERTICES - 1)
+        zigzag = [(xmin + i * step, ymin if i % 2 else ymax) for i in range(ZIGZAG_VERTICES)]
+
+        routes = []
+        for name, points in (("diagonála", diagonal), (f"cikcak ({ZIGZAG_VERTICES} bodov)", zigzag)):
+            wkt = "LINESTRING(" + ", ".join(f"{x} {y}" for x, y in points) + ")"
+            cur.execute("SELECT ST_Length(ST_GeomFromText(%s, 4326)::geography) / 1000.0;", (wkt,))
+            routes.append((name, wkt, cur.fetchone()[0]))
+    conn.rollback()
+    return routes
+
+
+def fetch_counts(conn, sql, params, count):
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+    conn.rollback()
+    return count(rows)
+
+
+def route_queries(wkt, from_date, to_date):
+    """(name, (legacy sql, params, count), (new sql, params, count)) for one route."""
+    buffer = ROUTE_BUFFER_METERS
+    interval = (from_date, to_date)
+
+    def jams_and_alerts(rows):
+        # legacy rows repeat the alert total on every row
+        return sum(row[0] or 0 for row in rows), rows[0][6] if rows else 0
+
+    def hourly(rows):
+        return sum(row[0] or 0 for row in rows), sum(row[6] for row in rows)
+
+    return [
+        ("data_for_plot_drawer",
+         (LEGACY_SUM_STATISTICS_WITH_ROUTE, (wkt, buffer) + interval + (wkt, buffer) + interval, jams_and_alerts),
+         (QUERY_SUM_STATISTICS_WITH_ROUTE, interval + (wkt, buffer) + interval + interval, hourly)),
+        # the original totals query referenced non-existent geom columns, the legacy hourly one counts the same
+        ("total_stats",
+         (LEGACY_SUM_STATISTICS_WITH_ROUTE, (wkt, buffer) + interval + (wkt, buffer) + interval, jams_and_alerts),
+         (QUERY_TOTAL_STATISTICS_WITH_ROUTE, (wkt, buffer) + interval + interval, lambda rows: (rows[0][0], rows[0][5]))),
+        ("data_for_plot_alerts",
+         (LEGACY_ALERTS_WITH_ROUTE, interval + (wkt, buffer), lambda rows: (None, len(rows))),
+         (QUERY_ALERTS_WITH_ROUTE, (wkt, buffer) + interval, lambda rows: (None, len(rows)))),
+    ]
+
+
+def main(args):
+    from connection_to_db import CONN_BRNO
+
+    from_date = datetime.strptime(args[0], "%Y-%m-%d")
+    to_date = datetime.strptime(args[1], "%Y-%m-%d") + timedelta(days=1)  # include whole 'to' day
+
+    try:
+        routes = synthetic_routes(CONN_BRNO, from_date, to_date)
+        if not routes:
+            print("V intervale nie sú žiadne zápchy")
+            return
+
+        print(f"Čas dotazov (ms, medián z {REPEATS}), koridor {ROUTE_BUFFER_METERS} m:")
+        for route_name, wkt, length_km in routes:
+            print(f"\n  Trasa {route_name}, {length_km:.1f} km")
+            for name, legacy, new in route_queries(wkt, from_date, to_date):
+                legacy_ms = time_query(CONN_BRNO, legacy[0], legacy[1])
+                new_ms = time_query(CONN_BRNO, new[0], new[1])
+                legacy_counts = fetch_counts(CONN_BRNO, *legacy)
+                new_counts = fetch_counts(CONN_BRNO, *new)
+                speedup = legacy_ms / new_ms if new_ms else 0
+                status = "zhoda" if legacy_counts == new_counts else f"ROZDIEL {legacy_counts} vs {new_counts}"
+                print(f"    {name:<22} {legacy_ms:10.1f} -> {new_ms:10.1f}  ({speedup:.1f}x, {status})")
+    finally:
+        CONN_BRNO.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,104 @@
+"""
+Disk footprint and homepage query times of jams/alerts before and after the
+TimescaleDB policies (see timescale_policies.py).
+
+    python benchmark_timescale.py 2025-01-01 2025-02-01            # measure only
+    python benchmark_timescale.py 2025-01-01 2025-02-01 --apply    # measure, apply policies, measure again
+
+The queries are the ones behind the homepage endpoints (Analyticity-backend
+constants/queries.py), each run BENCHMARK_REPEATS times after one warm-up run;
+the median is reported.
+"""
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "Analyticity-backend", "AnalyticityBackend"))
+
+from constants.queries import (QUERY_ALERTS_TYPES_BASE, QUERY_SUM_STATISTICS, QUERY_TOP_STREETS_ALERTS_BASE,
+                               QUERY_TOP_STREETS_BOTH_BASE, QUERY_TOP_STREETS_JAMS_BASE, QUERY_TOTAL_STATISTICS)
+from timescale_policies import POLICIES, apply_policies, table_status
+
+REPEATS = int(os.getenv("BENCHMARK_REPEATS", "5"))
+
+
+def homepage_queries(from_date, to_date):
+    """(name, sql, params) of the homepage queries for the interval."""
+    interval = (from_date, to_date)
+    return [
+        ("data_for_plot_drawer", QUERY_SUM_STATISTICS, (from_date, to_date) + interval + interval),
+        ("total_stats", QUERY_TOTAL_STATISTICS, interval + interval),
+        ("top_streets_jams", QUERY_TOP_STREETS_JAMS_BASE, interval + (10,)),
+        ("top_streets_alerts", QUERY_TOP_STREETS_ALERTS_BASE, interval + (10,)),
+        ("top_streets_both", QUERY_TOP_STREETS_BOTH_BASE, interval + (10,) + interval + (10,)),
+        ("alerts_types", QUERY_ALERTS_TYPES_BASE, interval),
+    ]
+
+
+def time_query(conn, sql, params, repeats=REPEATS):
+    """Median wall time (ms) of executing and fetching the query."""
+    timings = []
+    with conn.cursor() as cur:
+        for run in range(repeats + 1):
+            started = time.perf_counter()
+            cur.execute(sql, params)
+            cur.fetchall()
+            if run:  # first run warms the cache
+                timings.append((time.perf_counter() - started) * 1000)
+    conn.rollback()
+    return statistics.median(timings)
+
+
+def measure(conn, from_date, to_date):
+    sizes = {name: table_status(conn, policy) for name, policy in POLICIES.items()}
+    timings = {name: time_query(conn, sql, params) for name, sql, params in homepage_queries(from_date, to_date)}
+    return sizes, timings
+
+
+def print_report(before, after=None):
+    print("\nVeľkosť na disku (MB):")
+    for table, status in before[0].items():
+        line = f"  {table:<8} {status['total_bytes'] / 1e6:10.1f}"
+        if after:
+            new = after[0][table]
+            ratio = status["total_bytes"] / new["total_bytes"] if new["total_bytes"] else 0
+            line += f" -> {new['total_bytes'] / 1e6:10.1f}  ({ratio:.1f}x, chunkov {new['chunks']}, " \
+                    f"skomprimovaných {new['compressed_chunks']})"
+        print(line)
+
+    print("\nČas dotazov (ms, medián):")
+    for name, ms in before[1].items():
+        line = f"  {name:<20} {ms:10.1f}"
+        if after:
+            line += f" -> {after[1][name]:10.1f}"
+        print(line)
+
+
+def main(args):
+    from connection_to_db import CONN_BRNO
+
+    apply = "--apply" in args
+    dates = [arg for arg in args if not arg.startswith("--")]
+    from_date = datetime.strptime(dates[0], "%Y-%m-%d")
+    to_date = datetime.strptime(dates[1], "%Y-%m-%d") + timedelta(days=1)  # include whole 'to' day
+
+    try:
+        before = measure(CONN_BRNO, from_date, to_date)
+        after = None
+        if apply:
+            apply_policies(CONN_BRNO)
+            with CONN_BRNO.cursor() as cur:
+                for policy in POLICIES.values():
+                    cur.execute(f"ANALYZE {policy.table};")
+            CONN_BRNO.commit()
+            after = measure(CONN_BRNO, from_date, to_date)
+        print_report(before, after)
+    finally:
+        CONN_BRNO.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,264 @@
+import json
+import os
+import time
+
+from csv_schema import read_batch, to_copy_buffer
+from streets_dict import add_names_sql
+
+# Rows per COPY batch, overridable for all loaders with LOADER_BATCH_SIZE
+DEFAULT_BATCH_SIZE = int(os.getenv("LOADER_BATCH_SIZE", "50000"))
+
+# Checkpoints go next to the CSV unless LOADER_CHECKPOINT_DIR is set (the data dir is read-only in Docker)
+CHECKPOINT_DIR = os.getenv("LOADER_CHECKPOINT_DIR")
+
+# Files smaller than this per part are not split for parallel loading
+DEFAULT_MIN_PART_BYTES = 64 * 1024 * 1024
+
+# Read size of the quote scan in split_csv
+SCAN_CHUNK_BYTES = 16 * 1024 * 1024
+
+class StagingTable:
+    """
+    Unlogged staging table with the columns of the target table.
+
+    Rows are streamed in with COPY FROM STDIN and merged into the target
+    (hypertable) with one set-based INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+    With a `street_column` new street names go to streets_dict first and the
+    merge fills street_id (skipped for a database without the dictionary).
+    """
+
+    def __init__(self, conn, table, columns, conflict_columns, order_by=None, part=None, street_column=None):
+        self.conn = conn
+        self.table = table
+        # Parallel loaders of the same table each get their own staging table
+        self.staging = f"{table}_staging" if part is None else f"{table}_staging_{part}"
+        self.columns = ", ".join(columns)
+        self.staged_columns = ", ".join(f"s.{column}" for column in columns)
+        self.conflict_columns = ", ".join(conflict_columns)
+        # Inserting in time order keeps writes within one hypertable chunk at a time
+        self.order_by = f"ORDER BY s.{order_by}" if order_by else ""
+        self.street_column = street_column
+
+    def create(self):
+        with self.conn.cursor() as cur:
+            cur.execute(
+                f"CREATE UNLOGGED TABLE IF NOT EXISTS {self.staging} "
+                f"(LIKE {self.table} INCLUDING DEFAULTS)"
+            )
+            cur.execute(f"TRUNCATE {self.staging}")
+            if self.street_column:
+                cur.execute("SELECT to_regclass('streets_dict') IS NOT NULL;")
+                if not cur.fetchone()[0]:
+                    print(f"[{self.table}] tabuľka streets_dict chýba (streets_dict.py), street_id sa nevyplní")
+                    self.street_column = None
+        self.conn.commit()
+
+    def copy(self, buffer):
+        buffer.seek(0)
+        with self.conn.cursor() as cur:
+            cur.copy_expert(f"COPY {self.staging} ({self.columns}) FROM STDIN", buffer)
+
+    def merge(self):
+        """Move staged rows into the target table, returns the number of inserted rows."""
+        with self.conn.cursor() as cur:
+            if self.street_column:
+                street = f"s.{self.street_column}"
+                cur.execute(add_names_sql(f"{self.staging} s", street))
+                cur.execute(f"""
+                    INSERT INTO {self.table} ({self.columns}, street_id)
+                    SELECT {self.staged_columns}, d.street_id FROM {self.staging} s
+                    LEFT JOIN streets_dict d ON d.name_key = street_key({street})
+                    {self.order_by}
+                    ON CONFLICT ({self.conflict_columns}) DO NOTHING
+                """)
+            else:
+                cur.execute(f"""
+                    INSERT INTO {self.table} ({self.columns})
+                    SELECT {self.staged_columns} FROM {self.staging} s
+                    {self.order_by}
+                    ON CONFLICT ({self.conflict_columns}) DO NOTHING
+                """)
+            inserted = cur.rowcount
+            cur.execute(f"TRUNCATE {self.staging}")
+        return inserted
+
+    def drop(self):
+        with self.conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {self.staging}")
+        self.conn.commit()
+
+
+class Checkpoint:
+    """
+    Progress of one CSV load (`<csv>.checkpoint`, `<csv>.<start>-<end>.checkpoint` for a byte range).
+
+    Written after every committed batch; holds the byte offset right after the last
+    processed record, so a restarted load seeks there instead of re-reading the file.
+    """
+
+    def __init__(self, csv_path, start=0, end=None):
+        name = os.path.basename(csv_path)
+        if start or end is not None:
+            name = f"{name}.{start}-{end}"
+        directory = CHECKPOINT_DIR or os.path.dirname(os.path.abspath(csv_path))
+        self.path = os.path.join(directory, f"{name}.checkpoint")
+        self.size = os.path.getsize(csv_path)
+
+    def load(self):
+        """Returns (offset, rows read, rows inserted) of the previous run, or zeros."""
+        if not os.path.exists(self.path):
+            return 0, 0, 0
+        with open(self.path, encoding='utf-8') as file:
+            state = json.load(file)
+        if state.get("size") != self.size or state.get("offset", 0) > self.size:
+            print(f"Checkpoint {self.path} nezodpovedá súboru, načítava sa od začiatku")
+            return 0, 0, 0
+        return state["offset"], state["rows"], state["inserted"]
+
+    def save(self, offset, rows, inserted):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding='utf-8') as file:
+            json.dump({"offset": offset, "rows": rows, "inserted": inserted, "size": self.size}, file)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def read_csv_batches(csv_path, batch_size, offset=0, end=None):
+    """
+    Yield (header, raw CSV bytes, byte offset after the batch) with up to `batch_size` records each,
+    starting at `offset`.
+
+    The file is read in binary so offsets are exact. A record ends on a line where the count of
+    quote characters seen so far is even, so quoted fields spanning lines stay in one batch. With
+    `end` only records starting before that offset are read.
+    """
+    with open(csv_path, "rb") as file:
+        header = file.readline()
+        position = file.tell()
+        if offset > position:
+            file.seek(offset)
+            position = offset
+        if end is not None and position >= end:
+            return
+
+        lines = []
+        records = 0
+        in_quotes = False
+        for line in file:
+            position += len(line)
+            lines.append(line)
+            if line.count(b'"') % 2:
+                in_quotes = not in_quotes
+            if in_quotes:
+                continue
+            records += 1
+            reached_end = end is not None and position >= end
+            if records >= batch_size or reached_end:
+                yield header, b"".join(lines), position
+                lines = []
+                records = 0
+                if reached_end:
+                    return
+        if lines:
+            yield header, b"".join(lines), position
+
+
+def split_csv(csv_path, parts, min_part_bytes=DEFAULT_MIN_PART_BYTES):
+    """
+    Split a CSV into up to `parts` byte ranges [start, end) starting on record boundaries.
+
+    A line end is a record boundary only outside quotes, and whether a byte is inside quotes
+    is known only from a record start. The file is therefore scanned once from the first data
+    line: quotes are counted in SCAN_CHUNK_BYTES chunks up to each target offset, then lines
+    are read until one ends outside quotes, as read_csv_batches counts them.
+    """
+    size = os.path.getsize(csv_path)
+    with open(csv_path, "rb") as file:
+        file.readline()
+        data_start = file.tell()
+
+        parts = max(1, min(parts, (size - data_start) // max(1, min_part_bytes)))
+        boundaries = [data_start]
+        in_quotes = False
+        for i in range(1, parts):
+            target = data_start + (size - data_start) * i // parts
+            while file.tell() < target:
+                chunk = file.read(min(SCAN_CHUNK_BYTES, target - file.tell()))
+                in_quotes ^= chunk.count(b'"') % 2 == 1
+            while True:
+                line = file.readline()
+                if not line:
+                    break
+                in_quotes ^= line.count(b'"') % 2 == 1
+                if not in_quotes:
+                    break
+            boundary = file.tell()
+            if boundaries[-1] < boundary < size:
+                boundaries.append(boundary)
+        boundaries.append(size)
+
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if start < end]
+
+
+def copy_csv_to_table(csv_path, conn, schema, batch_size=DEFAULT_BATCH_SIZE, resume=True,
+                      start=0, end=None, part=None):
+    """
+    Stream a CSV (or its byte range [start, end), see `split_csv`) into `schema.table`
+    through COPY in batches of `batch_size` rows.
+
+    Each batch is parsed and coerced by the schema (see csv_schema), copied into the
+    staging table, merged and committed, so memory stays bounded by one batch. After
+    every commit the position is written to a checkpoint file; with `resume` a later
+    run continues from it (re-running the last batch after a crash is harmless thanks
+    to ON CONFLICT DO NOTHING). Rows failing coercion are reported and skipped.
+
+    Returns (rows read, rows inserted).
+    """
+    table = schema.table
+    label = table if part is None else f"{table}#{part}"
+    checkpoint = Checkpoint(csv_path, start, end)
+    offset, rows_read, rows_inserted = checkpoint.load() if resume else (0, 0, 0)
+    if offset:
+        print(f"[{label}] pokračuje sa od riadku {rows_read} (bajt {offset}) podľa {checkpoint.path}")
+    offset = max(offset, start)
+
+    staging = StagingTable(conn, table, schema.column_names, schema.conflict_columns, schema.order_by, part,
+                           schema.street_column)
+    staging.create()
+
+    started = time.monotonic()
+    rows_at_start = rows_read
+
+    try:
+        for header, data, position in read_csv_batches(csv_path, batch_size, offset, end):
+            rows = read_batch(header, data, [column.source or column.name for column in schema.columns])
+            buffer, buffered, rejected = to_copy_buffer(schema, rows)
+            rows_read += len(rows)
+            for _, row in rejected.iterrows():
+                print(f"Chyba pri spracovaní riadku: {row.to_dict()}")
+
+            if buffered:
+                staging.copy(buffer)
+                rows_inserted += staging.merge()
+                conn.commit()
+            checkpoint.save(position, rows_read, rows_inserted)
+
+            elapsed = time.monotonic() - started
+            print(f"[{label}] {rows_read} riadkov načítaných, {rows_inserted} vložených "
+                  f"({(rows_read - rows_at_start) / elapsed if elapsed else 0:.0f} riadkov/s)")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        staging.drop()
+
+    checkpoint.clear()
+
+    elapsed = time.monotonic() - started
+    print(f"[{label}] hotovo: {rows_inserted} z {rows_read} riadkov vložených zo súboru {csv_path} "
+          f"za {elapsed:.1f} s ({(rows_read - rows_at_start) / elapsed if elapsed else 0:.0f} riadkov/s)")
+    return rows_read, rows_inserted
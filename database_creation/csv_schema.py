@@ -0,0 +1,148 @@
+"""
+Declarative CSV -> table schemas for the loaders.
+
+A schema lists the target columns once, with the CSV column each one is read from
+and how it is coerced. Batches are parsed with pandas (all columns as strings),
+coerced column by column and rendered straight into COPY text format.
+"""
+import io
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Coercions
+TEXT = "text"                  # value as is, '' stays ''
+TEXT_OR_NULL = "text_or_null"  # '' -> NULL
+INT = "int"                    # '' -> NULL
+INT_FROM_FLOAT = "int_from_float"  # '12.0' -> 12
+FLOAT = "float"
+BOOL = "bool"                  # 'true' (any case) -> t, anything else -> f, '' -> NULL
+BOOL_OR_FALSE = "bool_or_false"    # like BOOL, but '' -> f
+CONST = "const"                # fixed value
+DERIVED = "derived"            # computed from the whole batch by `derive`
+
+NULL = r"\N"
+
+# BIGINT bounds as digits, without the sign
+_INT64_MAX_DIGITS = str(np.iinfo(np.int64).max)
+_INT64_MIN_DIGITS = str(np.iinfo(np.int64).min)[1:]
+
+
+class Column(NamedTuple):
+    name: str
+    kind: str
+    source: Optional[str] = None      # CSV column, defaults to `name`
+    required: bool = False            # '' is an error instead of NULL
+    value: object = None              # CONST value
+    derive: Optional[Callable[[pd.DataFrame], pd.Series]] = None
+
+
+class Schema(NamedTuple):
+    table: str
+    columns: Tuple[Column, ...]
+    conflict_columns: Tuple[str, ...]
+    order_by: Optional[str] = None
+    street_column: Optional[str] = None   # encoded to street_id through streets_dict on merge
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column.name for column in self.columns]
+
+
+def _escape(values: pd.Series) -> pd.Series:
+    """Escape text for the COPY text format."""
+    return (values.str.replace("\\", "\\\\", regex=False)
+                  .str.replace("\t", "\\t", regex=False)
+                  .str.replace("\n", "\\n", regex=False)
+                  .str.replace("\r", "\\r", regex=False))
+
+
+def _numeric(raw: pd.Series, kind: str) -> Tuple[pd.Series, np.ndarray]:
+    """Parse numbers, returns (COPY text, mask of invalid non-empty values)."""
+    empty = (raw == "").to_numpy()
+
+    if kind == INT:
+        # Same literals int() accepts, kept as text so BIGINTs don't pass through float
+        literal = raw.str.fullmatch(r"\s*[+-]?\d+\s*").to_numpy()
+        stripped = raw[literal].str.strip()
+        # BIGINT range checked on the digits, a batch mixing in- and out-of-range values
+        # would otherwise come back from to_numeric as float64
+        digits = stripped.str.lstrip("+-").str.lstrip("0")
+        limit = np.where(stripped.str.startswith("-"), _INT64_MIN_DIGITS, _INT64_MAX_DIGITS)
+        in_range = (digits.str.len() < len(_INT64_MAX_DIGITS)) | (
+            (digits.str.len() == len(_INT64_MAX_DIGITS)) & (digits.to_numpy(dtype=object) <= limit))
+        numbers = pd.to_numeric(stripped[in_range], errors="coerce")
+        valid = numbers.notna().reindex(raw.index, fill_value=False).to_numpy()
+        text = numbers[numbers.notna()].astype(np.int64).astype(str).reindex(raw.index)
+        return text, ~valid & ~empty
+
+    numbers = pd.to_numeric(raw.where(~empty), errors="coerce")
+    if kind == FLOAT:
+        text = numbers.astype(str).where(numbers.notna())
+        return text, numbers.isna().to_numpy() & ~empty
+
+    # int(float(value)) fails for nan/inf as well, values past BIGINT would wrap in astype
+    floats = numbers.to_numpy(dtype=float)
+    finite = np.isfinite(floats) & (floats >= -2.0 ** 63) & (floats < 2.0 ** 63)
+    text = numbers[finite].astype(np.int64).astype(str).reindex(raw.index)
+    return text, ~finite & ~empty
+
+
+def _column_text(column: Column, raw: pd.DataFrame) -> Tuple[pd.Series, np.ndarray]:
+    """COPY text of one column (NaN = NULL) and the mask of rows failing coercion."""
+    n = len(raw)
+    no_errors = np.zeros(n, dtype=bool)
+
+    if column.kind == CONST:
+        return pd.Series([NULL if column.value is None else str(column.value)] * n, index=raw.index), no_errors
+    if column.kind == DERIVED:
+        return column.derive(raw).astype(str), no_errors
+
+    values = raw[column.source or column.name]
+    empty = (values == "").to_numpy()
+    errors = empty & column.required
+
+    if column.kind == TEXT:
+        return _escape(values), errors
+    if column.kind == TEXT_OR_NULL:
+        return _escape(values).where(~empty), errors
+    if column.kind in (BOOL, BOOL_OR_FALSE):
+        text = pd.Series(np.where(values.str.lower() == "true", "t", "f"), index=raw.index)
+        return (text if column.kind == BOOL_OR_FALSE else text.where(~empty)), errors
+
+    text, invalid = _numeric(values, column.kind)
+    return text, errors | invalid
+
+
+def to_copy_buffer(schema: Schema, raw: pd.DataFrame) -> Tuple[io.StringIO, int, pd.DataFrame]:
+    """
+    Render a batch of raw CSV rows (all strings) as COPY text.
+
+    Returns (buffer, number of rows written, rejected raw rows).
+    """
+    texts = []
+    rejected = np.zeros(len(raw), dtype=bool)
+    for column in schema.columns:
+        text, errors = _column_text(column, raw)
+        texts.append(text)
+        rejected |= errors
+
+    keep = ~rejected
+    columns = [text[keep].fillna(NULL) for text in texts]
+    buffer = io.StringIO()
+    if keep.any():
+        lines = columns[0].str.cat(columns[1:], sep="\t")
+        buffer.write("\n".join(lines.tolist()))
+        buffer.write("\n")
+    return buffer, int(keep.sum()), raw[rejected]
+
+
+def read_batch(header: bytes, data: bytes, columns: Sequence[str]) -> pd.DataFrame:
+    """Parse raw CSV bytes (with the header line) into a DataFrame of strings."""
+    frame = pd.read_csv(io.BytesIO(header + data), dtype=str, keep_default_na=False, na_filter=False,
+                        encoding="utf-8", skip_blank_lines=True)
+    missing = [name for name in columns if name not in frame.columns]
+    for name in missing:
+        frame[name] = ""
+    return frame.fillna("")
@@ -9,6 +9,7 @@ CREATE TABLE IF NOT EXISTS jams (
     city TEXT,
     turn_type TEXT,
     street TEXT,
+    street_id INTEGER,  -- streets_dict
     end_node TEXT,
     start_node TEXT,
     road_type INTEGER,
@@ -44,6 +45,19 @@ CREATE TABLE IF NOT EXISTS jams (
 SELECT create_hypertable('jams', 'published_at', if_not_exists => TRUE);
 
 
+-- Slovník názvov ulíc: normalizovaný názov (street_key) -> celočíselné id. Plní ho loader pri vkladaní zápch
+-- a alertov a streets_dict.py z streets_exploded.geojson; filtre a group-by v backende pracujú so street_id
+CREATE OR REPLACE FUNCTION street_key(name TEXT) RETURNS TEXT
+    LANGUAGE SQL IMMUTABLE PARALLEL SAFE
+    AS $$ SELECT NULLIF(lower(btrim(name)), '') $$;
+
+CREATE TABLE IF NOT EXISTS streets_dict (
+    street_id SERIAL PRIMARY KEY,
+    name_key TEXT NOT NULL UNIQUE,  -- street_key(name)
+    name TEXT NOT NULL              -- zobrazovaný názov (prvý vložený tvar)
+);
+
+
 -- Tabuľka ALERTS
 CREATE TABLE IF NOT EXISTS alerts (
     uuid UUID,
@@ -52,6 +66,7 @@ CREATE TABLE IF NOT EXISTS alerts (
     type TEXT,
     subtype TEXT,
     street TEXT,
+    street_id INTEGER,  -- streets_dict
     report_rating INTEGER,
     confidence INTEGER,
     reliability INTEGER,
@@ -150,5 +165,37 @@ SELECT create_hypertable('nehody', 'p2a', if_not_exists => TRUE);
 
 CREATE INDEX IF NOT EXISTS idx_jams_jam_line ON jams USING GIST(jam_line);
 CREATE INDEX IF NOT EXISTS idx_alerts_location ON alerts USING GIST(location);
+-- Route filtre (ST_Intersects s koridorom trasy) pracujú v geometry
+CREATE INDEX IF NOT EXISTS idx_jams_jam_line_geom ON jams USING GIST((jam_line::geometry));
+CREATE INDEX IF NOT EXISTS idx_alerts_location_geom ON alerts USING GIST((location::geometry));
+CREATE INDEX IF NOT EXISTS idx_jams_street_id ON jams (street_id, published_at DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_street_id ON alerts (street_id, published_at DESC);
 CREATE INDEX IF NOT EXISTS idx_accidents_geom ON nehody USING GIST(geom);
 CREATE INDEX IF NOT EXISTS idx_accidents_geog ON nehody USING GIST(geog);
+
+-- Cache koridorov trás (Analyticity-backend helpers/route_cache.py): koridor trasy a id zápch/alertov v ňom
+-- pre súvislé okno [covered_from, covered_to); okno sa pri ďalších dotazoch na trasu rozširuje
+CREATE TABLE IF NOT EXISTS route_corridors (
+    route_hash TEXT PRIMARY KEY,
+    route GEOMETRY(LINESTRING, 4326) NOT NULL,
+    buffer_m DOUBLE PRECISION NOT NULL,
+    corridor GEOMETRY(GEOMETRY, 4326) NOT NULL,
+    covered_from TIMESTAMPTZ,
+    covered_to TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    last_used TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS route_corridor_jams (
+    route_hash TEXT REFERENCES route_corridors ON DELETE CASCADE,
+    published_at TIMESTAMPTZ,
+    uuid INTEGER,
+    PRIMARY KEY (route_hash, published_at, uuid)
+);
+
+CREATE TABLE IF NOT EXISTS route_corridor_alerts (
+    route_hash TEXT REFERENCES route_corridors ON DELETE CASCADE,
+    published_at TIMESTAMPTZ,
+    uuid UUID,
+    PRIMARY KEY (route_hash, published_at, uuid)
+);
@@ -0,0 +1,115 @@
+"""
+Parallel bootstrap of the Brno database.
+
+All three datasets are loaded at once; large CSVs are split into byte ranges
+(see bulk_copy.split_csv) and every range is loaded by its own process with
+its own connection, staging table and COPY stream.
+
+    python load_all.py [alerts jams nehody]
+
+LOADER_WORKERS sets the number of processes (default: CPU count).
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bulk_copy import DEFAULT_BATCH_SIZE, copy_csv_to_table, split_csv
+from load_alerts_from_csv_to_db import ALERTS_SCHEMA
+from load_jams_from_csv_to_db import JAMS_SIMPLIFIED_SCHEMA
+from load_nehody_from_csv_to_db import NEHODY_SCHEMA
+
+# dataset -> (csv path, schema)
+DATASETS = {
+    "alerts": ("../data/brno_alerts.csv", ALERTS_SCHEMA),
+    "jams": ("../data/brno_jams.csv", JAMS_SIMPLIFIED_SCHEMA),
+    "nehody": ("../data/brno_nehody.csv", NEHODY_SCHEMA),
+}
+
+WORKERS = int(os.getenv("LOADER_WORKERS", os.cpu_count() or 1))
+
+
+def load_part(dataset, start, end, part):
+    from connection_to_db import connect_brno
+
+    csv_path, schema = DATASETS[dataset]
+    started = time.monotonic()
+    conn = connect_brno()
+    try:
+        rows_read, rows_inserted = copy_csv_to_table(
+            csv_path, conn, schema, DEFAULT_BATCH_SIZE, True, start, end, part,
+        )
+    finally:
+        conn.close()
+    return dataset, rows_read, rows_inserted, time.monotonic() - started
+
+
+def reset_route_cache():
+    """
+    Loaded rows may fall into windows the backend route corridor cache already covers
+    (route_corridors); drop the cached ids, corridors stay and are re-filled on the next query.
+    """
+    from connection_to_db import connect_brno
+
+    conn = connect_brno()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('route_corridors') IS NOT NULL;")
+            if cur.fetchone()[0]:
+                cur.execute("TRUNCATE route_corridor_jams, route_corridor_alerts;")
+                cur.execute("UPDATE route_corridors SET covered_from = NULL, covered_to = NULL;")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def refresh_rollups(datasets):
+    """
+    Materialize the hourly rollups of the loaded hypertables right away (timescale_policies.ROLLUPS):
+    loaded hours older than the materialized ones are not aggregated at query time, until the next
+    policy run the rollups would miss them.
+    """
+    from connection_to_db import connect_brno
+    from timescale_policies import refresh_existing_rollups
+
+    conn = connect_brno()
+    try:
+        refresh_existing_rollups(conn, datasets)
+    finally:
+        conn.close()
+
+
+def load_all(datasets, workers=WORKERS):
+    started = time.monotonic()
+
+    jobs = []
+    for dataset in datasets:
+        csv_path = DATASETS[dataset][0]
+        ranges = split_csv(csv_path, workers)
+        print(f"[{dataset}] {csv_path}: {os.path.getsize(csv_path) / 1e6:.0f} MB v {len(ranges)} častiach")
+        jobs.extend((dataset, start, end, part) for part, (start, end) in enumerate(ranges))
+
+    totals = {dataset: [0, 0, 0.0] for dataset in datasets}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(load_part, *job) for job in jobs]
+        for future in as_completed(futures):
+            dataset, rows_read, rows_inserted, elapsed = future.result()
+            totals[dataset][0] += rows_read
+            totals[dataset][1] += rows_inserted
+            totals[dataset][2] += elapsed
+
+    if {"alerts", "jams"} & set(datasets):
+        reset_route_cache()
+        refresh_rollups(datasets)
+
+    wall_time = time.monotonic() - started
+    worker_time = sum(total[2] for total in totals.values())
+    for dataset, (rows_read, rows_inserted, elapsed) in totals.items():
+        print(f"[{dataset}] {rows_inserted} z {rows_read} riadkov vložených, čas procesov {elapsed:.1f} s")
+    print(f"Bootstrap hotový za {wall_time:.1f} s "
+          f"(súčet časov procesov {worker_time:.1f} s ~ postupné načítanie, {workers} procesov)")
+    return wall_time
+
+
+if __name__ == "__main__":
+    load_all(sys.argv[1:] or list(DATASETS))
@@ -0,0 +1,145 @@
+"""
+Street name dictionary (streets_dict) of the jams and alerts hypertables.
+
+Street names are normalized by the SQL function street_key() (trimmed, lower case, '' = NULL)
+and mapped to integer ids; jams and alerts carry the id in street_id, the backend filters and
+groups by it. init.sql creates the dictionary, the loaders (bulk_copy) add new names and fill
+street_id on insert. This script brings a database up to date, all steps are idempotent:
+
+- creates street_key(), streets_dict, the street_id columns and their indexes when missing,
+- adds the street names of the map layer (streets_exploded.geojson, `nazev`),
+- adds the names of rows without street_id and fills it, one hypertable chunk per transaction
+  (run it before the chunks are compressed, updates of compressed chunks decompress them).
+
+    python streets_dict.py            # everything
+    python streets_dict.py geojson    # only the map layer names
+    python streets_dict.py status     # dictionary size, rows without street_id, index sizes
+"""
+import json
+import os
+import sys
+
+STREETS_GEOJSON = os.getenv("STREETS_GEOJSON", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "Analyticity-backend", "AnalyticityBackend", "datasets",
+    "streets_exploded.geojson"))
+
+TABLES = ("jams", "alerts")
+
+# Same objects as in init.sql, for databases created before the dictionary
+SCHEMA_SQL = """
+CREATE OR REPLACE FUNCTION street_key(name TEXT) RETURNS TEXT
+    LANGUAGE SQL IMMUTABLE PARALLEL SAFE
+    AS $$ SELECT NULLIF(lower(btrim(name)), '') $$;
+
+CREATE TABLE IF NOT EXISTS streets_dict (
+    street_id SERIAL PRIMARY KEY,
+    name_key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL
+);
+
+ALTER TABLE jams ADD COLUMN IF NOT EXISTS street_id INTEGER;
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS street_id INTEGER;
+CREATE INDEX IF NOT EXISTS idx_jams_street_id ON jams (street_id, published_at DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_street_id ON alerts (street_id, published_at DESC);
+"""
+
+
+def add_names_sql(source: str, name: str, where: str = "") -> str:
+    """
+    INSERT of the street names `name` of `source` missing in the dictionary. Keys are inserted
+    sorted, so concurrent loaders lock the same new names in the same order.
+    """
+    return f"""
+        INSERT INTO streets_dict (name_key, name)
+        SELECT DISTINCT ON (street_key({name})) street_key({name}), btrim({name})
+        FROM {source}
+        WHERE street_key({name}) IS NOT NULL{where}
+        ORDER BY street_key({name}), btrim({name})
+        ON CONFLICT (name_key) DO NOTHING
+    """
+
+
+def ensure_schema(conn):
+    with conn.cursor() as cur:
+        cur.execute(SCHEMA_SQL)
+    conn.commit()
+    print("streets_dict: schéma pripravená")
+
+
+def import_geojson_names(conn, path=STREETS_GEOJSON):
+    """Add the `nazev` of every feature of the map layer."""
+    if not os.path.exists(path):
+        print(f"streets_dict: {path} neexistuje, názvy mapovej vrstvy sa nepridajú")
+        return
+    with open(path, encoding="utf-8") as file:
+        features = json.load(file).get("features", [])
+    names = [feature.get("properties", {}).get("nazev") for feature in features]
+    names = [name for name in names if isinstance(name, str)]
+
+    with conn.cursor() as cur:
+        cur.execute(add_names_sql("unnest(%s::text[]) AS n(name)", "n.name"), (names,))
+        added = cur.rowcount
+    conn.commit()
+    print(f"streets_dict: {added} nových názvov z {path} ({len(set(names))} rôznych)")
+
+
+def backfill_street_ids(conn, table):
+    """Dictionary names and street_id of rows loaded without them, one chunk per transaction."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT range_start, range_end FROM timescaledb_information.chunks
+            WHERE hypertable_name = %s ORDER BY range_start;
+        """, (table,))
+        ranges = cur.fetchall()
+    conn.commit()
+
+    updated = 0
+    for number, (start, end) in enumerate(ranges, 1):
+        window = " AND street_id IS NULL AND published_at >= %s AND published_at < %s"
+        with conn.cursor() as cur:
+            cur.execute(add_names_sql(table, "street", window), (start, end))
+            cur.execute(f"""
+                UPDATE {table} t SET street_id = d.street_id
+                FROM streets_dict d
+                WHERE t.street_id IS NULL AND t.published_at >= %s AND t.published_at < %s
+                  AND d.name_key = street_key(t.street);
+            """, (start, end))
+            updated += cur.rowcount
+        conn.commit()
+        print(f"[{table}] chunk {number}/{len(ranges)}: street_id doplnené, spolu {updated} riadkov")
+
+
+def print_status(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT count(*) FROM streets_dict;")
+        print(f"streets_dict: {cur.fetchone()[0]} ulíc")
+        for table in TABLES:
+            cur.execute(f"SELECT count(*) FROM {table} WHERE street_id IS NULL AND street_key(street) IS NOT NULL;")
+            missing = cur.fetchone()[0]
+            cur.execute("""
+                SELECT COALESCE(SUM(pg_relation_size(c.oid)), 0)
+                FROM pg_class c
+                WHERE c.relkind = 'i' AND c.relname LIKE %s;
+            """, (f"%idx_{table}_street_id",))
+            index_bytes = cur.fetchone()[0]
+            print(f"[{table}] bez street_id: {missing} riadkov, index street_id {index_bytes / 1e6:.1f} MB")
+    conn.rollback()
+
+
+if __name__ == "__main__":
+    from connection_to_db import CONN_BRNO
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "all"
+    try:
+        if command == "status":
+            print_status(CONN_BRNO)
+        elif command == "geojson":
+            import_geojson_names(CONN_BRNO)
+        else:
+            ensure_schema(CONN_BRNO)
+            import_geojson_names(CONN_BRNO)
+            for table in TABLES:
+                backfill_street_ids(CONN_BRNO, table)
+            print_status(CONN_BRNO)
+    finally:
+        CONN_BRNO.close()
@@ -0,0 +1,308 @@
+"""
+TimescaleDB storage policies for the jams and alerts hypertables.
+
+One place for everything init.sql leaves at the defaults:
+
+- chunk interval per hypertable (configured, or estimated from the ingest rate
+  of the data already loaded so that one chunk is about TIMESCALE_CHUNK_TARGET_MB),
+- native compression with segmentby street_id / orderby published_at, applied by a
+  policy to chunks older than TIMESCALE_COMPRESS_AFTER,
+- optional retention (TIMESCALE_RETENTION, empty = keep everything),
+- hourly per-street rollups (continuous aggregates) read by the dashboard top-N streets,
+  the alerts one also split by type/subtype for the alert type charts.
+
+All steps are idempotent, the module can be re-run after changing the settings.
+
+    python timescale_policies.py            # intervals + compression + retention, compress old chunks now
+    python timescale_policies.py chunks     # only chunk intervals (before the first load)
+    python timescale_policies.py status     # print current sizes and settings
+    python timescale_policies.py rollups    # only create and refresh the hourly rollups
+"""
+import os
+import sys
+from typing import NamedTuple, Optional
+
+# Compress chunks older than this (historical data is read-only)
+COMPRESS_AFTER = os.getenv("TIMESCALE_COMPRESS_AFTER", "7 days")
+
+# Drop chunks older than this, empty = no retention
+RETENTION = os.getenv("TIMESCALE_RETENTION", "").strip() or None
+
+# Target size of one uncompressed chunk incl. indexes (Timescale recommends ~25 % of memory)
+CHUNK_TARGET_BYTES = int(os.getenv("TIMESCALE_CHUNK_TARGET_MB", "512")) * 1024 * 1024
+
+# Bounds of the estimated chunk interval
+MIN_CHUNK_DAYS = 1
+MAX_CHUNK_DAYS = 90
+
+
+class HypertablePolicy(NamedTuple):
+    table: str
+    time_column: str
+    chunk_interval: str         # used while there is no data to estimate from
+    segmentby: str
+    orderby: str
+
+
+POLICIES = {
+    # ~1 KB per jam (jam_line geography), tens of thousands of jams per day in Brno
+    "jams": HypertablePolicy("jams", "published_at",
+                             os.getenv("TIMESCALE_CHUNK_INTERVAL_JAMS", "7 days"),
+                             "street_id", "published_at DESC"),
+    # alerts are points, an order of magnitude fewer and smaller rows
+    "alerts": HypertablePolicy("alerts", "published_at",
+                               os.getenv("TIMESCALE_CHUNK_INTERVAL_ALERTS", "30 days"),
+                               "street_id", "published_at DESC"),
+}
+
+
+class StreetRollup(NamedTuple):
+    view: str
+    table: str
+    time_column: str
+    columns: str = "street_id"      # grouping columns besides the hour
+    replaces: Optional[str] = None  # earlier view of the same table, dropped when this one is created
+
+    @property
+    def view_columns(self):
+        return ["hour"] + [column.strip() for column in self.columns.split(",")] + ["cnt"]
+
+
+# Hourly counts per street (Analyticity-backend QUERY_TOP_STREETS_BOTH_ROLLUP_*); alerts per
+# street, type and subtype, which also answers the type/subtype breakdown (QUERY_ALERTS_TYPES_ROLLUP_*)
+ROLLUPS = {
+    "jams": StreetRollup("jams_street_hourly", "jams", "published_at"),
+    "alerts": StreetRollup("alerts_hourly", "alerts", "published_at", "street_id, type, subtype",
+                           replaces="alerts_street_hourly"),
+}
+
+# The refresh policy materializes hours older than this; newer ones are aggregated at query time
+ROLLUP_LAG = os.getenv("TIMESCALE_ROLLUP_LAG", "1 hour")
+
+
+def estimate_chunk_interval(conn, policy: HypertablePolicy) -> Optional[str]:
+    """
+    Chunk interval giving chunks of about CHUNK_TARGET_BYTES at the observed ingest rate.
+
+    The rate is the uncompressed size of the hypertable divided by the time span it covers.
+    Returns None for an empty table.
+    """
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT EXTRACT(EPOCH FROM max({policy.time_column}) - min({policy.time_column})) / 86400.0
+            FROM {policy.table};
+        """)
+        span_days = cur.fetchone()[0]
+        if not span_days:
+            return None
+        # Compressed chunks report their size before compression
+        cur.execute("""
+            SELECT COALESCE(SUM(COALESCE(s.before_compression_total_bytes, d.total_bytes)), 0)
+            FROM chunks_detailed_size(%s) d
+            LEFT JOIN chunk_compression_stats(%s) s
+                   ON s.chunk_schema = d.chunk_schema AND s.chunk_name = d.chunk_name;
+        """, (policy.table, policy.table))
+        total_bytes = cur.fetchone()[0]
+
+    bytes_per_day = float(total_bytes) / max(float(span_days), 1.0)
+    if not bytes_per_day:
+        return None
+    days = int(CHUNK_TARGET_BYTES / bytes_per_day)
+    return f"{min(max(days, MIN_CHUNK_DAYS), MAX_CHUNK_DAYS)} days"
+
+
+def apply_chunk_interval(conn, policy: HypertablePolicy, estimate=True):
+    """Set the chunk interval for new chunks (existing chunks keep theirs)."""
+    interval = (estimate_chunk_interval(conn, policy) if estimate else None) or policy.chunk_interval
+    with conn.cursor() as cur:
+        cur.execute("SELECT set_chunk_time_interval(%s, %s::interval);", (policy.table, interval))
+    conn.commit()
+    print(f"[{policy.table}] interval chunkov: {interval}")
+
+
+def apply_compression(conn, policy: HypertablePolicy, compress_after=COMPRESS_AFTER):
+    """Enable native compression (segmentby/orderby) and the compression policy."""
+    with conn.cursor() as cur:
+        # segmentby/orderby can only change while no chunk is compressed
+        cur.execute("SELECT count(*) FROM chunk_compression_stats(%s) WHERE compression_status = 'Compressed';",
+                    (policy.table,))
+        if cur.fetchone()[0]:
+            print(f"[{policy.table}] tabuľka už má skomprimované chunky, segmentby/orderby sa nemenia")
+        else:
+            cur.execute(f"""
+                ALTER TABLE {policy.table} SET (
+                    timescaledb.compress,
+                    timescaledb.compress_segmentby = '{policy.segmentby}',
+                    timescaledb.compress_orderby = '{policy.orderby}'
+                );
+            """)
+
+        cur.execute("SELECT remove_compression_policy(%s, if_exists => TRUE);", (policy.table,))
+        cur.execute("SELECT add_compression_policy(%s, %s::interval);", (policy.table, compress_after))
+    conn.commit()
+    print(f"[{policy.table}] kompresia: segmentby {policy.segmentby}, orderby {policy.orderby}, "
+          f"chunky staršie ako {compress_after}")
+
+
+def apply_retention(conn, policy: HypertablePolicy, retention=RETENTION):
+    """Add (or remove when `retention` is None) the retention policy."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT remove_retention_policy(%s, if_exists => TRUE);", (policy.table,))
+        if retention:
+            cur.execute("SELECT add_retention_policy(%s, %s::interval);", (policy.table, retention))
+    conn.commit()
+    print(f"[{policy.table}] retencia: {retention or 'bez obmedzenia'}")
+
+
+def compress_old_chunks(conn, policy: HypertablePolicy, compress_after=COMPRESS_AFTER):
+    """
+    Compress chunks older than `compress_after` right away instead of waiting for the policy job
+    (after a bulk load almost all data is historical). One chunk per transaction.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT c::text FROM show_chunks(%s, older_than => %s::interval) c
+            EXCEPT
+            SELECT format('%%I.%%I', chunk_schema, chunk_name) FROM chunk_compression_stats(%s)
+            WHERE compression_status = 'Compressed'
+            ORDER BY 1;
+        """, (policy.table, compress_after, policy.table))
+        chunks = [row[0] for row in cur.fetchall()]
+
+    for number, chunk in enumerate(chunks, 1):
+        with conn.cursor() as cur:
+            cur.execute("SELECT compress_chunk(%s::regclass, if_not_compressed => TRUE);", (chunk,))
+        conn.commit()
+        print(f"[{policy.table}] skomprimovaný chunk {number}/{len(chunks)}: {chunk}")
+
+
+def apply_rollup(conn, rollup: StreetRollup, lag=ROLLUP_LAG):
+    """
+    Create the hourly street rollup (real-time continuous aggregate) and its refresh policy.
+    A view of the same name with other columns (earlier definition) is dropped and created again.
+    """
+    with conn.cursor() as cur:
+        if rollup.replaces:
+            cur.execute(f"DROP MATERIALIZED VIEW IF EXISTS {rollup.replaces};")
+        cur.execute("""
+            SELECT array_agg(attname::text ORDER BY attnum) FROM pg_attribute
+            WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped;
+        """, (rollup.view,))
+        columns = cur.fetchone()[0]
+        if columns and columns != rollup.view_columns:
+            print(f"[{rollup.table}] rollup {rollup.view} má staré stĺpce {columns}, vytvára sa znova")
+            cur.execute(f"DROP MATERIALIZED VIEW {rollup.view};")
+        cur.execute(f"""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS {rollup.view}
+            WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+            SELECT time_bucket('1 hour', {rollup.time_column}) AS hour, {rollup.columns}, COUNT(*) AS cnt
+            FROM {rollup.table}
+            GROUP BY hour, {rollup.columns}
+            WITH NO DATA;
+        """)
+        cur.execute("""
+            SELECT add_continuous_aggregate_policy(%s, start_offset => NULL, end_offset => %s::interval,
+                                                   schedule_interval => %s::interval, if_not_exists => TRUE);
+        """, (rollup.view, lag, lag))
+    conn.commit()
+    print(f"[{rollup.table}] hodinový rollup ({rollup.columns}): {rollup.view}")
+
+
+def refresh_rollup(conn, rollup: StreetRollup):
+    """Materialize the whole rollup now (after a bulk load) instead of waiting for the policy job."""
+    conn.commit()
+    autocommit = conn.autocommit
+    conn.autocommit = True  # refresh_continuous_aggregate can't run inside a transaction
+    try:
+        with conn.cursor() as cur:
+            cur.execute("CALL refresh_continuous_aggregate(%s, NULL, NULL);", (rollup.view,))
+    finally:
+        conn.autocommit = autocommit
+    print(f"[{rollup.table}] rollup {rollup.view} obnovený")
+
+
+def table_status(conn, policy: HypertablePolicy):
+    """Disk footprint and chunk/compression counts of a hypertable."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT hypertable_size(%s);", (policy.table,))
+        total_bytes = cur.fetchone()[0] or 0
+        cur.execute("""
+            SELECT count(*),
+                   count(*) FILTER (WHERE compression_status = 'Compressed'),
+                   COALESCE(SUM(before_compression_total_bytes), 0),
+                   COALESCE(SUM(after_compression_total_bytes), 0)
+            FROM chunk_compression_stats(%s);
+        """, (policy.table,))
+        chunks, compressed, before, after = cur.fetchone()
+        cur.execute("""
+            SELECT d.time_interval FROM timescaledb_information.dimensions d
+            WHERE d.hypertable_name = %s AND d.column_name = %s;
+        """, (policy.table, policy.time_column))
+        row = cur.fetchone()
+    return {
+        "table": policy.table,
+        "total_bytes": int(total_bytes),
+        "chunks": chunks,
+        "compressed_chunks": compressed,
+        "before_compression_bytes": int(before),
+        "after_compression_bytes": int(after),
+        "chunk_interval": str(row[0]) if row else None,
+    }
+
+
+def print_status(conn):
+    for policy in POLICIES.values():
+        status = table_status(conn, policy)
+        print(f"[{policy.table}] {status['total_bytes'] / 1e6:.1f} MB, chunkov {status['chunks']} "
+              f"(skomprimovaných {status['compressed_chunks']}), interval {status['chunk_interval']}")
+
+
+def apply_rollups(conn, refresh=True):
+    for rollup in ROLLUPS.values():
+        apply_rollup(conn, rollup)
+        if refresh:
+            refresh_rollup(conn, rollup)
+
+
+def refresh_existing_rollups(conn, tables):
+    """Refresh the rollups of `tables` that exist (after loading data into them)."""
+    for table in tables:
+        rollup = ROLLUPS.get(table)
+        if rollup is None:
+            continue
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (rollup.view,))
+            exists = cur.fetchone()[0]
+        conn.commit()
+        if exists:
+            refresh_rollup(conn, rollup)
+
+
+def apply_policies(conn, compress_now=True):
+    # rollups first, the refresh reads the chunks before they are compressed
+    apply_rollups(conn, refresh=compress_now)
+    for policy in POLICIES.values():
+        apply_chunk_interval(conn, policy)
+        apply_compression(conn, policy)
+        apply_retention(conn, policy)
+        if compress_now:
+            compress_old_chunks(conn, policy)
+
+
+if __name__ == "__main__":
+    from connection_to_db import CONN_BRNO
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "all"
+    try:
+        if command == "chunks":
+            for policy in POLICIES.values():
+                apply_chunk_interval(CONN_BRNO, policy, estimate=False)
+        elif command == "status":
+            print_status(CONN_BRNO)
+        elif command == "rollups":
+            apply_rollups(CONN_BRNO)
+        else:
+            apply_policies(CONN_BRNO)
+            print_status(CONN_BRNO)
+    finally:
+        CONN_BRNO.close()
@@ -14,13 +14,38 @@ sleep 2
 export POSTGRES_HOST_BRNO="${DB_HOST:-brno-db}"
 export POSTGRES_PORT_BRNO="${DB_PORT:-5432}"
 
-echo ">>> Running alerts loader..."
-python /app/database_creation/load_alerts_from_csv_to_db.py || exit 1
+# alerts, jams a nehody sa načítajú paralelne (LOADER_WORKERS procesov, veľké CSV po častiach)
+# Pôvodné postupné spustenie: LOADER_MODE=sequential
+started=$(date +%s)
 
-echo ">>> Running jams loader..."
-python /app/database_creation/load_jams_from_csv_to_db.py || exit 1
+# Chunk intervals must be set before the first chunks are created (TIMESCALE_POLICIES=off vypne politiky)
+if [ "${TIMESCALE_POLICIES:-on}" != "off" ]; then
+  echo ">>> Setting chunk intervals..."
+  python /app/database_creation/timescale_policies.py chunks || exit 1
+fi
 
-echo ">>> Running nehody loader..."
-python /app/database_creation/load_nehody_from_csv_to_db.py || exit 1
+# Street name dictionary: names of the map layer first, the loaders add the rest (street_id on insert)
+echo ">>> Preparing street name dictionary..."
+python /app/database_creation/streets_dict.py || exit 1
 
-echo ">>> All loaders finished."
+if [ "${LOADER_MODE:-parallel}" = "sequential" ]; then
+  echo ">>> Running alerts loader..."
+  python /app/database_creation/load_alerts_from_csv_to_db.py || exit 1
+
+  echo ">>> Running jams loader..."
+  python /app/database_creation/load_jams_from_csv_to_db.py || exit 1
+
+  echo ">>> Running nehody loader..."
+  python /app/database_creation/load_nehody_from_csv_to_db.py || exit 1
+else
+  echo ">>> Running parallel loader..."
+  python /app/database_creation/load_all.py || exit 1
+fi
+
+# Compression (segmentby street_id), retention; historical chunks are compressed right away
+if [ "${TIMESCALE_POLICIES:-on}" != "off" ]; then
+  echo ">>> Applying TimescaleDB compression and retention policies..."
+  python /app/database_creation/timescale_policies.py || exit 1
+fi
+
+echo ">>> All loaders finished in $(( $(date +%s) - started )) s (mode: ${LOADER_MODE:-parallel})."